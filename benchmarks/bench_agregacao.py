@@ -0,0 +1,96 @@
+"""
+Benchmark da agregação do desafio 2 (etapas 2.2 + 2.3): merge linha a linha
++ dois `groupby` pelas colunas de texto (referência) vs `aggregate_expenses`
+(grupos em códigos inteiros, descritivos do cadastro só no final).
+
+Uso:
+    python benchmarks/bench_agregacao.py --linhas 1000000 5000000 --operadoras 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cnpj, MODALIDADES, UFS
+from desafio_02_transformacao_validacao.src.main import AGGREGATION_KEYS, aggregate_expenses
+
+
+def agregacao_por_groupby(df_clean, df_cadop):
+    """Implementação anterior: merge em todas as linhas, 3 fillna e dois groupby por texto."""
+    df_enriched = pd.merge(df_clean, df_cadop, on='CNPJ', how='left')
+    df_enriched = df_enriched.rename(columns={'REGISTRO_OPERADORA': 'RegistroANS'})
+    df_enriched['UF'] = df_enriched['UF'].fillna('N/A')
+    df_enriched['Modalidade'] = df_enriched['Modalidade'].fillna('N/A')
+    df_enriched['RegistroANS'] = df_enriched['RegistroANS'].fillna('N/A')
+
+    df_quarterly = df_enriched.groupby(AGGREGATION_KEYS + ['Ano', 'Trimestre'], observed=True).agg(
+        Soma_Trimestre=('ValorDespesas', 'sum')
+    ).reset_index()
+    return df_quarterly.groupby(AGGREGATION_KEYS, observed=True).agg(
+        Total_Despesas=('Soma_Trimestre', 'sum'),
+        Media_Trimestral=('Soma_Trimestre', 'mean'),
+        Desvio_Padrao_Despesas=('Soma_Trimestre', 'std')
+    ).reset_index()
+
+
+def gerar_despesas(n_linhas, n_operadoras, seed=0):
+    """Despesas já validadas (df_clean) e o cadastro de operadoras ativas."""
+    rng = np.random.default_rng(seed)
+    cnpjs = np.array([gerar_cnpj(10_000_000_0001 + i * 7919) for i in range(n_operadoras)], dtype=object)
+    nomes = np.array([f"OPERADORA DE SAÚDE {i:05d} LTDA" for i in range(n_operadoras)], dtype=object)
+    trimestres = np.array(["1T", "2T", "3T", "4T"], dtype=object)
+
+    operadora = rng.integers(0, n_operadoras, n_linhas)
+    df_clean = pd.DataFrame({
+        "CNPJ": cnpjs[operadora],
+        "RazaoSocial": nomes[operadora],
+        "Trimestre": trimestres[rng.integers(0, 4, n_linhas)],
+        "Ano": 2025,
+        "ValorDespesas": rng.normal(1e6, 5e6, n_linhas).round(2).clip(0),
+    })
+
+    # ~5% das operadoras fora do cadastro de ativas
+    ativas = n_operadoras - n_operadoras // 20
+    df_cadop = pd.DataFrame({
+        "CNPJ": cnpjs[:ativas],
+        "REGISTRO_OPERADORA": [str(300000 + i) for i in range(ativas)],
+        "Modalidade": rng.choice(MODALIDADES, ativas),
+        "UF": rng.choice(UFS, ativas),
+    })
+    return df_clean, df_cadop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--operadoras", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12}{'groupby texto (s)':>20}{'códigos inteiros (s)':>22}{'speedup':>10}")
+    for n in args.linhas:
+        df_clean, df_cadop = gerar_despesas(n, args.operadoras)
+
+        inicio = time.perf_counter()
+        referencia = agregacao_por_groupby(df_clean, df_cadop)
+        t_referencia = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        agregado = aggregate_expenses(df_clean, df_cadop)
+        t_motor = time.perf_counter() - inicio
+
+        pd.testing.assert_frame_equal(
+            agregado.sort_values(AGGREGATION_KEYS).reset_index(drop=True),
+            referencia.sort_values(AGGREGATION_KEYS).reset_index(drop=True),
+            check_dtype=False,
+        )
+        print(f"{n:>12,}{t_referencia:>20.2f}{t_motor:>22.2f}{t_referencia / t_motor:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Teste de carga da API do desafio 4: clientes concorrentes contra um servidor
+uvicorn real, com latência p50/p99 por rota.
+
+Compara o acesso anterior ao banco (rotas `async def` com sqlite bloqueando o
+event loop e uma conexão nova por requisição, reproduzido em `app_anterior`)
+com o atual (rotas síncronas no threadpool + pool de conexões somente
+leitura). O ans.db é sintético, gerado pelo build_db.
+
+Uso:
+    python benchmarks/bench_api_carga.py --linhas 1000000 --clientes 16 --duracao 15
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import requests
+from fastapi import FastAPI, Query
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+APPS = {
+    "anterior (async + conexão por requisição)": "benchmarks.bench_api_carga:app_anterior",
+    "pool + threadpool": "desafio_04_api_interface.backend.main:app",
+}
+
+# Mesmas rotas do backend, no formato anterior ao pool
+app_anterior = FastAPI()
+
+
+def conexao_anterior():
+    conn = sqlite3.connect(os.environ["ANS_DB_PATH"])
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@app_anterior.get("/api/operadoras")
+async def operadoras_anterior(page: int = Query(1, ge=1), limit: int = Query(10, ge=1, le=100)):
+    conn = conexao_anterior()
+    total = conn.execute("SELECT COUNT(*) FROM (SELECT * FROM operadoras)").fetchone()[0]
+    rows = conn.execute("SELECT * FROM operadoras LIMIT ? OFFSET ?", (limit, (page - 1) * limit)).fetchall()
+    conn.close()
+    return {"data": [dict(row) for row in rows], "total": total, "page": page, "limit": limit}
+
+
+@app_anterior.get("/api/operadoras/{cnpj}")
+async def operadora_anterior(cnpj: str):
+    conn = conexao_anterior()
+    row = conn.execute("SELECT * FROM operadoras WHERE cnpj = ?", (cnpj,)).fetchone()
+    conn.close()
+    return dict(row)
+
+
+@app_anterior.get("/api/operadoras/{cnpj}/despesas")
+async def despesas_anterior(cnpj: str):
+    conn = conexao_anterior()
+    rows = conn.execute("SELECT id, cnpj, data_referencia, ano, trimestre, valor_centavos / 100.0 AS ValorDespesas "
+                        "FROM despesas WHERE cnpj = ? ORDER BY data_referencia DESC", (cnpj,)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+@app_anterior.get("/api/estatisticas")
+async def estatisticas_anterior():
+    conn = conexao_anterior()
+    total = conn.execute("SELECT SUM(valor_centavos) / 100.0 FROM despesas").fetchone()[0]
+    media = conn.execute("SELECT AVG(valor_centavos) / 100.0 FROM despesas").fetchone()[0]
+    top_5 = conn.execute("""
+        SELECT o.razao_social, SUM(d.valor_centavos) / 100.0 as total
+        FROM despesas d JOIN operadoras o ON d.cnpj = o.cnpj
+        GROUP BY d.cnpj ORDER BY total DESC LIMIT 5
+    """).fetchall()
+    uf_dist = conn.execute("""
+        SELECT o.uf, SUM(d.valor_centavos) / 100.0 as total
+        FROM despesas d JOIN operadoras o ON d.cnpj = o.cnpj
+        WHERE o.uf IS NOT NULL AND o.uf != 'N/A'
+        GROUP BY o.uf ORDER BY total DESC
+    """).fetchall()
+    conn.close()
+    return {"total_geral": total, "media_geral": media,
+            "top_5": [dict(r) for r in top_5], "distribuicao_uf": [dict(r) for r in uf_dist]}
+
+
+def gerar_banco(base, n_linhas, n_operadoras):
+    from desafio_04_api_interface.backend.build_db import build_db
+
+    cadastro = gerar_cadastro(base / "Relatorio_cadop.csv", n_operadoras=n_operadoras)
+    gerar_consolidado(base / "consolidado_despesas.csv", n_linhas, n_operadoras=n_operadoras)
+    db_path = base / "ans.db"
+    build_db(str(db_path), str(base / "consolidado_despesas.csv"), str(base / "Relatorio_cadop.csv"))
+    return db_path, cadastro["CNPJ"].tolist()
+
+
+def subir_servidor(alvo, db_path, porta):
+    env = dict(os.environ, ANS_DB_PATH=str(db_path))
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", alvo, "--port", str(porta), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    url = f"http://127.0.0.1:{porta}"
+    for _ in range(100):
+        try:
+            requests.get(f"{url}/api/operadoras?limit=1", timeout=1)
+            return processo, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError(f"Servidor {alvo} não subiu")
+
+
+def cliente(url, cnpjs, fim, latencias, seed):
+    """Mistura de rotas: a cada 20 requisições, uma /api/estatisticas (varre o banco)."""
+    rng = np.random.default_rng(seed)
+    sessao = requests.Session()
+    i = 0
+    while time.perf_counter() < fim:
+        cnpj = cnpjs[rng.integers(len(cnpjs))]
+        rota, caminho = [
+            ("estatisticas", "/api/estatisticas"),
+            ("listagem", f"/api/operadoras?page={rng.integers(1, 50)}&limit=10"),
+            ("detalhe", f"/api/operadoras/{cnpj}"),
+            ("despesas", f"/api/operadoras/{cnpj}/despesas"),
+        ][0 if i % 20 == 0 else 1 + i % 3]
+        inicio = time.perf_counter()
+        resposta = sessao.get(url + caminho)
+        resposta.raise_for_status()
+        latencias[rota].append(time.perf_counter() - inicio)
+        i += 1
+
+
+def medir(url, cnpjs, n_clientes, duracao):
+    latencias = defaultdict(list)
+    fim = time.perf_counter() + duracao
+    threads = [
+        threading.Thread(target=cliente, args=(url, cnpjs, fim, latencias, seed))
+        for seed in range(n_clientes)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--operadoras", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--duracao", type=float, default=15, help="segundos de carga por servidor")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Gerando ans.db sintético com {args.linhas:,} despesas...")
+        db_path, cnpjs = gerar_banco(Path(tmp), args.linhas, args.operadoras)
+
+        print(f"\n{args.clientes} clientes, {args.duracao:.0f} s por servidor")
+        print(f"{'servidor':<44}{'rota':<14}{'req':>7}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+        for nome, alvo in APPS.items():
+            processo, url = subir_servidor(alvo, db_path, args.porta)
+            try:
+                latencias = medir(url, cnpjs, args.clientes, args.duracao)
+            finally:
+                processo.terminate()
+                processo.wait()
+
+            todas = [t for valores in latencias.values() for t in valores]
+            for rota, valores in [*sorted(latencias.items()), ("(todas)", todas)]:
+                p50, p99 = np.percentile(valores, [50, 99]) * 1000
+                print(f"{nome:<44}{rota:<14}{len(valores):>7}{p50:>11.1f}{p99:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
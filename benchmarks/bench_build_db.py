@@ -0,0 +1,73 @@
+"""
+Benchmark da carga do ans.db (desafio 4): `DataFrame.to_sql` com as
+configurações padrão (implementação anterior) vs `bulk_load` (esquema
+tipado, executemany em lotes numa transação, pragmas de carga, índices no
+final, ANALYZE + VACUUM).
+
+Os DataFrames são preparados uma vez; mede-se só a escrita do banco.
+
+Uso:
+    python benchmarks/bench_build_db.py --linhas 1000000 5000000
+"""
+import argparse
+import contextlib
+import io
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+import desafio_04_api_interface.backend.build_db as desafio4
+
+
+def carregar_com_to_sql(db_path, df_cadop, df_despesas):
+    """Implementação anterior: to_sql sem tipos nem pragmas e índices depois."""
+    conn = sqlite3.connect(db_path)
+    df_cadop.to_sql('operadoras', conn, if_exists='replace', index=False)
+    df_despesas.to_sql('despesas', conn, if_exists='replace', index=False)
+    conn.execute("CREATE INDEX idx_cnpj ON despesas(cnpj)")
+    conn.execute("CREATE INDEX idx_cnpj_cad ON operadoras(cnpj)")
+    conn.commit()
+    conn.close()
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcao(*args)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--operadoras", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12}{'to_sql (s)':>12}{'linhas/s':>12}{'bulk_load (s)':>15}{'linhas/s':>12}{'speedup':>10}")
+    for n in args.linhas:
+        with tempfile.TemporaryDirectory() as base:
+            base = Path(base)
+            gerar_cadastro(base / "Relatorio_cadop.csv", args.operadoras)
+            gerar_consolidado(base / "consolidado_despesas.csv", n, args.operadoras)
+
+            df_cadop = desafio4.prepare_operadoras(base / "Relatorio_cadop.csv")
+            df_despesas = desafio4.prepare_despesas(base / "consolidado_despesas.csv")
+
+            t_to_sql = cronometrar(carregar_com_to_sql, str(base / "to_sql.db"), df_cadop, df_despesas)
+            t_bulk = cronometrar(desafio4.bulk_load, str(base / "bulk.db"), df_cadop, df_despesas)
+
+            with sqlite3.connect(base / "bulk.db") as conn:
+                assert conn.execute("SELECT COUNT(*) FROM despesas").fetchone()[0] == n
+
+            print(f"{n:>12,}{t_to_sql:>12.2f}{n / t_to_sql:>12,.0f}{t_bulk:>15.2f}{n / t_bulk:>12,.0f}"
+                  f"{t_to_sql / t_bulk:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark da busca de operadoras (/api/operadoras?search=): `LIKE '%x%'` na
+razão social e no CNPJ (implementação anterior, COUNT + página) vs índice
+FTS5 / faixa na chave primária (`get_operadoras`), sobre um cadastro
+sintético ~100x maior que o real.
+
+Uso:
+    python benchmarks/bench_busca.py --operadoras 400000 --repeticoes 50
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+PALAVRAS = [
+    "UNIMED", "AMIL", "SAÚDE", "ODONTO", "VIDA", "ASSISTÊNCIA", "MÉDICA", "HOSPITALAR",
+    "COOPERATIVA", "TRABALHO", "PLANO", "SEGURADORA", "CLÍNICA", "SERVIÇOS", "BENEFICÊNCIA",
+    "ASSOCIAÇÃO", "SERVIDORES", "PORTUGUESA", "SANTA", "CASA", "MISERICÓRDIA", "INTEGRAL",
+]
+CIDADES = [
+    "SÃO PAULO", "CAMPINAS", "RIBEIRÃO PRETO", "BELO HORIZONTE", "CURITIBA", "PORTO ALEGRE",
+    "FLORIANÓPOLIS", "GOIÂNIA", "RECIFE", "SALVADOR", "FORTALEZA", "BELÉM", "MANAUS", "NATAL",
+    "JUNDIAÍ", "SOROCABA", "LONDRINA", "MARINGÁ", "UBERLÂNDIA", "JOINVILLE", "PIRACICABA",
+]
+SILABAS = ["BA", "CO", "DI", "FE", "GA", "LU", "MA", "NO", "PE", "RI", "SO", "TA", "VE", "ZU"]
+BUSCAS = ["saude", "unimed campinas", "odonto mar", "santa casa misericordia sao",
+          "associacao servidores nat", "bacodi", "vida mazu", "12.345", "10000"]
+
+
+def gerar_banco(base, n_operadoras, seed=0):
+    """Cadastro sintético com nomes variados: duas palavras comuns + sobrenome + cidade."""
+    from desafio_04_api_interface.backend.build_db import build_db
+
+    rng = np.random.default_rng(seed)
+    cadastro = gerar_cadastro(base / "Relatorio_cadop.csv", n_operadoras=n_operadoras)
+    palavras = np.array(PALAVRAS, dtype=object)
+    cidades = np.array(CIDADES, dtype=object)
+    # ~2.700 sobrenomes de três sílabas
+    sobrenomes = np.array([a + b + c for a in SILABAS for b in SILABAS for c in SILABAS], dtype=object)
+    cadastro["Razao_Social"] = [
+        f"{' '.join(palavras[rng.choice(len(palavras), 2, replace=False)])} {sobrenome} {cidade} LTDA"
+        for sobrenome, cidade in zip(
+            sobrenomes[rng.integers(0, len(sobrenomes), n_operadoras)],
+            cidades[rng.integers(0, len(cidades), n_operadoras)],
+        )
+    ]
+    cadastro["Nome_Fantasia"] = [nome.rsplit(" ", 2)[0] for nome in cadastro["Razao_Social"]]
+    cadastro.to_csv(base / "Relatorio_cadop.csv", sep=";", index=False, encoding="utf-8")
+    gerar_consolidado(base / "consolidado_despesas.csv", 1_000, n_operadoras=100)
+
+    db_path = base / "ans.db"
+    build_db(str(db_path), str(base / "consolidado_despesas.csv"), str(base / "Relatorio_cadop.csv"))
+    return db_path
+
+
+def busca_like(conn, search, limit=10):
+    """Implementação anterior: dois LIKE com curinga à esquerda (COUNT + página)."""
+    query = "SELECT * FROM operadoras WHERE razao_social LIKE ? OR cnpj LIKE ?"
+    params = [f"%{search}%", f"%{search}%"]
+    total = conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+    conn.execute(query + " LIMIT ? OFFSET ?", params + [limit, 0]).fetchall()
+    return total
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, np.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operadoras", type=int, default=400_000)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Gerando ans.db com {args.operadoras:,} operadoras...")
+        db_path = gerar_banco(Path(tmp), args.operadoras)
+        os.environ["ANS_DB_PATH"] = str(db_path)
+        from desafio_04_api_interface.backend.main import get_operadoras, pool
+
+        conn = sqlite3.connect(db_path)
+        print(f"\n{'busca':<32}{'LIKE total':>11}{'LIKE (ms)':>11}{'índice total':>14}{'índice (ms)':>13}")
+        for termo in BUSCAS:
+            total_like, t_like = cronometrar(lambda: busca_like(conn, termo), max(1, args.repeticoes // 10))
+            resposta, t_indice = cronometrar(lambda: get_operadoras(page=1, limit=10, search=termo), args.repeticoes)
+            print(f"{termo:<32}{total_like:>11,}{t_like:>11.2f}{resposta['total']:>14,}{t_indice:>13.3f}")
+        conn.close()
+        pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
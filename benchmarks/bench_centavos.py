@@ -0,0 +1,101 @@
+"""
+Benchmark dos valores em centavos inteiros (comum/dinheiro.py) contra o
+caminho anterior em float64.
+
+- conversão: texto '1234,56' -> número, pelo `str.replace` + `astype(float)`
+  anterior, por um parser vetorizado dos textos direto para centavos e pelo
+  read_csv (vírgula decimal) seguido de `centavos`;
+- agregação: somas por operadora/trimestre do desafio 2 em float64 vs int64;
+- SQLite: SUM agrupado sobre REAL (reais) vs INTEGER (centavos);
+- ordem: quantos totais mudam quando as mesmas linhas chegam embaralhadas.
+
+Uso:
+    python benchmarks/bench_centavos.py --linhas 5000000 --operadoras 1000
+"""
+import argparse
+import io
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from comum.dinheiro import centavos
+from comum.esquema import ler_demonstracoes
+
+
+def cronometrar(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def centavos_por_texto(textos):
+    """Parser vetorizado dos textos: parte inteira * 100 + duas casas decimais."""
+    partes = textos.str.partition(",")
+    negativo = textos.str.startswith("-").to_numpy()
+    inteiro = partes[0].str.lstrip("-").astype("int64").to_numpy()
+    decimais = partes[2].str.ljust(2, "0").str[:2].astype("int64").to_numpy()
+    valor = inteiro * 100 + decimais
+    return np.where(negativo, -valor, valor)
+
+
+def somas(valores, celulas):
+    return pd.Series(valores).groupby(celulas).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=5_000_000)
+    parser.add_argument("--operadoras", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    reais = rng.normal(1e6, 5e6, args.linhas).round(2)
+    textos = pd.Series([f"{v:.2f}".replace(".", ",") for v in reais])
+    csv = ("REG_ANS;VL_SALDO_FINAL\n" + "\n".join("1;" + t for t in textos) + "\n").encode("utf-8")
+    celulas = rng.integers(0, args.operadoras * 4, args.linhas)
+
+    print(f"{args.linhas:,} valores, {args.operadoras * 4:,} grupos operadora x trimestre\n")
+    print(f"{'medida':<48}{'float64':>10}{'centavos':>10}")
+
+    t_float, como_float = cronometrar(lambda: textos.str.replace(",", ".", regex=False).astype(float).to_numpy())
+    t_texto, por_texto = cronometrar(lambda: centavos_por_texto(textos))
+    print(f"{'conversão dos textos (str.replace / parser)':<48}{t_float:>9.2f}s{t_texto:>9.2f}s")
+
+    t_leitura, lido = cronometrar(lambda: ler_demonstracoes(io.BytesIO(csv))["VL_SALDO_FINAL"].to_numpy())
+    t_conversao, em_centavos = cronometrar(lambda: centavos(lido))
+    print(f"{'read_csv com vírgula decimal (+ centavos)':<48}{t_leitura:>9.2f}s{t_leitura + t_conversao:>9.2f}s")
+    assert (em_centavos == por_texto).all() and (em_centavos == centavos(como_float)).all()
+
+    t_soma_float, soma_float = cronometrar(lambda: somas(lido, celulas))
+    t_soma_int, soma_int = cronometrar(lambda: somas(em_centavos, celulas))
+    print(f"{'soma por grupo (groupby)':<48}{t_soma_float:>9.2f}s{t_soma_int:>9.2f}s")
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE despesas (grupo INTEGER, valor REAL, valor_centavos INTEGER)")
+    conn.executemany("INSERT INTO despesas VALUES (?, ?, ?)",
+                     zip(celulas.tolist(), lido.tolist(), em_centavos.tolist()))
+    t_sql_float, _ = cronometrar(
+        lambda: conn.execute("SELECT grupo, SUM(valor) FROM despesas GROUP BY grupo").fetchall())
+    t_sql_int, _ = cronometrar(
+        lambda: conn.execute("SELECT grupo, SUM(valor_centavos) / 100.0 FROM despesas GROUP BY grupo").fetchall())
+    print(f"{'SQLite: SUM ... GROUP BY':<48}{t_sql_float:>9.2f}s{t_sql_int:>9.2f}s")
+    conn.close()
+
+    ordem = rng.permutation(args.linhas)
+    mudou_float = (somas(lido[ordem], celulas[ordem]) != soma_float).sum()
+    mudou_int = (somas(em_centavos[ordem], celulas[ordem]) != soma_int).sum()
+    print(f"\nTotais diferentes com as linhas embaralhadas: float64 {mudou_float}, centavos {mudou_int}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Microbenchmark da validação de CNPJ do desafio 2: `apply(validate_cnpj)`
+(escalar, referência) vs `validate_cnpj_batch` (vetorizado com NumPy).
+
+Uso:
+    python benchmarks/bench_cnpj.py --linhas 1000000 10000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cnpj
+from desafio_02_transformacao_validacao.src.main import validate_cnpj, validate_cnpj_batch
+
+
+def gerar_coluna(n, seed=0):
+    """Coluna CNPJ como no consolidado: poucos milhares de valores, ~5% inválidos."""
+    rng = np.random.default_rng(seed)
+    unicos = [gerar_cnpj(10_000_000_0001 + i * 7919) for i in range(4000)]
+    unicos += ["DESCONHECIDO", "12345678000100", "11111111111111"]
+    pesos = np.r_[np.full(4000, 0.95 / 4000), np.full(3, 0.05 / 3)]
+    return pd.Series(rng.choice(np.array(unicos, dtype=object), n, p=pesos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--sem-escalar", action="store_true", help="não roda o apply escalar (lento)")
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12}{'escalar (s)':>14}{'vetorizado (s)':>16}{'speedup':>10}")
+    for n in args.linhas:
+        coluna = gerar_coluna(n)
+
+        inicio = time.perf_counter()
+        vetorizado = validate_cnpj_batch(coluna)
+        t_vetorizado = time.perf_counter() - inicio
+
+        if args.sem_escalar:
+            print(f"{n:>12,}{'-':>14}{t_vetorizado:>16.2f}{'-':>10}")
+            continue
+
+        inicio = time.perf_counter()
+        escalar = coluna.apply(validate_cnpj).to_numpy()
+        t_escalar = time.perf_counter() - inicio
+
+        assert (escalar == vetorizado).all()
+        print(f"{n:>12,}{t_escalar:>14.2f}{t_vetorizado:>16.2f}{t_escalar / t_vetorizado:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark da consolidação do desafio 1: caminho em memória (atual) vs
+streaming em blocos (--chunk-size) vs leitura paralela (--workers).
+
+Cada modo roda em um processo separado para que o pico de RSS medido
+(ru_maxrss) seja apenas daquele modo.
+
+Uso:
+    python benchmarks/bench_consolidacao.py --linhas 500000 --trimestres 3 --chunk-size 100000 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_base_bruta
+
+
+def _executar(raw_dir, output_dir, chunk_size, workers, fila):
+    import desafio_01_api_ans.src.main as desafio1
+
+    desafio1.RAW_DIR = Path(raw_dir)
+    desafio1.OUTPUT_DIR = Path(output_dir)
+    desafio1.baixar_cadastro_operadoras = lambda: Path(raw_dir) / "cadastro_operadoras.csv"
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        desafio1.consolidar_despesas(chunk_size=chunk_size, workers=workers)
+    duracao = time.perf_counter() - inicio
+
+    # ru_maxrss vem em KiB no Linux; no modo paralelo soma o maior worker
+    pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if workers > 1:
+        pico_mb += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    fila.put((duracao, pico_mb))
+
+
+def medir(raw_dir, chunk_size, workers=1):
+    ctx = mp.get_context("spawn")
+    fila = ctx.Queue()
+    with tempfile.TemporaryDirectory() as output_dir:
+        proc = ctx.Process(target=_executar, args=(raw_dir, output_dir, chunk_size, workers, fila))
+        proc.start()
+        resultado = fila.get()
+        proc.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=500_000, help="linhas por trimestre")
+    parser.add_argument("--trimestres", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    trimestres = [f"2025_{i}T" for i in range(1, args.trimestres + 1)]
+    total_linhas = args.linhas * len(trimestres)
+
+    with tempfile.TemporaryDirectory() as raw_dir:
+        print(f"Gerando {total_linhas} linhas sintéticas ({len(trimestres)} trimestres)...")
+        gerar_base_bruta(Path(raw_dir), trimestres, args.linhas)
+
+        print(f"\n{'modo':<28}{'tempo (s)':>12}{'linhas/s':>14}{'pico RSS (MB)':>16}")
+        modos = [
+            ("memória (atual)", None, 1),
+            (f"streaming ({args.chunk_size})", args.chunk_size, 1),
+            (f"paralelo ({args.workers} workers)", args.chunk_size, max(args.workers, 2)),
+        ]
+        for nome, chunk_size, workers in modos:
+            duracao, pico_mb = medir(raw_dir, chunk_size, workers)
+            print(f"{nome:<28}{duracao:>12.2f}{total_linhas / duracao:>14,.0f}{pico_mb:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark do formato intermediário entre as etapas: CSV vs Parquet.
+
+Gera uma base sintética, roda o desafio 1 com e sem --parquet e mede, para
+cada etapa seguinte (desafio 2, desafio 3 e build_db do desafio 4):
+- o tempo de carga do consolidado (`ler_consolidado`) e a memória do DataFrame;
+- o tempo total da etapa.
+
+Uso:
+    python benchmarks/bench_formato_colunar.py --linhas 500000 --trimestres 3
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_base_bruta, gerar_cadastro
+from comum.consolidado import ler_consolidado
+import desafio_01_api_ans.src.main as desafio1
+import desafio_02_transformacao_validacao.src.main as desafio2
+import desafio_03_banco_dados.src.sqlite_test as desafio3
+import desafio_04_api_interface.backend.build_db as desafio4
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=500_000, help="linhas por trimestre")
+    parser.add_argument("--trimestres", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base:
+        base = Path(base)
+        raw = base / "raw"
+        saida1 = base / "desafio_01_api_ans" / "output"
+        dados2 = base / "desafio_02_transformacao_validacao" / "data"
+        for pasta in (raw, saida1, dados2):
+            pasta.mkdir(parents=True)
+
+        trimestres = [f"2025_{i}T" for i in range(1, args.trimestres + 1)]
+        print(f"Gerando {args.linhas * len(trimestres)} linhas sintéticas...")
+        gerar_base_bruta(raw, trimestres, args.linhas)
+        gerar_cadastro(dados2 / "Relatorio_cadop.csv", 1000)
+
+        desafio1.RAW_DIR = raw
+        desafio1.OUTPUT_DIR = saida1
+        desafio1.baixar_cadastro_operadoras = lambda: raw / "cadastro_operadoras.csv"
+        desafio2.baixar_arquivo = lambda *a, **k: None
+
+        csv_path = saida1 / "consolidado_despesas.csv"
+        cadop_path = dados2 / "Relatorio_cadop.csv"
+        parquet_path = csv_path.with_suffix(".parquet")
+
+        etapas = [
+            ("desafio_02", lambda: desafio2.main(str(base))),
+            ("desafio_03", lambda: desafio3.run_test(str(csv_path), str(cadop_path))),
+            ("build_db", lambda: desafio4.build_db(str(base / "ans.db"), str(csv_path), str(cadop_path))),
+        ]
+
+        os.chdir(base)
+        resultados = {}
+        for formato in ("csv", "parquet"):
+            t_escrita, _ = cronometrar(lambda: desafio1.consolidar_despesas(chunk_size=200_000, parquet=formato == "parquet"))
+            if formato == "csv" and parquet_path.exists():
+                parquet_path.unlink()
+
+            t_carga, df = cronometrar(lambda: ler_consolidado(csv_path))
+            memoria = df.memory_usage(deep=True).sum() / 1024 ** 2
+            tamanho = (parquet_path if formato == "parquet" else csv_path).stat().st_size / 1024 ** 2
+            del df
+
+            resultados[formato] = {"desafio_01 (escrita)": (t_escrita, None)}
+            for nome, etapa in etapas:
+                resultados[formato][nome] = (cronometrar(etapa)[0], t_carga)
+
+            print(f"\n{formato}: arquivo {tamanho:.1f} MB, DataFrame {memoria:.1f} MB, carga {t_carga:.2f}s")
+
+        print(f"\n{'etapa':<22}{'carga CSV':>11}{'carga Parquet':>15}{'total CSV':>11}{'total Parquet':>15}")
+        for nome in resultados["csv"]:
+            total_csv, carga_csv = resultados["csv"][nome]
+            total_pq, carga_pq = resultados["parquet"][nome]
+            cargas = f"{carga_csv:>11.2f}{carga_pq:>15.2f}" if carga_csv is not None else f"{'-':>11}{'-':>15}"
+            print(f"{nome:<22}{cargas}{total_csv:>11.2f}{total_pq:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark da serialização do histórico de despesas
+(/api/operadoras/{cnpj}/despesas) para um CNPJ com milhares de linhas:
+`[dict(row) for row in rows]` + jsonable_encoder do FastAPI (implementação
+anterior) vs as linhas do cursor direto para o JSON, em lotes.
+
+Uso:
+    python benchmarks/bench_json.py --linhas-por-cnpj 5000 --duracao 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+N_OPERADORAS = 10
+
+
+def gerar_banco(base, linhas_por_cnpj):
+    from desafio_04_api_interface.backend.build_db import build_db
+
+    cadastro = gerar_cadastro(base / "Relatorio_cadop.csv", n_operadoras=N_OPERADORAS)
+    gerar_consolidado(base / "consolidado_despesas.csv", linhas_por_cnpj * N_OPERADORAS, n_operadoras=N_OPERADORAS)
+    db_path = base / "ans.db"
+    build_db(str(db_path), str(base / "consolidado_despesas.csv"), str(base / "Relatorio_cadop.csv"))
+    return db_path, cadastro["CNPJ"][0]
+
+
+def app_anterior(pool):
+    """Mesma consulta, com a serialização anterior (dict por linha + jsonable_encoder)."""
+    app = FastAPI()
+
+    @app.get("/api/operadoras/{cnpj}/despesas")
+    def despesas(cnpj: str):
+        with pool.conexao() as conn:
+            rows = conn.execute("SELECT * FROM despesas WHERE cnpj = ? ORDER BY data_referencia DESC", (cnpj,)).fetchall()
+        return [dict(row) for row in rows]
+
+    return app
+
+
+def respostas_por_segundo(client, url, duracao):
+    n = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < duracao:
+        resposta = client.get(url, headers={"Accept-Encoding": "identity"})
+        n += 1
+    return n / (time.perf_counter() - inicio), resposta.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas-por-cnpj", type=int, nargs="+", default=[1_000, 5_000, 20_000])
+    parser.add_argument("--duracao", type=float, default=5, help="segundos medindo cada caminho")
+    args = parser.parse_args()
+
+    from desafio_04_api_interface.backend import serializacao
+
+    print(f"encoder: {'orjson' if serializacao._ORJSON is not None else 'json (biblioteca padrão)'}")
+    print(f"{'linhas':>8}{'anterior (resp/s)':>20}{'cursor -> JSON (resp/s)':>26}{'speedup':>10}")
+    for linhas in args.linhas_por_cnpj:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path, cnpj = gerar_banco(Path(tmp), linhas)
+            os.environ["ANS_DB_PATH"] = str(db_path)
+            from desafio_04_api_interface.backend.main import app, pool
+
+            url = f"/api/operadoras/{cnpj}/despesas"
+            antes, corpo_antes = respostas_por_segundo(TestClient(app_anterior(pool)), url, args.duracao)
+            depois, corpo_depois = respostas_por_segundo(TestClient(app), url, args.duracao)
+            pool.fechar()
+
+        assert corpo_antes == corpo_depois
+        print(f"{linhas:>8,}{antes:>20.1f}{depois:>26.1f}{depois / antes:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
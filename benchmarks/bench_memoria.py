@@ -0,0 +1,80 @@
+"""
+Benchmark da memória dos DataFrames do pipeline: leitura anterior (tudo como
+texto ou com tipos inferidos) vs o esquema de comum/esquema.py (usecols,
+category para texto repetido, int16 para o ano, float64 para o valor).
+
+Para cada tabela mede o tempo de leitura e o tamanho do DataFrame em memória
+(`memory_usage(deep=True)`):
+- trimestral: CSV de demonstrações contábeis lido pelo desafio 1;
+- cadop: Relatorio_cadop.csv lido pelos desafios 1, 2, 3 e pelo build_db;
+- consolidado: consolidado_despesas.csv lido pelos desafios 2, 3 e pela API.
+
+Uso:
+    python benchmarks/bench_memoria.py --linhas 1000000 --operadoras 1000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado, gerar_trimestre
+from comum.esquema import ler_cadop, ler_consolidado_csv, ler_demonstracoes, memoria_mb
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def trimestral_como_texto(caminho):
+    """Leitura anterior do desafio 1: todas as colunas como texto, valor convertido depois."""
+    df = pd.read_csv(caminho, sep=";", encoding="utf-8-sig", dtype=str)
+    df["VL_SALDO_FINAL"] = df["VL_SALDO_FINAL"].str.replace(",", ".", regex=False).astype(float)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="linhas do trimestral e do consolidado")
+    parser.add_argument("--operadoras", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base:
+        base = Path(base)
+        cadop = base / "Relatorio_cadop.csv"
+        trimestral = base / "1T2025.csv"
+        consolidado = base / "consolidado_despesas.csv"
+
+        print(f"Gerando {args.linhas} linhas sintéticas...")
+        df_cadop = gerar_cadastro(cadop, args.operadoras)
+        gerar_trimestre(trimestral, df_cadop["REGISTRO_OPERADORA"], args.linhas)
+        gerar_consolidado(consolidado, args.linhas, args.operadoras)
+
+        casos = [
+            ("trimestral", lambda: trimestral_como_texto(trimestral), lambda: ler_demonstracoes(trimestral)),
+            ("cadop", lambda: pd.read_csv(cadop, sep=";", encoding="utf-8", dtype=str), lambda: ler_cadop(cadop)),
+            ("consolidado", lambda: pd.read_csv(consolidado, dtype={"CNPJ": str}, low_memory=False),
+             lambda: ler_consolidado_csv(consolidado)),
+        ]
+
+        print(f"\n{'tabela':<14}{'MB antes':>10}{'MB depois':>11}{'redução':>9}{'leitura antes':>15}{'leitura depois':>16}")
+        for nome, anterior, atual in casos:
+            t_antes, df = cronometrar(anterior)
+            mb_antes = memoria_mb(df)
+            del df
+            t_depois, df = cronometrar(atual)
+            mb_depois = memoria_mb(df)
+            del df
+            print(f"{nome:<14}{mb_antes:>10.1f}{mb_depois:>11.1f}{mb_antes / mb_depois:>8.1f}x"
+                  f"{t_antes:>14.2f}s{t_depois:>15.2f}s")
+
+
+if __name__ == "__main__":
+    main()
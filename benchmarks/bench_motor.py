@@ -0,0 +1,126 @@
+"""
+Benchmark dos motores de consulta de comum/motor.py lado a lado: SQLite
+(padrão, dados copiados para um banco em memória) vs DuckDB (consolidado
+lido no lugar, em todos os núcleos), em 1x e 20x o volume de dados.
+
+Para cada escala e motor, as etapas do sqlite_test.py do desafio 3 mais o
+/api/estatisticas:
+- carga: SQLite lê o arquivo e copia as linhas (to_sql); DuckDB só cria a visão;
+- rollups: totais por operadora/trimestre e por UF (comum/rollups.py);
+- queries: as 3 consultas analíticas do desafio 3;
+- estatisticas: os resumos do /api/estatisticas (build_db.CONSULTAS_RESUMOS),
+  calculados a partir das despesas.
+
+O volume 20x repete as linhas do 1x (mesmas operadoras e trimestres, 20x mais
+linhas). Com --parquet os dois motores leem o Parquet em vez do CSV. Sem o
+pacote duckdb, só o SQLite é medido.
+
+Uso:
+    python benchmarks/bench_motor.py --linhas 1000000 --escalas 1 20
+    python benchmarks/bench_motor.py --linhas 1000000 --escalas 1 20 --parquet
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+from comum.consolidado import EscritorParquet, caminho_parquet
+from comum.esquema import ler_consolidado_csv
+from comum.motor import MOTORES, _duckdb, abrir_motor
+from desafio_03_banco_dados.src.sqlite_test import QUERIES
+from desafio_04_api_interface.backend.build_db import CONSULTAS_RESUMOS, prepare_operadoras
+
+ETAPAS = ["carga", "rollups", "queries", "estatisticas"]
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def repetir_csv(origem, destino, vezes):
+    """CSV com as linhas de `origem` repetidas `vezes` vezes (um cabeçalho só)."""
+    with open(origem, "rb") as f:
+        cabecalho = f.readline()
+        corpo = f.read()
+    with open(destino, "wb") as f:
+        f.write(cabecalho)
+        for _ in range(vezes):
+            f.write(corpo)
+
+
+def escrever_parquet(df, csv, vezes):
+    """Parquet irmão do CSV com o DataFrame repetido (um row group por repetição)."""
+    escritor = EscritorParquet(caminho_parquet(csv))
+    for _ in range(vezes):
+        escritor.escrever(df)
+    escritor.fechar()
+
+
+def medir(nome, consolidado, df_operadoras):
+    """Tempo de cada etapa (s) e resultados das queries no motor `nome`."""
+    banco = abrir_motor(nome)
+    banco.carregar_dataframe("operadoras", df_operadoras)
+    tempos = {}
+    tempos["carga"], _ = cronometrar(lambda: banco.carregar_consolidado("despesas", consolidado))
+    tempos["rollups"], _ = cronometrar(lambda: banco.criar_rollups(razao_social="RazaoSocial"))
+    tempos["queries"], resultados = cronometrar(lambda: [banco.consultar(query)[1] for _, query in QUERIES])
+    tempos["estatisticas"], _ = cronometrar(
+        lambda: [banco.consultar(select) for select in CONSULTAS_RESUMOS.values()])
+    banco.fechar()
+    return tempos, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="linhas do consolidado na escala 1x")
+    parser.add_argument("--operadoras", type=int, default=1000)
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 20])
+    parser.add_argument("--parquet", action="store_true", help="lê o consolidado em Parquet (requer pyarrow)")
+    args = parser.parse_args()
+
+    motores = [nome for nome in MOTORES if nome != "duckdb" or _duckdb() is not None]
+    if "duckdb" not in motores:
+        print("duckdb não instalado (pip install duckdb): medindo só o SQLite.\n")
+
+    with tempfile.TemporaryDirectory() as base:
+        base = Path(base)
+        cadop = base / "Relatorio_cadop.csv"
+        um = base / "consolidado_1x.csv"
+        print(f"Gerando {args.linhas:,} linhas sintéticas...")
+        gerar_cadastro(cadop, args.operadoras)
+        gerar_consolidado(um, args.linhas, args.operadoras)
+        df_operadoras = prepare_operadoras(cadop)
+        df_um = ler_consolidado_csv(um) if args.parquet else None
+
+        print(f"\n{'escala':<8}{'linhas':>13}  {'motor':<8}" + "".join(f"{etapa:>14}" for etapa in ETAPAS)
+              + f"{'total':>10}")
+        for escala in args.escalas:
+            consolidado = base / f"escala_{escala}" / "consolidado_despesas.csv"
+            consolidado.parent.mkdir()
+            repetir_csv(um, consolidado, escala)
+            if args.parquet:
+                escrever_parquet(df_um, consolidado, escala)
+
+            referencia = None
+            for nome in motores:
+                tempos, resultados = medir(nome, consolidado, df_operadoras)
+                if referencia is None:
+                    referencia = resultados
+                elif [len(r) for r in resultados] != [len(r) for r in referencia]:
+                    print(f"  aviso: {nome} devolveu resultados diferentes do {motores[0]}")
+                print(f"{escala:>5}x  {args.linhas * escala:>13,}  {nome:<8}"
+                      + "".join(f"{tempos[etapa]:>13.2f}s" for etapa in ETAPAS)
+                      + f"{sum(tempos.values()):>9.2f}s")
+            shutil.rmtree(consolidado.parent)
+
+
+if __name__ == "__main__":
+    main()
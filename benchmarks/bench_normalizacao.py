@@ -0,0 +1,104 @@
+"""
+Benchmark da normalização das cargas (comum/normalizacao.py) sobre colunas
+de milhões de linhas: as versões anteriores, uma chamada Python por linha
+(reproduzidas aqui), vs uma chamada por valor distinto.
+
+- data_referencia: lambda por linha sobre Trimestre vs `data_referencia`.
+- correção de acentuação: `.apply` célula a célula vs `corrigir_encoding`.
+- leitura de um CSV em latin-1: tentar utf-8-sig e reler em latin-1 (try/except)
+  vs `detectar_encoding` antes da leitura.
+
+Uso:
+    python benchmarks/bench_normalizacao.py --linhas 5000000 --operadoras 1000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from comum.normalizacao import corrigir_encoding, data_referencia, detectar_encoding
+
+
+def data_por_linha(ano, trimestre):
+    return ano.astype(str) + "-" + \
+        trimestre.astype(str).apply(lambda x: '01' if '1' in str(x) else ('04' if '2' in str(x) else '07' if '3' in str(x) else '10')) + "-01"
+
+
+def corrigir_por_linha(serie):
+    def fix(text):
+        if not isinstance(text, str): return text
+        try: return text.encode('latin-1').decode('utf-8')
+        except: return text
+    return serie.apply(fix)
+
+
+def ler_com_fallback(caminho):
+    try:
+        return pd.read_csv(caminho, sep=";", encoding="utf-8-sig")
+    except UnicodeDecodeError:
+        return pd.read_csv(caminho, sep=";", encoding="latin-1")
+
+
+def ler_detectando(caminho):
+    return pd.read_csv(caminho, sep=";", encoding=detectar_encoding(caminho))
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, np.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=5_000_000)
+    parser.add_argument("--operadoras", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"Gerando colunas com {args.linhas:,} linhas ({args.operadoras:,} razões sociais)...")
+    ano = pd.Series(rng.choice(np.array([2024, 2025], dtype="int16"), args.linhas))
+    trimestre = pd.Series(rng.choice(np.array(["1T", "2T", "3T", "4T"], dtype=object), args.linhas))
+    corretos = np.array([f"OPERADORA DE SAÚDE {i:05d} LTDA" for i in range(args.operadoras)], dtype=object)
+    # Metade das razões sociais com acentuação quebrada (UTF-8 lido como latin-1)
+    quebrados = np.array([
+        nome.encode("utf-8").decode("latin-1") if i % 2 else nome for i, nome in enumerate(corretos)
+    ], dtype=object)
+    indices = rng.integers(args.operadoras, size=args.linhas)
+    razao_social = pd.Series(quebrados[indices])
+
+    casos = [
+        ("data_referencia", lambda: data_por_linha(ano, trimestre), lambda: data_referencia(ano, trimestre)),
+        ("correção de acentuação", lambda: corrigir_por_linha(razao_social), lambda: corrigir_encoding(razao_social)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = Path(tmp) / "latin1.csv"
+        pd.DataFrame({"Razao_Social": corretos[indices], "Trimestre": trimestre}) \
+            .to_csv(caminho, sep=";", index=False, encoding="latin-1")
+        casos.append(("leitura CSV latin-1", lambda: ler_com_fallback(caminho), lambda: ler_detectando(caminho)))
+
+        print(f"\n{'etapa':<26}{'anterior (s)':>15}{'atual (s)':>15}{'ganho':>8}")
+        for nome, anterior, atual in casos:
+            esperado, t_anterior = cronometrar(anterior, args.repeticoes)
+            obtido, t_atual = cronometrar(atual, args.repeticoes)
+            if isinstance(esperado, pd.Series):
+                assert (obtido == esperado).all(), nome
+            else:
+                pd.testing.assert_frame_equal(obtido, esperado)
+            print(f"{nome:<26}{t_anterior:>15.2f}{t_atual:>15.2f}{t_anterior / t_atual:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
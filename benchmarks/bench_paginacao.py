@@ -0,0 +1,84 @@
+"""
+Benchmark da paginação do /api/operadoras sobre um cadastro sintético de
+1 milhão de operadoras: página por OFFSET (`page`) vs cursor (`next`) em
+profundidades crescentes, e o custo do total com e sem o cache.
+
+Uso:
+    python benchmarks/bench_paginacao.py --operadoras 1000000 --limit 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+
+def gerar_banco(base, n_operadoras):
+    from desafio_04_api_interface.backend.build_db import build_db
+
+    gerar_cadastro(base / "Relatorio_cadop.csv", n_operadoras=n_operadoras)
+    gerar_consolidado(base / "consolidado_despesas.csv", 1_000, n_operadoras=100)
+    db_path = base / "ans.db"
+    build_db(str(db_path), str(base / "consolidado_despesas.csv"), str(base / "Relatorio_cadop.csv"))
+    return db_path
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, np.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operadoras", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Gerando ans.db com {args.operadoras:,} operadoras...")
+        os.environ["ANS_DB_PATH"] = str(gerar_banco(Path(tmp), args.operadoras))
+        from desafio_04_api_interface.backend.main import get_operadoras, pool, totais
+
+        ultima = -(-args.operadoras // args.limit)
+        profundidades = sorted({p for p in [1, 10, 100, 1_000, ultima // 2, ultima] if p <= ultima})
+
+        print(f"\n{'página':>10}{'OFFSET (ms)':>14}{'cursor (ms)':>14}")
+        for page in profundidades:
+            _, t_offset = cronometrar(lambda: get_operadoras(page=page, limit=args.limit, search=None), args.repeticoes)
+            if page == 1:
+                t_cursor = t_offset
+            else:
+                # Cursor da página anterior (obtido fora da medição)
+                cursor = get_operadoras(page=page - 1, limit=args.limit, search=None)["next"]
+                _, t_cursor = cronometrar(
+                    lambda: get_operadoras(page=1, limit=args.limit, search=None, cursor=cursor), args.repeticoes
+                )
+            print(f"{page:>10,}{t_offset:>14.2f}{t_cursor:>14.2f}")
+
+        print(f"\n{'busca':<12}{'total (ms)':>12}{'com cache (ms)':>16}")
+        for termo in [None, "saude", "100"]:
+            def primeira_pagina():
+                return get_operadoras(page=1, limit=args.limit, search=termo)
+
+            totais._totais.clear()
+            _, t_sem_cache = cronometrar(lambda: (totais._totais.clear(), primeira_pagina()), args.repeticoes)
+            _, t_com_cache = cronometrar(primeira_pagina, args.repeticoes)
+            print(f"{str(termo):<12}{t_sem_cache:>12.2f}{t_com_cache:>16.2f}")
+        pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark das queries analíticas do desafio 3 (sqlite_test.py): sobre as
+despesas brutas (CTEs que reagrupam `despesas_consolidadas`, versão anterior
+reproduzida em `QUERIES_BRUTAS`) vs sobre os rollups trimestrais
+(comum/rollups.py), incluindo o custo de criar os rollups na carga.
+
+As tabelas têm o formato do sqlite_test.py e são geradas direto no SQLite.
+O volume padrão vai de ~2 milhões de despesas (a base real) a 10x isso.
+
+Uso:
+    python benchmarks/bench_rollups.py --linhas 2000000 20000000 --operadoras 1000 --trimestres 3
+"""
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import UFS
+from comum.rollups import criar_rollups
+from desafio_03_banco_dados.src.sqlite_test import QUERIES
+
+# Queries do sqlite_test.py antes dos rollups (razão social do consolidado,
+# como nas versões atuais, para os resultados serem comparáveis)
+QUERIES_BRUTAS = [
+    ("TOP 5 CRESCIMENTO PERCENTUAL", """
+    WITH primeiro_ponto AS (
+        SELECT CNPJ, MIN(RazaoSocial) as RazaoSocial, SUM(valor_centavos) as inicial
+        FROM despesas_consolidadas
+        WHERE data_referencia = (SELECT MIN(data_referencia) FROM despesas_consolidadas)
+        GROUP BY CNPJ
+    ),
+    ultimo_ponto AS (
+        SELECT CNPJ, SUM(valor_centavos) as final
+        FROM despesas_consolidadas
+        WHERE data_referencia = (SELECT MAX(data_referencia) FROM despesas_consolidadas)
+        GROUP BY CNPJ
+    )
+    SELECT
+        p.RazaoSocial,
+        ROUND(p.inicial / 100.0, 2) as Gasto_Inicial,
+        ROUND(u.final / 100.0, 2) as Gasto_Final,
+        ROUND((u.final - p.inicial) * 100.0 / NULLIF(p.inicial, 0), 2) as Crescimento_Perc
+    FROM primeiro_ponto p
+    JOIN ultimo_ponto u ON p.CNPJ = u.CNPJ
+    WHERE p.inicial > 0
+    ORDER BY Crescimento_Perc DESC
+    LIMIT 5
+    """),
+    ("DISTRIBUIÇÃO POR UF (ORDEM DE GASTO)", """
+    SELECT
+        o.UF,
+        ROUND(SUM(d.valor_centavos) / 100.0, 2) as Total_UF,
+        ROUND(SUM(d.valor_centavos) / 100.0 / COUNT(DISTINCT o.CNPJ), 2) as Media_Por_Operadora
+    FROM despesas_consolidadas d
+    JOIN operadoras o ON d.CNPJ = o.CNPJ
+    GROUP BY o.UF
+    ORDER BY Total_UF DESC
+    LIMIT 5
+    """),
+    ("ACIMA DA MÉDIA EM 2+ TRIMESTRES", """
+    WITH total_operadora_trimestre AS (
+        SELECT CNPJ, MIN(RazaoSocial) as RazaoSocial, data_referencia, SUM(valor_centavos) as total_op
+        FROM despesas_consolidadas
+        GROUP BY CNPJ, data_referencia
+    ),
+    media_global_trimestre AS (
+        SELECT data_referencia, AVG(total_op) as media_global
+        FROM total_operadora_trimestre
+        GROUP BY data_referencia
+    )
+    SELECT
+        MIN(t.RazaoSocial) as RazaoSocial,
+        COUNT(*) as Trimestres_Acima_Media
+    FROM total_operadora_trimestre t
+    JOIN media_global_trimestre m ON t.data_referencia = m.data_referencia
+    WHERE t.total_op > m.media_global
+    GROUP BY t.CNPJ
+    HAVING Trimestres_Acima_Media >= 2
+    ORDER BY t.CNPJ
+    LIMIT 5
+    """),
+]
+
+
+def gerar_banco(conn, n_linhas, n_operadoras, n_trimestres):
+    """operadoras + despesas_consolidadas no formato do sqlite_test.py"""
+    conn.executescript(f"""
+        CREATE TABLE operadoras (CNPJ TEXT, REGISTRO_OPERADORA TEXT, Modalidade TEXT, UF TEXT, Razao_Social TEXT);
+        INSERT INTO operadoras
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {n_operadoras - 1})
+        SELECT printf('%014d', i), printf('%06d', i), 'Medicina de Grupo',
+               substr('{"".join(UFS)}', (i % {len(UFS)}) * 2 + 1, 2),
+               printf('OPERADORA DE SAÚDE %05d LTDA', i)
+        FROM n;
+
+        CREATE TABLE despesas_consolidadas (
+            CNPJ TEXT, RazaoSocial TEXT, Trimestre TEXT, Ano INTEGER, ValorDespesas REAL, data_referencia TEXT,
+            valor_centavos INTEGER
+        );
+        INSERT INTO despesas_consolidadas
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {n_linhas - 1})
+        SELECT printf('%014d', (i * 7919) % {n_operadoras}),
+               printf('OPERADORA DE SAÚDE %05d LTDA', (i * 7919) % {n_operadoras}),
+               ((i % {n_trimestres}) % 4 + 1) || 'T', 2025 + (i % {n_trimestres}) / 4,
+               ((i * 2654435761) % 100000000) / 100.0,
+               printf('%d-%02d-01', 2025 + (i % {n_trimestres}) / 4, ((i % {n_trimestres}) % 4) * 3 + 1),
+               (i * 2654435761) % 100000000
+        FROM n;
+    """)
+    conn.commit()
+
+
+def mesmos_resultados(a, b):
+    """Linhas iguais, com floats comparados com tolerância (médias e divisões em SQL)."""
+    return len(a) == len(b) and all(
+        len(x) == len(y) and all(
+            math.isclose(u, v, rel_tol=1e-9) if isinstance(u, float) else u == v
+            for u, v in zip(x, y)
+        )
+        for x, y in zip(a, b)
+    )
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, np.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[2_000_000, 20_000_000])
+    parser.add_argument("--operadoras", type=int, default=1000)
+    parser.add_argument("--trimestres", type=int, default=3)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12}  {'query':<40}{'bruta (ms)':>12}{'rollup (ms)':>13}{'ganho':>8}")
+    for n_linhas in args.linhas:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "analise.db"))
+            conn.execute("PRAGMA cache_size=-262144")  # 256 MiB
+            gerar_banco(conn, n_linhas, args.operadoras, args.trimestres)
+
+            _, t_rollups = cronometrar(lambda: criar_rollups(conn, despesas="despesas_consolidadas", razao_social="RazaoSocial"), 1)
+            print(f"{n_linhas:>12,}  {'(criar rollups, uma vez na carga)':<40}{'':>12}{t_rollups:>13.1f}")
+
+            for (titulo, bruta), (_, rollup) in zip(QUERIES_BRUTAS, QUERIES):
+                esperado, t_bruta = cronometrar(lambda: conn.execute(bruta).fetchall(), args.repeticoes)
+                obtido, t_rollup = cronometrar(lambda: conn.execute(rollup).fetchall(), args.repeticoes)
+                assert mesmos_resultados(obtido, esperado), titulo
+                print(f"{n_linhas:>12,}  {titulo:<40}{t_bruta:>12.1f}{t_rollup:>13.1f}{t_bruta / t_rollup:>7.0f}x")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
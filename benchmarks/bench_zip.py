@@ -0,0 +1,103 @@
+"""
+Benchmark da leitura dos ZIPs trimestrais no desafio 1: extrair para o
+disco e depois ler (fluxo antigo) vs ler os CSVs direto de dentro do ZIP.
+
+Mede tempo total e bytes de I/O do processo, lidos de /proc/self/io:
+- rchar/wchar: bytes lidos/escritos via syscalls (inclui page cache);
+- write_bytes: bytes efetivamente enviados para o disco.
+
+Uso:
+    python benchmarks/bench_zip.py --linhas 500000 --trimestres 3 --chunk-size 100000
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing as mp
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_base_bruta, compactar_trimestres
+
+
+def _io_do_processo():
+    campos = {}
+    with open("/proc/self/io") as f:
+        for linha in f:
+            chave, valor = linha.split(":")
+            campos[chave] = int(valor)
+    return campos
+
+
+def _executar(raw_dir, chunk_size, extrair, fila):
+    import desafio_01_api_ans.src.main as desafio1
+
+    with tempfile.TemporaryDirectory() as trabalho:
+        trabalho = Path(trabalho)
+        shutil.copy(Path(raw_dir) / "cadastro_operadoras.csv", trabalho)
+        desafio1.OUTPUT_DIR = trabalho
+        desafio1.baixar_cadastro_operadoras = lambda: trabalho / "cadastro_operadoras.csv"
+
+        antes = _io_do_processo()
+        inicio = time.perf_counter()
+
+        if extrair:
+            # Fluxo antigo: descompacta cada ZIP em RAW_DIR/<ano>_<trimestre>/
+            for arquivo_zip in sorted(Path(raw_dir).glob("*.zip")):
+                with zipfile.ZipFile(arquivo_zip) as z:
+                    z.extractall(trabalho / arquivo_zip.stem)
+        else:
+            for arquivo_zip in sorted(Path(raw_dir).glob("*.zip")):
+                (trabalho / arquivo_zip.name).symlink_to(arquivo_zip)
+
+        desafio1.RAW_DIR = trabalho
+        with contextlib.redirect_stdout(io.StringIO()):
+            desafio1.consolidar_despesas(chunk_size=chunk_size)
+
+        duracao = time.perf_counter() - inicio
+        depois = _io_do_processo()
+
+    fila.put((duracao, {k: depois[k] - antes[k] for k in ("rchar", "wchar", "write_bytes")}))
+
+
+def medir(raw_dir, chunk_size, extrair):
+    ctx = mp.get_context("spawn")
+    fila = ctx.Queue()
+    proc = ctx.Process(target=_executar, args=(raw_dir, chunk_size, extrair, fila))
+    proc.start()
+    resultado = fila.get()
+    proc.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=500_000, help="linhas por trimestre")
+    parser.add_argument("--trimestres", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    trimestres = [f"2025_{i}T" for i in range(1, args.trimestres + 1)]
+
+    with tempfile.TemporaryDirectory() as raw_dir:
+        raw_dir = Path(raw_dir)
+        print(f"Gerando {args.linhas * len(trimestres)} linhas sintéticas em ZIPs...")
+        gerar_base_bruta(raw_dir, trimestres, args.linhas)
+        compactar_trimestres(raw_dir)
+
+        mb = 1024 * 1024
+        print(f"\n{'modo':<22}{'tempo (s)':>11}{'lido (MB)':>12}{'escrito (MB)':>14}{'disco (MB)':>12}")
+        for nome, extrair in [("extrair + ler", True), ("direto do ZIP", False)]:
+            duracao, io_bytes = medir(str(raw_dir), args.chunk_size, extrair)
+            print(f"{nome:<22}{duracao:>11.2f}{io_bytes['rchar'] / mb:>12.1f}"
+                  f"{io_bytes['wchar'] / mb:>14.1f}{io_bytes['write_bytes'] / mb:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
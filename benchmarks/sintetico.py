@@ -0,0 +1,172 @@
+"""
+Gerador de dados sintéticos no formato dos arquivos da ANS, usado pelos
+benchmarks e por testes que não podem depender dos downloads reais.
+
+Com os parâmetros padrão os dados são "limpos" (CNPJs válidos, UTF-8,
+operadoras com o mesmo número de lançamentos). Para aproximar dos arquivos
+reais, opcionalmente:
+- `fracao_invalidos`: CNPJs com dígito verificador errado no cadastro;
+- `fracao_mojibake` / `encoding`: razões sociais com acentuação quebrada
+  (UTF-8 lido como latin-1) e cadastro gravado em latin-1;
+- `assimetria`: lançamentos por operadora com distribuição de Zipf (poucas
+  operadoras grandes concentram a maior parte das linhas).
+Os CSVs trimestrais são escritos em blocos, então a memória não cresce com
+`n_linhas` (dezenas de milhões de linhas por arquivo).
+"""
+import numpy as np
+import pandas as pd
+
+COLUNAS_CADOP = [
+    "REGISTRO_OPERADORA", "CNPJ", "Razao_Social", "Nome_Fantasia", "Modalidade",
+    "Logradouro", "Numero", "Complemento", "Bairro", "Cidade", "UF", "CEP",
+    "DDD", "Telefone", "Fax", "Endereco_eletronico", "Representante",
+    "Cargo_Representante", "Regiao_de_Comercializacao", "Data_Registro_ANS",
+]
+
+MODALIDADES = [
+    "Medicina de Grupo", "Cooperativa Médica", "Odontologia de Grupo",
+    "Autogestão", "Seguradora Especializada em Saúde", "Filantropia",
+]
+
+UFS = ["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "CE", "PE", "DF", "GO", "ES"]
+
+# Linhas geradas e gravadas por vez nos CSVs trimestrais
+TAMANHO_BLOCO = 1_000_000
+
+
+def gerar_cnpj(base):
+    """Monta um CNPJ de 14 dígitos válido a partir de um inteiro de até 12 dígitos."""
+    digitos = [int(d) for d in f"{base:012d}"]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return "".join(str(d) for d in digitos)
+
+
+def invalidar_cnpj(cnpj):
+    """Mesmo CNPJ com o último dígito verificador trocado (sempre inválido)."""
+    return cnpj[:-1] + str((int(cnpj[-1]) + 1) % 10)
+
+
+def pesos_assimetricos(n, assimetria, rng):
+    """
+    Probabilidade de cada uma de `n` operadoras receber um lançamento: Zipf
+    com expoente `assimetria`, com as posições embaralhadas.
+    """
+    pesos = 1.0 / np.arange(1, n + 1) ** assimetria
+    return rng.permutation(pesos / pesos.sum())
+
+
+def gerar_cadastro(destino, n_operadoras=1000, seed=0, fracao_invalidos=0.0, fracao_mojibake=0.0,
+                   encoding="utf-8"):
+    """Escreve um Relatorio_cadop.csv sintético e devolve o DataFrame gerado."""
+    rng = np.random.default_rng(seed)
+    registros = [f"{300000 + i}" for i in range(n_operadoras)]
+
+    df = pd.DataFrame({col: "" for col in COLUNAS_CADOP}, index=range(n_operadoras))
+    df["REGISTRO_OPERADORA"] = registros
+    df["CNPJ"] = [gerar_cnpj(10_000_000_0001 + i * 7919) for i in range(n_operadoras)]
+    df["Razao_Social"] = [f"OPERADORA DE SAÚDE {i:05d} LTDA" for i in range(n_operadoras)]
+    df["Nome_Fantasia"] = [f"SAÚDE {i:05d}" for i in range(n_operadoras)]
+    df["Modalidade"] = rng.choice(MODALIDADES, n_operadoras)
+    df["UF"] = rng.choice(UFS, n_operadoras)
+    df["Data_Registro_ANS"] = "2000-01-01"
+
+    if fracao_invalidos:
+        invalidos = rng.random(n_operadoras) < fracao_invalidos
+        df.loc[invalidos, "CNPJ"] = df.loc[invalidos, "CNPJ"].map(invalidar_cnpj)
+    if fracao_mojibake:
+        quebrados = rng.random(n_operadoras) < fracao_mojibake
+        df.loc[quebrados, "Razao_Social"] = df.loc[quebrados, "Razao_Social"].map(
+            lambda nome: nome.encode("utf-8").decode("latin-1")
+        )
+
+    # O Relatorio_cadop.csv da ANS é UTF-8 sem BOM (cópias antigas em latin-1)
+    df.to_csv(destino, sep=";", index=False, encoding=encoding)
+    return df
+
+
+def gerar_trimestre(destino, registros, n_linhas, data="2025-01-01", seed=0, assimetria=0.0):
+    """
+    Escreve um CSV trimestral de demonstrações contábeis com `n_linhas`
+    linhas (vírgula decimal), em blocos de TAMANHO_BLOCO linhas.
+    """
+    rng = np.random.default_rng(seed)
+    registros = np.asarray(registros)
+    pesos = pesos_assimetricos(len(registros), assimetria, rng) if assimetria else None
+
+    with open(destino, "w", encoding="utf-8-sig", newline="") as f:
+        for inicio in range(0, max(n_linhas, 1), TAMANHO_BLOCO):
+            n = min(TAMANHO_BLOCO, n_linhas - inicio)
+            valores = rng.normal(1e6, 5e6, n).round(2)
+
+            df = pd.DataFrame({
+                "DATA": data,
+                "REG_ANS": rng.choice(registros, n, p=pesos),
+                "CD_CONTA_CONTABIL": rng.choice(["41", "411", "4111", "41111"], n),
+                "DESCRICAO": "EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS",
+                "VL_SALDO_INICIAL": "0,00",
+                "VL_SALDO_FINAL": [f"{v:.2f}".replace(".", ",") for v in valores],
+            })
+
+            df.to_csv(f, sep=";", index=False, header=inicio == 0)
+
+
+def gerar_consolidado(destino, n_linhas, n_operadoras=1000, trimestres=("1T", "2T", "3T"), ano=2025, seed=0):
+    """
+    Escreve um consolidado_despesas.csv no formato de saída do desafio 1,
+    com os CNPJs/razões sociais de `gerar_cadastro` (mesmo `n_operadoras`).
+    """
+    rng = np.random.default_rng(seed)
+    cnpjs = np.array([gerar_cnpj(10_000_000_0001 + i * 7919) for i in range(n_operadoras)], dtype=object)
+    nomes = np.array([f"OPERADORA DE SAÚDE {i:05d} LTDA" for i in range(n_operadoras)], dtype=object)
+
+    operadora = rng.integers(0, n_operadoras, n_linhas)
+    df = pd.DataFrame({
+        "CNPJ": cnpjs[operadora],
+        "RazaoSocial": nomes[operadora],
+        "Trimestre": np.array(trimestres, dtype=object)[rng.integers(0, len(trimestres), n_linhas)],
+        "Ano": ano,
+        "ValorDespesas": rng.normal(1e6, 5e6, n_linhas).round(2),
+    })
+
+    df.to_csv(destino, index=False, encoding="utf-8-sig")
+    return df
+
+
+def gerar_base_bruta(raw_dir, trimestres=("2025_1T", "2025_2T", "2025_3T"),
+                     linhas_por_trimestre=100_000, n_operadoras=1000, seed=0,
+                     fracao_invalidos=0.0, fracao_mojibake=0.0, assimetria=0.0):
+    """
+    Monta RAW_DIR como o desafio 1 espera: cadastro_operadoras.csv e uma
+    pasta <ano>_<trimestre> com um CSV por trimestre.
+    """
+    cadastro = gerar_cadastro(raw_dir / "cadastro_operadoras.csv", n_operadoras, seed,
+                              fracao_invalidos=fracao_invalidos, fracao_mojibake=fracao_mojibake)
+    registros = cadastro["REGISTRO_OPERADORA"].tolist()
+
+    for i, nome in enumerate(trimestres):
+        pasta = raw_dir / nome
+        pasta.mkdir(parents=True, exist_ok=True)
+        gerar_trimestre(pasta / f"{nome}.csv", registros, linhas_por_trimestre, seed=seed + i + 1,
+                        assimetria=assimetria)
+
+
+def compactar_trimestres(raw_dir, remover_pastas=True):
+    """
+    Converte cada pasta <ano>_<trimestre> em <ano>_<trimestre>.zip, como os
+    arquivos publicados pela ANS. Devolve a lista de ZIPs criados.
+    """
+    import shutil
+    import zipfile
+
+    zips = []
+    for pasta in sorted(p for p in raw_dir.iterdir() if p.is_dir()):
+        destino = raw_dir / f"{pasta.name}.zip"
+        with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as z:
+            for arquivo in sorted(pasta.glob("*.csv")):
+                z.write(arquivo, arcname=arquivo.name)
+        if remover_pastas:
+            shutil.rmtree(pasta)
+        zips.append(destino)
+    return zips
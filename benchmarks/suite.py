@@ -0,0 +1,313 @@
+"""
+Suíte de benchmarks reproduzível do pipeline e da API, em várias escalas.
+
+Para cada escala (total de linhas das demonstrações trimestrais), em um
+processo separado:
+1. gera a base sintética (benchmarks/sintetico.py) com o perfil dos arquivos
+   reais: CNPJs inválidos, razões sociais com acentuação quebrada, cadastro
+   do desafio 2 em latin-1 e lançamentos concentrados em poucas operadoras;
+2. roda desafio 1 (--chunk-size), desafio 2, sqlite_test do desafio 3 e
+   build_db, coletando o relatório por etapa de cada um (comum/metricas.py);
+3. mede a latência (p50/p95) das rotas principais da API sobre o ans.db
+   gerado, com o TestClient (sem rede).
+
+Os resultados vão para um JSON em benchmarks/resultados/. Com --comparar, a
+execução é comparada com um JSON anterior e as medidas que pioraram além da
+tolerância são listadas (código de saída 1).
+
+Mesma semente, mesmos dados: duas execuções só diferem pelo código e pela
+máquina.
+
+Uso:
+    python benchmarks/suite.py --escalas 100000 1000000 10000000
+    python benchmarks/suite.py --escalas 100000 --comparar benchmarks/resultados/anterior.json
+    python benchmarks/suite.py --escalas 50000000 --etapas desafio_01 build_db api
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.sintetico import gerar_base_bruta, gerar_cadastro
+
+VERSAO_RESULTADOS = 1
+RESULTADOS_DIR = ROOT / "benchmarks" / "resultados"
+
+ETAPAS = ["desafio_01", "desafio_02", "desafio_03", "build_db", "api"]
+
+# Perfil dos dados gerados (aproxima os arquivos da ANS)
+FRACAO_INVALIDOS = 0.02
+FRACAO_MOJIBAKE = 0.05
+ASSIMETRIA = 1.1
+
+# Diferenças abaixo disso (s ou ms) são ruído, não regressão
+PISO_REGRESSAO = {"tempo_s": 0.05, "p50_ms": 2.0}
+
+
+def rotas_api(cnpj, uf):
+    """(nome, caminho, máximo de requisições): exportação e busca são as mais pesadas."""
+    return [
+        ("listagem", "/api/operadoras?page=3&limit=10", None),
+        ("busca", "/api/operadoras?search=saude&limit=10", None),
+        ("detalhe", f"/api/operadoras/{cnpj}", None),
+        ("despesas", f"/api/operadoras/{cnpj}/despesas", None),
+        ("trimestres_operadora", f"/api/operadoras/{cnpj}/trimestres", None),
+        ("trimestres_uf", f"/api/ufs/{uf}/trimestres", None),
+        ("estatisticas", "/api/estatisticas", None),
+        ("crescimento", "/api/estatisticas/crescimento", None),
+        ("acima_media", "/api/estatisticas/acima_media", None),
+        ("exportar_csv_uf", f"/api/exportar?formato=csv&uf={uf}", 3),
+    ]
+
+
+def ler_relatorio(caminho):
+    """Etapas de um relatório de comum/metricas.py, indexadas por nome (mais o total)."""
+    relatorio = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    etapas = {etapa["nome"]: {k: v for k, v in etapa.items() if k != "nome"} for etapa in relatorio["etapas"]}
+    etapas["total"] = relatorio["total"]
+    return etapas
+
+
+def medir_api(db_path, requisicoes):
+    os.environ["ANS_DB_PATH"] = str(db_path)
+    from fastapi.testclient import TestClient
+    import desafio_04_api_interface.backend.main as desafio4
+
+    # Operadora com mais lançamentos e a UF com mais operadoras: os piores casos das rotas
+    with sqlite3.connect(db_path) as conn:
+        cnpj = conn.execute("SELECT cnpj FROM despesas GROUP BY cnpj ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+        uf = conn.execute("SELECT uf FROM operadoras GROUP BY uf ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+
+    resultados = {}
+    with TestClient(desafio4.app) as client:
+        for nome, caminho, maximo in rotas_api(cnpj, uf):
+            n = min(requisicoes, maximo or requisicoes)
+            client.get(caminho).raise_for_status()  # aquecimento (cache de páginas do SQLite)
+            tempos = []
+            for _ in range(n):
+                inicio = time.perf_counter()
+                resposta = client.get(caminho)
+                tempos.append(time.perf_counter() - inicio)
+                resposta.raise_for_status()
+            p50, p95 = np.percentile(tempos, [50, 95]) * 1000
+            resultados[nome] = {
+                "caminho": caminho,
+                "requisicoes": n,
+                "p50_ms": round(p50, 3),
+                "p95_ms": round(p95, 3),
+                "bytes": len(resposta.content),
+            }
+    return resultados
+
+
+def medir_escala(n_linhas, n_trimestres, n_operadoras, chunk_size, requisicoes, etapas, seed):
+    """Gera a base de uma escala, roda as etapas pedidas e devolve as medidas."""
+    import desafio_01_api_ans.src.main as desafio1
+    import desafio_02_transformacao_validacao.src.main as desafio2
+    import desafio_03_banco_dados.src.sqlite_test as desafio3
+    from desafio_04_api_interface.backend.build_db import build_db
+
+    with tempfile.TemporaryDirectory() as base:
+        base = Path(base)
+        raw = base / "raw"
+        saida1 = base / "desafio_01_api_ans" / "output"
+        dados2 = base / "desafio_02_transformacao_validacao" / "data"
+        for pasta in (raw, saida1, dados2):
+            pasta.mkdir(parents=True)
+
+        inicio = time.perf_counter()
+        trimestres = [f"2025_{i}T" for i in range(1, n_trimestres + 1)]
+        gerar_base_bruta(raw, trimestres, n_linhas // n_trimestres, n_operadoras, seed,
+                         fracao_invalidos=FRACAO_INVALIDOS, fracao_mojibake=FRACAO_MOJIBAKE,
+                         assimetria=ASSIMETRIA)
+        # Mesmos CNPJs do cadastro do desafio 1, mas em latin-1, como as cópias antigas da ANS
+        gerar_cadastro(dados2 / "Relatorio_cadop.csv", n_operadoras, seed, fracao_invalidos=FRACAO_INVALIDOS,
+                       fracao_mojibake=FRACAO_MOJIBAKE, encoding="latin-1")
+        resultado = {"linhas": n_trimestres * (n_linhas // n_trimestres),
+                     "geracao_s": round(time.perf_counter() - inicio, 3), "etapas": {}}
+
+        desafio1.RAW_DIR = raw
+        desafio1.OUTPUT_DIR = saida1
+        desafio1.baixar_cadastro_operadoras = lambda: raw / "cadastro_operadoras.csv"
+        desafio2.baixar_arquivo = lambda *args, **kwargs: None
+
+        csv_path = str(saida1 / "consolidado_despesas.csv")
+        cadop_path = str(dados2 / "Relatorio_cadop.csv")
+        db_path = base / "ans.db"
+        os.chdir(base)
+
+        # O desafio 1 sempre roda: as outras etapas leem o consolidado dele
+        execucoes = [
+            ("desafio_01", lambda: desafio1.consolidar_despesas(chunk_size=chunk_size), saida1 / "metricas.json"),
+            ("desafio_02", lambda: desafio2.main(str(base)),
+             base / "desafio_02_transformacao_validacao" / "output" / "metricas.json"),
+            ("desafio_03", lambda: desafio3.run_test(csv_path, cadop_path), base / "metricas_sqlite_test.json"),
+            ("build_db", lambda: build_db(str(db_path), csv_path, cadop_path), base / "metricas_build_db.json"),
+        ]
+        for nome, executar, relatorio in execucoes:
+            if nome != "desafio_01" and nome not in etapas:
+                continue
+            print(f"  {nome}...", flush=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                executar()
+            resultado["etapas"][nome] = ler_relatorio(relatorio)
+
+        if "api" in etapas:
+            if not db_path.exists():
+                raise SystemExit("A etapa api precisa do build_db (--etapas ... build_db api)")
+            print("  api...", flush=True)
+            resultado["api"] = medir_api(db_path, requisicoes)
+
+    return resultado
+
+
+def _executar_escala(parametros, fila):
+    try:
+        fila.put(("ok", medir_escala(**parametros)))
+    except BaseException as erro:
+        fila.put(("erro", repr(erro)))
+        raise
+
+
+def executar_escala(**parametros):
+    """medir_escala em um processo novo: pico de RSS e módulos isolados por escala."""
+    ctx = mp.get_context("spawn")
+    fila = ctx.Queue()
+    proc = ctx.Process(target=_executar_escala, args=(parametros, fila))
+    proc.start()
+    status, resultado = fila.get()
+    proc.join()
+    if status != "ok":
+        raise RuntimeError(f"Escala {parametros['n_linhas']:,} falhou: {resultado}")
+    return resultado
+
+
+def ambiente():
+    import pandas as pd
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "commit": commit,
+    }
+
+
+def medidas_comparaveis(resultados):
+    """{(escala, medida): valor} com o tempo de cada etapa e o p50 de cada rota."""
+    medidas = {}
+    for escala, resultado in resultados["escalas"].items():
+        for execucao, etapas in resultado["etapas"].items():
+            for etapa, valores in etapas.items():
+                medidas[(escala, f"{execucao}/{etapa}", "tempo_s")] = valores["tempo_s"]
+        for rota, valores in resultado.get("api", {}).items():
+            medidas[(escala, f"api/{rota}", "p50_ms")] = valores["p50_ms"]
+    return medidas
+
+
+def comparar(anterior, atual, tolerancia=0.10):
+    """
+    Medidas presentes nas duas execuções: [(escala, medida, unidade, antes,
+    depois, variação, regrediu)]. Regride o que piorou mais que `tolerancia`
+    e mais que o piso de ruído da unidade.
+    """
+    antes = medidas_comparaveis(anterior)
+    depois = medidas_comparaveis(atual)
+    linhas = []
+    for chave in sorted(antes.keys() & depois.keys(), key=lambda c: (int(c[0]), c[1])):
+        escala, medida, unidade = chave
+        a, d = antes[chave], depois[chave]
+        variacao = (d - a) / a if a else 0.0
+        regrediu = variacao > tolerancia and d - a > PISO_REGRESSAO[unidade]
+        linhas.append((escala, medida, unidade, a, d, variacao, regrediu))
+    return linhas
+
+
+def imprimir_resumo(resultados):
+    print(f"\n{'linhas':>12}  {'medida':<40}{'tempo (s)':>11}{'CPU (s)':>10}{'pico RSS (MB)':>15}")
+    for escala, resultado in resultados["escalas"].items():
+        for execucao, etapas in resultado["etapas"].items():
+            for etapa, v in etapas.items():
+                pico = f"{v['pico_rss_mb']:>15.1f}" if v.get("pico_rss_mb") is not None else f"{'-':>15}"
+                print(f"{int(escala):>12,}  {execucao + '/' + etapa:<40}{v['tempo_s']:>11.2f}{v['cpu_s']:>10.2f}{pico}")
+        for rota, v in resultado.get("api", {}).items():
+            print(f"{int(escala):>12,}  {'api/' + rota:<40}{'p50 ' + format(v['p50_ms'], '.1f') + ' ms':>21}"
+                  f"{'p95 ' + format(v['p95_ms'], '.1f') + ' ms':>15}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="total de linhas das demonstrações trimestrais (ex.: 100000 ... 50000000)")
+    parser.add_argument("--trimestres", type=int, default=3)
+    parser.add_argument("--operadoras", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=500_000, help="blocos do desafio 1")
+    parser.add_argument("--requisicoes", type=int, default=30, help="requisições por rota da API")
+    parser.add_argument("--etapas", nargs="+", choices=ETAPAS, default=ETAPAS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", type=Path, default=None, help="JSON de resultados (padrão: benchmarks/resultados/)")
+    parser.add_argument("--comparar", type=Path, default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="piora relativa aceita na comparação")
+    args = parser.parse_args()
+
+    resultados = {
+        "versao": VERSAO_RESULTADOS,
+        "iniciada_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ambiente": ambiente(),
+        "parametros": {
+            "trimestres": args.trimestres, "operadoras": args.operadoras, "chunk_size": args.chunk_size,
+            "requisicoes": args.requisicoes, "etapas": args.etapas, "seed": args.seed,
+            "fracao_invalidos": FRACAO_INVALIDOS, "fracao_mojibake": FRACAO_MOJIBAKE, "assimetria": ASSIMETRIA,
+        },
+        "escalas": {},
+    }
+    for n_linhas in args.escalas:
+        print(f"Escala {n_linhas:,} linhas...", flush=True)
+        resultados["escalas"][str(n_linhas)] = executar_escala(
+            n_linhas=n_linhas, n_trimestres=args.trimestres, n_operadoras=args.operadoras,
+            chunk_size=args.chunk_size, requisicoes=args.requisicoes, etapas=args.etapas, seed=args.seed,
+        )
+
+    saida = args.saida or RESULTADOS_DIR / f"suite_{datetime.now():%Y%m%d_%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultados, ensure_ascii=False, indent=2), encoding="utf-8")
+    imprimir_resumo(resultados)
+    print(f"\nResultados em: {saida}")
+
+    if args.comparar:
+        anterior = json.loads(args.comparar.read_text(encoding="utf-8"))
+        linhas = comparar(anterior, resultados, args.tolerancia)
+        print(f"\nComparação com {args.comparar} (tolerância {args.tolerancia:.0%})")
+        print(f"{'linhas':>12}  {'medida':<40}{'antes':>11}{'depois':>11}{'variação':>10}")
+        for escala, medida, unidade, a, d, variacao, regrediu in linhas:
+            marca = "  REGRESSÃO" if regrediu else ""
+            print(f"{int(escala):>12,}  {medida + ' (' + unidade + ')':<40}{a:>11.3f}{d:>11.3f}{variacao:>+10.1%}{marca}")
+        if any(linha[-1] for linha in linhas):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
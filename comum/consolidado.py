@@ -0,0 +1,105 @@
+"""
+Formato colunar (Parquet) do consolidado de despesas.
+
+O desafio 1 pode gravar, além do CSV/ZIP de entrega, um
+`consolidado_despesas.parquet` com tipos definidos (CNPJ, RazaoSocial e
+Trimestre categóricos, Ano int16, ValorDespesas float64). As etapas
+seguintes usam `ler_consolidado`, que prefere o Parquet (lido com memory
+map) quando ele existe e não é mais antigo que o CSV. O CSV é lido com os
+mesmos tipos (comum/esquema.py).
+
+O pyarrow é opcional: sem ele, tudo continua funcionando só com o CSV.
+"""
+import os
+from pathlib import Path
+
+from comum.esquema import COLUNAS_CONSOLIDADO, ler_consolidado_csv
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def schema_parquet():
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError("A saída Parquet requer o pacote pyarrow (pip install pyarrow).")
+
+    texto_categorico = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("CNPJ", texto_categorico),
+        ("RazaoSocial", texto_categorico),
+        ("Trimestre", texto_categorico),
+        ("Ano", pa.int16()),
+        ("ValorDespesas", pa.float64()),
+    ])
+
+
+class EscritorParquet:
+    """Anexa blocos do consolidado a um arquivo Parquet (um row group por bloco)."""
+
+    def __init__(self, caminho):
+        pa = _pyarrow()
+        self.schema = schema_parquet()
+        self.caminho = Path(caminho)
+        self._temporario = self.caminho.with_name(self.caminho.name + ".tmp")
+        self._writer = pa.parquet.ParquetWriter(self._temporario, self.schema, compression="snappy")
+
+    def escrever(self, bloco):
+        pa = _pyarrow()
+        bloco = bloco[COLUNAS_CONSOLIDADO].astype({"Ano": "int16"})
+        self._writer.write_table(pa.Table.from_pandas(bloco, schema=self.schema, preserve_index=False))
+
+    def escrever_tabela(self, tabela):
+        self._writer.write_table(tabela.cast(self.schema))
+
+    def fechar(self):
+        self._writer.close()
+        os.replace(self._temporario, self.caminho)
+
+
+def juntar_parquets(partes, destino):
+    """Concatena Parquets do consolidado (ex.: partições trimestrais), um row group por vez."""
+    pa = _pyarrow()
+    escritor = EscritorParquet(destino)
+    for parte in partes:
+        arquivo = pa.parquet.ParquetFile(parte)
+        for i in range(arquivo.num_row_groups):
+            escritor.escrever_tabela(arquivo.read_row_group(i))
+    escritor.fechar()
+
+
+def caminho_parquet(caminho_csv):
+    return Path(caminho_csv).with_suffix(".parquet")
+
+
+def parquet_atual(caminho_csv):
+    """Parquet irmão do CSV, se existir e não for mais antigo que o CSV; senão None."""
+    caminho_csv = Path(caminho_csv)
+    parquet = caminho_parquet(caminho_csv)
+    if parquet.exists() and (
+        not caminho_csv.exists() or parquet.stat().st_mtime >= caminho_csv.stat().st_mtime
+    ):
+        return parquet
+    return None
+
+
+def ler_consolidado(caminho_csv, colunas=None):
+    """
+    Lê o consolidado do desafio 1. Usa o Parquet irmão do CSV quando ele
+    existe, não é mais antigo que o CSV e o pyarrow está instalado; caso
+    contrário, lê o CSV. Os tipos são os mesmos nos dois casos.
+    """
+    parquet = parquet_atual(caminho_csv)
+
+    pa = _pyarrow()
+    if pa is not None and parquet is not None:
+        tabela = pa.parquet.read_table(parquet, columns=colunas, memory_map=True)
+        return tabela.to_pandas()
+
+    return ler_consolidado_csv(caminho_csv, colunas)
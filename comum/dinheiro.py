@@ -0,0 +1,51 @@
+"""
+Valores em dinheiro como centavos inteiros (int64).
+
+Somas em float64 dependem da ordem das parcelas: com a base em outra ordem
+os totais mudam nos últimos dígitos, e nada garante os 2 decimais do
+DECIMAL(18,2) de desafio_03_banco_dados/sql/schema.sql. Em centavos a soma
+é exata e sai igual em qualquer ordem.
+
+Os valores chegam em reais com 2 casas, convertidos pelo read_csv (vírgula
+decimal, float_precision='round_trip'). O float64 mais próximo de um valor
+com 2 casas, multiplicado por 100 e arredondado, devolve exatamente os
+centavos enquanto |centavos| < 2**51 (~22 trilhões de reais por
+lançamento). É uma operação do NumPy sobre a coluna inteira, sem passar por
+texto; `python benchmarks/bench_centavos.py` compara com a conversão a
+partir dos textos e com as somas em float64.
+
+A saída continua em reais: `reais` divide por 100 uma vez, no final.
+"""
+import numpy as np
+import pandas as pd
+
+LIMITE_CENTAVOS = 2**51
+
+
+def centavos(valores):
+    """
+    Reais (float) -> centavos int64 (array NumPy). Valores ausentes ou fora
+    do limite não têm representação exata: ValueError.
+    """
+    centavos = np.rint(np.asarray(valores, dtype="float64") * 100)
+    # NaN também falha na comparação
+    if not (np.abs(centavos) < LIMITE_CENTAVOS).all():
+        raise ValueError("Valor ausente ou grande demais para centavos exatos em int64.")
+    return centavos.astype(np.int64)
+
+
+def coluna_centavos(serie):
+    """
+    Coluna de reais -> coluna de centavos para gravar no SQLite: int64, ou
+    object com None nos valores ausentes (NULL no banco).
+    """
+    ausentes = serie.isna()
+    resultado = pd.Series(centavos(serie.fillna(0)), index=serie.index)
+    if ausentes.any():
+        resultado = resultado.astype(object).mask(ausentes, None)
+    return resultado
+
+
+def reais(centavos):
+    """Centavos -> reais float64 (o double mais próximo do valor com 2 casas)."""
+    return np.asarray(centavos, dtype="float64") / 100
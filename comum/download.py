@@ -0,0 +1,218 @@
+"""
+Download dos arquivos de dados abertos da ANS.
+
+Usado pelos desafios 1 e 2 no lugar de `requests.get` direto:
+- sessão HTTP compartilhada com pool de conexões e retry;
+- escrita em streaming para `<destino>.part` e `os.replace` atômico no final;
+- retomada de downloads interrompidos via `Range` (+ `If-Range`), sem
+  compressão de transporte (`Accept-Encoding: identity`) para que os
+  deslocamentos do `Range` e o `Content-Length` contem bytes do arquivo;
+- revalidação do cache com `ETag`/`Last-Modified` (304 reaproveita o arquivo);
+- limite de concorrência para baixar vários arquivos de uma vez.
+
+Os validadores HTTP ficam em `<destino>.meta.json`, ao lado do arquivo.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TIMEOUT_PADRAO = (10, 60)  # (conexão, leitura) em segundos
+TAMANHO_BLOCO = 1024 * 1024
+TENTATIVAS = 3
+
+_sessao = None
+_trava_sessao = threading.Lock()
+
+
+def criar_sessao(max_conexoes=10, tentativas=TENTATIVAS):
+    """Cria uma sessão com pool de conexões e retry para erros transitórios."""
+    retry = Retry(
+        total=tentativas,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+    )
+    adapter = HTTPAdapter(pool_connections=max_conexoes, pool_maxsize=max_conexoes, max_retries=retry)
+
+    sessao = requests.Session()
+    sessao.mount("http://", adapter)
+    sessao.mount("https://", adapter)
+    return sessao
+
+
+def sessao_padrao():
+    """Sessão compartilhada pelo processo (criada na primeira chamada)."""
+    global _sessao
+    with _trava_sessao:
+        if _sessao is None:
+            _sessao = criar_sessao()
+        return _sessao
+
+
+def _caminho_meta(destino):
+    return destino.with_name(destino.name + ".meta.json")
+
+
+def _caminho_parcial(destino):
+    return destino.with_name(destino.name + ".part")
+
+
+def _ler_meta(destino):
+    try:
+        return json.loads(_caminho_meta(destino).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _salvar_meta(destino, meta):
+    caminho = _caminho_meta(destino)
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    temporario.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(temporario, caminho)
+
+
+def _validadores(resposta):
+    return {
+        "etag": resposta.headers.get("ETag"),
+        "last_modified": resposta.headers.get("Last-Modified"),
+    }
+
+
+def _inicio_content_range(resposta):
+    # Content-Range: bytes 100-199/200
+    valor = resposta.headers.get("Content-Range", "")
+    try:
+        return int(valor.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def _descartar_parcial(destino, parcial, meta):
+    """Apaga o .part e seu validador: a próxima tentativa baixa do zero, sem Range."""
+    parcial.unlink(missing_ok=True)
+    meta.pop("parcial", None)
+    _salvar_meta(destino, meta)
+
+
+def _tentar_baixar(url, destino, sessao, timeout, tamanho_bloco):
+    """
+    Uma tentativa de download. Retorna True se o arquivo foi (re)baixado e
+    False se o servidor confirmou que o cache continua válido (304).
+    """
+    meta = _ler_meta(destino)
+    parcial = _caminho_parcial(destino)
+    headers = {"Accept-Encoding": "identity"}
+
+    if destino.exists():
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    # Só retoma se houver um validador do arquivo parcial para o If-Range:
+    # se o arquivo mudou no servidor, ele responde 200 com o conteúdo inteiro.
+    validador_parcial = meta.get("parcial", {})
+    ja_baixado = parcial.stat().st_size if parcial.exists() else 0
+    if ja_baixado and (validador_parcial.get("etag") or validador_parcial.get("last_modified")):
+        headers["Range"] = f"bytes={ja_baixado}-"
+        headers["If-Range"] = validador_parcial.get("etag") or validador_parcial["last_modified"]
+    else:
+        ja_baixado = 0
+
+    with sessao.get(url, headers=headers, stream=True, timeout=timeout) as resposta:
+        if resposta.status_code == 304:
+            return False
+
+        if resposta.status_code == 416 and ja_baixado:
+            # .part já do tamanho do arquivo (ou maior), por exemplo quando o processo
+            # parou antes do os.replace: o mesmo Range falharia em todas as tentativas
+            _descartar_parcial(destino, parcial, meta)
+            raise requests.exceptions.RequestException(
+                f"Range de {url} recusado (416) com {ja_baixado} bytes no parcial"
+            )
+
+        resposta.raise_for_status()
+
+        if resposta.status_code == 206:
+            if _inicio_content_range(resposta) != ja_baixado:
+                # Trecho que não continua o .part: gravá-lo daria um arquivo truncado
+                _descartar_parcial(destino, parcial, meta)
+                raise requests.exceptions.RequestException(
+                    f"Content-Range inesperado de {url}: {resposta.headers.get('Content-Range')}"
+                )
+            modo = "ab"
+        else:
+            modo = "wb"
+            ja_baixado = 0
+
+        meta["parcial"] = _validadores(resposta)
+        _salvar_meta(destino, meta)
+
+        esperado = resposta.headers.get("Content-Length")
+        escritos = 0
+        with open(parcial, modo) as f:
+            for bloco in resposta.iter_content(chunk_size=tamanho_bloco):
+                f.write(bloco)
+                escritos += len(bloco)
+
+        # Servidor que comprime mesmo com identity: o Content-Length é do corpo
+        # comprimido, então a conferência usa os bytes recebidos antes da descompressão
+        recebidos = resposta.raw.tell() if resposta.headers.get("Content-Encoding") else escritos
+        if esperado is not None and recebidos != int(esperado):
+            raise requests.exceptions.ContentDecodingError(
+                f"Download incompleto de {url}: {recebidos} de {esperado} bytes"
+            )
+
+        os.replace(parcial, destino)
+
+        meta = {"url": url, **_validadores(resposta), "tamanho": destino.stat().st_size}
+        _salvar_meta(destino, meta)
+        return True
+
+
+def baixar_arquivo(url, destino, sessao=None, timeout=TIMEOUT_PADRAO,
+                   tentativas=TENTATIVAS, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Baixa `url` para `destino`, revalidando o cache se o arquivo já existir.
+
+    Falhas no meio da transferência são retomadas a partir do `.part`. Se o
+    servidor estiver inacessível e já houver uma cópia local completa, ela é
+    reaproveitada. Retorna o caminho do arquivo.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    sessao = sessao or sessao_padrao()
+
+    for tentativa in range(1, tentativas + 1):
+        try:
+            if _tentar_baixar(url, destino, sessao, timeout, tamanho_bloco):
+                print(f"Baixado: {destino.name} ({destino.stat().st_size} bytes)")
+            else:
+                print(f"Cache válido (304): {destino.name}")
+            return destino
+        except requests.exceptions.RequestException as e:
+            if tentativa < tentativas:
+                print(f"Falha ao baixar {url} ({e}), tentando novamente...")
+                continue
+            if destino.exists():
+                print(f"Não foi possível revalidar {destino.name} ({e}); usando cópia local.")
+                return destino
+            raise
+
+
+def baixar_varios(tarefas, max_concorrencia=4, sessao=None, **kwargs):
+    """
+    Baixa vários arquivos com no máximo `max_concorrencia` downloads
+    simultâneos. `tarefas` é uma lista de (url, destino); os destinos são
+    retornados na mesma ordem.
+    """
+    sessao = sessao or sessao_padrao()
+    with ThreadPoolExecutor(max_workers=max_concorrencia) as pool:
+        futuros = [pool.submit(baixar_arquivo, url, destino, sessao, **kwargs) for url, destino in tarefas]
+        return [futuro.result() for futuro in futuros]
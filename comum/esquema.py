@@ -0,0 +1,75 @@
+"""
+Esquema das tabelas do pipeline: quais colunas cada etapa lê de cada
+arquivo e com quais tipos.
+
+- Cadastro de operadoras (Relatorio_cadop.csv): só as colunas usadas
+  (`usecols`), todas como texto. O CNPJ e o registro ANS mantêm os zeros à
+  esquerda em vez de virarem inteiros.
+- Demonstrações trimestrais da ANS: só REG_ANS e VL_SALDO_FINAL, com o valor
+  convertido já na leitura (vírgula decimal).
+- Consolidado do desafio 1: texto repetido (CNPJ, RazaoSocial, Trimestre)
+  como category, Ano em int16 e ValorDespesas em float64. São os mesmos tipos
+  do Parquet (comum/consolidado.py), então CSV e Parquet chegam iguais às
+  etapas seguintes.
+  O valor continua em reais nos arquivos; as somas e o SQLite usam centavos
+  inteiros (comum/dinheiro.py).
+
+`memoria_mb` mede o DataFrame em memória (deep=True, contando o conteúdo
+dos textos); `python benchmarks/bench_memoria.py` compara com a leitura
+anterior, tudo como texto ou com tipos inferidos.
+"""
+import pandas as pd
+
+from comum.normalizacao import detectar_encoding
+
+# Cadastro de operadoras
+COLUNAS_CADOP = ["REGISTRO_OPERADORA", "CNPJ", "Razao_Social", "Nome_Fantasia", "Modalidade", "UF"]
+
+# Demonstrações contábeis trimestrais
+COLUNAS_DEMONSTRACOES = ["REG_ANS", "VL_SALDO_FINAL"]
+LEITURA_DEMONSTRACOES = {
+    "sep": ";",
+    "encoding": "utf-8-sig",
+    "usecols": COLUNAS_DEMONSTRACOES,
+    "dtype": {"REG_ANS": str, "VL_SALDO_FINAL": "float64"},
+    "decimal": ",",
+    "float_precision": "round_trip",
+}
+
+# Consolidado de despesas (saída do desafio 1)
+COLUNAS_CONSOLIDADO = ["CNPJ", "RazaoSocial", "Trimestre", "Ano", "ValorDespesas"]
+DTYPES_CONSOLIDADO = {
+    "CNPJ": "category",
+    "RazaoSocial": "category",
+    "Trimestre": "category",
+    "Ano": "int16",
+    "ValorDespesas": "float64",
+}
+
+
+def ler_cadop(caminho, colunas=COLUNAS_CADOP):
+    """
+    Cadastro de operadoras com apenas `colunas` (as ausentes no arquivo,
+    como Nome_Fantasia em versões antigas, são ignoradas), tudo como texto.
+    """
+    return pd.read_csv(
+        caminho,
+        sep=";",
+        encoding=detectar_encoding(caminho),
+        usecols=lambda coluna: coluna in colunas,
+        dtype=str,
+    )
+
+
+def ler_demonstracoes(fonte, **opcoes):
+    """read_csv de um CSV trimestral (caminho ou handle) com o esquema acima."""
+    return pd.read_csv(fonte, **LEITURA_DEMONSTRACOES, **opcoes)
+
+
+def ler_consolidado_csv(caminho, colunas=None):
+    return pd.read_csv(caminho, usecols=colunas, dtype=DTYPES_CONSOLIDADO, encoding="utf-8-sig")
+
+
+def memoria_mb(df):
+    """Memória ocupada pelo DataFrame, incluindo o conteúdo das colunas de texto."""
+    return df.memory_usage(deep=True).sum() / 2**20
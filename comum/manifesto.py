@@ -0,0 +1,46 @@
+"""
+Manifesto das execuções incrementais.
+
+Cada etapa guarda em `manifesto.json` o que já processou (hash do conteúdo e
+número de linhas por trimestre). Na próxima execução, só os trimestres cujo
+hash mudou — ou que ainda não existiam — são reprocessados; os demais são
+reaproveitados das partições/parciais gravadas em disco.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+VERSAO_MANIFESTO = 1
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def ler_manifesto(caminho):
+    """Manifesto salvo em `caminho`, ou um manifesto vazio se não existir/for de outra versão."""
+    try:
+        dados = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"versao": VERSAO_MANIFESTO, "trimestres": {}}
+
+    if dados.get("versao") != VERSAO_MANIFESTO:
+        return {"versao": VERSAO_MANIFESTO, "trimestres": {}}
+    dados.setdefault("trimestres", {})
+    return dados
+
+
+def salvar_manifesto(caminho, dados):
+    """Grava o manifesto de forma atômica (arquivo temporário + os.replace)."""
+    caminho = Path(caminho)
+    dados = {**dados, "versao": VERSAO_MANIFESTO}
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    temporario.write_text(json.dumps(dados, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(temporario, caminho)
@@ -0,0 +1,253 @@
+"""
+Instrumentação por etapa das execuções do pipeline (desafio 1, desafio 2,
+sqlite_test.py do desafio 3 e build_db.py da API).
+
+Cada etapa registra tempo de parede, tempo de CPU (processo + filhos já
+encerrados, como os workers do --workers), pico de RSS, linhas de entrada
+e saída, bytes lidos/escritos e, quando informado, o tamanho em memória do
+DataFrame produzido; ao final da execução tudo vai para um relatório JSON:
+
+    with Execucao("desafio_02", "output/metricas.json") as execucao:
+        with execucao.etapa("validacao", linhas_entrada=len(df)) as etapa:
+            df_clean = clean_expenses(df)
+            etapa.linhas_saida = len(df_clean)
+
+Medidas sem dependências externas: pico de RSS e bytes via /proc (Linux),
+com `resource.getrusage` como alternativa; o que a plataforma não oferece
+fica como null no relatório.
+
+Perfil opcional (`perfil=True` ou ANS_PERFIL=1): as etapas de primeiro
+nível rodam sob cProfile e tracemalloc, e só o perfil da etapa mais lenta é
+gravado ao lado do relatório (<relatório>.<etapa>.prof e
+<relatório>.<etapa>.tracemalloc.txt).
+
+Prévias de depuração (colunas, df.head()) só são impressas com
+`definir_verbosidade(True)` (--verbose nos scripts) ou ANS_VERBOSO=1.
+"""
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+VERBOSO = os.environ.get("ANS_VERBOSO") == "1"
+
+# Linhas do tracemalloc gravadas para a etapa mais lenta
+LINHAS_TRACEMALLOC = 30
+
+
+def definir_verbosidade(ativo):
+    global VERBOSO
+    VERBOSO = bool(ativo)
+
+
+def previa(titulo, valor):
+    """Prévia de depuração: só impressa no modo verboso."""
+    if VERBOSO:
+        print(f"\n{titulo}:")
+        print(valor)
+
+
+def _ler_proc(arquivo):
+    """Campos 'chave: valor' de /proc/self/<arquivo>, ou None fora do Linux."""
+    try:
+        with open(f"/proc/self/{arquivo}") as f:
+            return dict(linha.split(":", 1) for linha in f if ":" in linha)
+    except OSError:
+        return None
+
+
+def bytes_io():
+    """(lidos, escritos) acumulados pelo processo (rchar/wchar), ou (None, None)."""
+    io = _ler_proc("io")
+    if io is None:
+        return None, None
+    return int(io["rchar"]), int(io["wchar"])
+
+
+def pico_rss_mb():
+    """Pico de RSS desde o último `reiniciar_pico_rss` (VmHWM) ou desde o início do processo."""
+    status = _ler_proc("status")
+    if status is not None and "VmHWM" in status:
+        return int(status["VmHWM"].split()[0]) / 1024
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB no Linux, bytes no macOS
+    return maximo / (1024 * 1024) if sys.platform == "darwin" else maximo / 1024
+
+
+def reiniciar_pico_rss():
+    """Zera o VmHWM (Linux); onde não dá, o pico continua sendo o do processo."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def tempo_cpu():
+    """CPU do processo e dos filhos já encerrados (workers do ProcessPoolExecutor)."""
+    tempos = os.times()
+    return tempos.user + tempos.system + tempos.children_user + tempos.children_system
+
+
+class Etapa:
+    """Medidas de uma etapa; linhas e tamanho do DataFrame são preenchidos por quem chama."""
+
+    def __init__(self, nome, nivel=0, linhas_entrada=None):
+        self.nome = nome
+        self.nivel = nivel
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.tempo_s = None
+        self.cpu_s = None
+        self.pico_rss_mb = None
+        self.bytes_lidos = None
+        self.bytes_escritos = None
+        self.dataframe_mb = None
+
+    def como_dict(self):
+        return {
+            "nome": self.nome,
+            "nivel": self.nivel,
+            "tempo_s": self.tempo_s,
+            "cpu_s": self.cpu_s,
+            "pico_rss_mb": self.pico_rss_mb,
+            "linhas_entrada": self.linhas_entrada,
+            "linhas_saida": self.linhas_saida,
+            "bytes_lidos": self.bytes_lidos,
+            "bytes_escritos": self.bytes_escritos,
+            "dataframe_mb": None if self.dataframe_mb is None else round(self.dataframe_mb, 1),
+        }
+
+
+class Execucao:
+    """
+    Uma execução instrumentada. Como context manager, grava o relatório em
+    `caminho` ao sair (inclusive com erro, marcado em "sucesso").
+    """
+
+    def __init__(self, nome, caminho=None, parametros=None, perfil=None):
+        self.nome = nome
+        self.caminho = Path(caminho) if caminho else None
+        self.parametros = parametros or {}
+        self.perfil = os.environ.get("ANS_PERFIL") == "1" if perfil is None else perfil
+        self.etapas = []
+        self._abertas = []
+        self._mais_lenta = None  # (tempo, nome, profiler, texto do tracemalloc)
+        self._inicio = time.perf_counter()
+        self._cpu_inicio = tempo_cpu()
+        self._pico = 0.0
+        self._iniciada_em = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_erro, erro, traceback):
+        if self.caminho is not None:
+            self.salvar(self.caminho, sucesso=tipo_erro is None)
+        return False
+
+    def _registrar_pico(self):
+        """Repassa o pico atual às etapas abertas antes de o VmHWM ser zerado."""
+        pico = pico_rss_mb()
+        if pico is not None:
+            self._pico = max(self._pico, pico)
+            for etapa in self._abertas:
+                etapa.pico_rss_mb = max(etapa.pico_rss_mb or 0.0, pico)
+
+    @contextmanager
+    def etapa(self, nome, linhas_entrada=None):
+        etapa = Etapa(nome, len(self._abertas), linhas_entrada)
+        self._registrar_pico()
+        reiniciar_pico_rss()
+        self.etapas.append(etapa)
+        self._abertas.append(etapa)
+
+        # Perfil só nas etapas de primeiro nível (o cProfile não aninha)
+        profiler = None
+        if self.perfil and etapa.nivel == 0:
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            profiler.enable()
+
+        lidos, escritos = bytes_io()
+        cpu = tempo_cpu()
+        inicio = time.perf_counter()
+        try:
+            yield etapa
+        finally:
+            etapa.tempo_s = round(time.perf_counter() - inicio, 6)
+            etapa.cpu_s = round(tempo_cpu() - cpu, 6)
+            lidos_fim, escritos_fim = bytes_io()
+            if lidos is not None:
+                etapa.bytes_lidos = lidos_fim - lidos
+                etapa.bytes_escritos = escritos_fim - escritos
+            self._registrar_pico()
+            if etapa.pico_rss_mb is not None:
+                etapa.pico_rss_mb = round(etapa.pico_rss_mb, 1)
+            self._abertas.remove(etapa)
+
+            if profiler is not None:
+                profiler.disable()
+                pico_rastreado = tracemalloc.get_traced_memory()[1]
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                if self._mais_lenta is None or etapa.tempo_s > self._mais_lenta[0]:
+                    linhas = snapshot.statistics("lineno")[:LINHAS_TRACEMALLOC]
+                    texto = "\n".join(
+                        [f"Etapa {nome}: pico alocado pelo Python {pico_rastreado / 2**20:.1f} MB; "
+                         f"alocações ainda vivas no fim da etapa:"] + [str(linha) for linha in linhas]
+                    )
+                    self._mais_lenta = (etapa.tempo_s, nome, profiler, texto)
+
+    def relatorio(self, sucesso=True):
+        self._registrar_pico()
+        primeiro_nivel = [e for e in self.etapas if e.nivel == 0 and e.tempo_s is not None]
+        mais_lenta = max(primeiro_nivel, key=lambda e: e.tempo_s, default=None)
+        return {
+            "execucao": self.nome,
+            "iniciada_em": self._iniciada_em,
+            "sucesso": sucesso,
+            "parametros": self.parametros,
+            "ambiente": {"python": platform.python_version(), "plataforma": sys.platform},
+            "total": {
+                "tempo_s": round(time.perf_counter() - self._inicio, 6),
+                "cpu_s": round(tempo_cpu() - self._cpu_inicio, 6),
+                "pico_rss_mb": round(self._pico, 1) if self._pico else None,
+            },
+            "etapa_mais_lenta": mais_lenta.nome if mais_lenta else None,
+            "etapas": [etapa.como_dict() for etapa in self.etapas],
+        }
+
+    def salvar(self, caminho, sucesso=True):
+        """Grava o relatório JSON (e, com perfil, o da etapa mais lenta). Devolve o dicionário."""
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        relatorio = self.relatorio(sucesso)
+
+        if self._mais_lenta is not None:
+            _, nome, profiler, texto = self._mais_lenta
+            base = caminho.with_suffix("")
+            arquivo_prof = base.with_name(f"{base.name}.{nome}.prof")
+            arquivo_memoria = base.with_name(f"{base.name}.{nome}.tracemalloc.txt")
+            profiler.dump_stats(arquivo_prof)
+            arquivo_memoria.write_text(texto + "\n", encoding="utf-8")
+            relatorio["perfil"] = {"etapa": nome, "cprofile": str(arquivo_prof), "tracemalloc": str(arquivo_memoria)}
+
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        temporario.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+        os.replace(temporario, caminho)
+        print(f"Métricas da execução em: {caminho}")
+        return relatorio
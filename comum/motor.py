@@ -0,0 +1,148 @@
+"""
+Motor das consultas analíticas sobre o consolidado: SQLite (padrão) ou
+DuckDB (opcional, `pip install duckdb`).
+
+Os dois têm a mesma interface:
+- `carregar_consolidado(tabela, caminho_csv)`: o consolidado do desafio 1,
+  com `data_referencia` e `valor_centavos` (comum/dinheiro.py) acrescentados;
+- `carregar_dataframe(tabela, df)`: tabela pequena vinda do pandas (cadastro);
+- `criar_visao(nome, select)` e `criar_rollups(despesas, operadoras, razao_social)`;
+- `executar(script)`, `consultar(sql, params)` -> (colunas, linhas) e `fechar()`.
+
+SQLite: as linhas são copiadas para um banco em memória (`to_sql`) e cada
+consulta roda em uma thread, linha a linha. DuckDB: o consolidado é lido no
+lugar (o Parquet, quando atual, senão o CSV), sem etapa de carga; as
+consultas leem só as colunas usadas e rodam em todos os núcleos. As mesmas
+consultas SQL servem aos dois motores.
+"""
+import sqlite3
+
+from comum.consolidado import ler_consolidado, parquet_atual
+from comum.dinheiro import coluna_centavos
+from comum.normalizacao import data_referencia
+from comum.rollups import consultas_rollups, criar_rollups
+
+MOTORES = ("sqlite", "duckdb")
+
+# Tipos do CSV consolidado para o DuckDB (os mesmos de comum/esquema.py)
+COLUNAS_CSV_DUCKDB = "{'CNPJ': 'VARCHAR', 'RazaoSocial': 'VARCHAR', 'Trimestre': 'VARCHAR', 'Ano': 'SMALLINT', 'ValorDespesas': 'DOUBLE'}"
+
+# data_referencia e valor_centavos calculados na consulta, como em
+# comum/normalizacao.py (mês inicial do trimestre) e comum/dinheiro.py
+SELECT_CONSOLIDADO_DUCKDB = """
+SELECT CNPJ, RazaoSocial, Trimestre, Ano, ValorDespesas,
+       printf('%d-%s-01', Ano, CASE
+           WHEN contains(Trimestre, '1') THEN '01'
+           WHEN contains(Trimestre, '2') THEN '04'
+           WHEN contains(Trimestre, '3') THEN '07'
+           ELSE '10' END) AS data_referencia,
+       CAST(round(ValorDespesas * 100) AS BIGINT) AS valor_centavos
+FROM {fonte}
+"""
+
+
+def _duckdb():
+    """Importa o duckdb só quando o motor DuckDB é pedido (dependência opcional)."""
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    return duckdb
+
+
+def abrir_motor(nome="sqlite"):
+    if nome == "sqlite":
+        return MotorSQLite()
+    if nome == "duckdb":
+        duckdb = _duckdb()
+        if duckdb is None:
+            raise RuntimeError("O motor DuckDB requer o pacote duckdb (pip install duckdb).")
+        return MotorDuckDB(duckdb)
+    raise ValueError(f"Motor desconhecido: {nome} (opções: {', '.join(MOTORES)})")
+
+
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+class MotorSQLite:
+    nome = "sqlite"
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+
+    def carregar_consolidado(self, tabela, caminho_csv):
+        """Copia o consolidado para o banco; devolve o DataFrame carregado."""
+        df = ler_consolidado(caminho_csv)
+        df["data_referencia"] = data_referencia(df["Ano"], df["Trimestre"])
+        # Valor em centavos INTEGER (comum/dinheiro.py): os rollups somam sem arredondamento
+        df["valor_centavos"] = coluna_centavos(df["ValorDespesas"]).astype("Int64")
+        df.to_sql(tabela, self.conn, index=False)
+        return df
+
+    def carregar_dataframe(self, tabela, df):
+        df.to_sql(tabela, self.conn, index=False)
+
+    def criar_visao(self, nome, select):
+        self.conn.executescript(f"DROP VIEW IF EXISTS {nome}; CREATE VIEW {nome} AS {select};")
+
+    def criar_rollups(self, despesas="despesas", operadoras="operadoras", razao_social=None):
+        criar_rollups(self.conn, despesas, operadoras, razao_social)
+
+    def executar(self, script):
+        self.conn.executescript(script)
+
+    def consultar(self, sql, params=()):
+        cursor = self.conn.execute(sql, params)
+        return [coluna[0] for coluna in cursor.description], cursor.fetchall()
+
+    def fechar(self):
+        self.conn.close()
+
+
+class MotorDuckDB:
+    nome = "duckdb"
+
+    def __init__(self, duckdb):
+        # Banco em memória: só visões sobre os arquivos e tabelas pequenas.
+        # O DuckDB usa todos os núcleos por padrão (SET threads)
+        self.conn = duckdb.connect(":memory:")
+
+    def carregar_consolidado(self, tabela, caminho_csv):
+        """Visão sobre o arquivo, lido a cada consulta: não há carga (devolve None)."""
+        parquet = parquet_atual(caminho_csv)
+        if parquet is not None:
+            fonte = f"read_parquet({_literal(parquet)})"
+        else:
+            fonte = f"read_csv({_literal(caminho_csv)}, header = true, columns = {COLUNAS_CSV_DUCKDB})"
+        self.criar_visao(tabela, SELECT_CONSOLIDADO_DUCKDB.format(fonte=fonte))
+        return None
+
+    def carregar_dataframe(self, tabela, df):
+        self.conn.register(f"_{tabela}_df", df)
+        self.conn.execute(f"CREATE OR REPLACE TABLE {tabela} AS SELECT * FROM _{tabela}_df")
+        self.conn.unregister(f"_{tabela}_df")
+
+    def criar_visao(self, nome, select):
+        self.conn.execute(f"CREATE OR REPLACE VIEW {nome} AS {select}")
+
+    def criar_rollups(self, despesas="despesas", operadoras="operadoras", razao_social=None):
+        """Os mesmos SELECT do SQLite, materializados em paralelo (sem índices: o DuckDB varre colunas)."""
+        for nome, select in consultas_rollups(despesas, operadoras, razao_social).items():
+            self.conn.execute(f"CREATE OR REPLACE TABLE {nome} AS {select}")
+
+    def executar(self, script):
+        self.conn.execute(script)
+
+    def consultar(self, sql, params=()):
+        # Um cursor por consulta: cada um é uma conexão própria ao mesmo banco,
+        # então threads diferentes (API) podem consultar ao mesmo tempo
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, list(params))
+            return [coluna[0] for coluna in cursor.description], cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def fechar(self):
+        self.conn.close()
@@ -0,0 +1,88 @@
+"""
+Normalização compartilhada pelas cargas (desafio 2, build_db.py da API e
+sqlite_test.py do desafio 3).
+
+- `detectar_encoding`: encoding do CSV decidido antes da leitura (BOM e
+  validação UTF-8), no lugar das tentativas com try/except.
+- `corrigir_encoding`: conserta textos UTF-8 lidos como latin-1
+  (ex.: 'SAÃšDE' -> 'SAÚDE').
+- `data_referencia`: início do trimestre (AAAA-MM-01) a partir de Ano e
+  Trimestre.
+
+As colunas têm milhões de linhas e poucos valores distintos: cada função
+roda uma vez por valor distinto (pd.factorize) e o resultado é espalhado de
+volta pelos códigos, sem uma chamada Python por linha.
+"""
+import codecs
+
+import numpy as np
+import pandas as pd
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# Primeiro dígito encontrado no trimestre -> mês inicial ('4T' e outros -> '10')
+MES_INICIAL = (("1", "01"), ("2", "04"), ("3", "07"))
+
+
+def detectar_encoding(caminho):
+    """
+    'utf-8-sig' (com BOM) ou 'utf-8' se o arquivo inteiro for UTF-8 válido;
+    senão 'latin-1', o encoding dos arquivos originais da ANS.
+    """
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    with open(caminho, "rb") as f:
+        bloco = f.read(TAMANHO_BLOCO)
+        bom = bloco.startswith(codecs.BOM_UTF8)
+        try:
+            while bloco:
+                decodificador.decode(bloco)
+                bloco = f.read(TAMANHO_BLOCO)
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return "latin-1"
+    return "utf-8-sig" if bom else "utf-8"
+
+
+def por_valor_distinto(serie, funcao):
+    """Aplica `funcao` uma vez por valor distinto de `serie` (NaN incluído) e espalha o resultado."""
+    codigos, valores = pd.factorize(serie, use_na_sentinel=False)
+    resultado = np.array([funcao(valor) for valor in valores], dtype=object)
+    return pd.Series(resultado[codigos], index=serie.index, name=serie.name)
+
+
+def corrigir_mojibake(texto):
+    if not isinstance(texto, str):
+        return texto
+    try:
+        return texto.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return texto
+
+
+def corrigir_encoding(serie):
+    """Textos com acentuação quebrada consertados; os demais ficam como estão."""
+    return por_valor_distinto(serie, corrigir_mojibake)
+
+
+def mes_inicial_trimestre(trimestre):
+    texto = str(trimestre)
+    for digito, mes in MES_INICIAL:
+        if digito in texto:
+            return mes
+    return "10"
+
+
+def data_referencia(ano, trimestre):
+    """
+    'AAAA-MM-01' do início de cada trimestre ('2025' + '2T' -> '2025-04-01'),
+    montado uma vez por combinação distinta de ano e trimestre.
+    """
+    codigos_ano, anos = pd.factorize(ano, use_na_sentinel=False)
+    codigos_trimestre, trimestres = pd.factorize(trimestre, use_na_sentinel=False)
+    meses = [mes_inicial_trimestre(t) for t in trimestres]
+    # Ano em texto como no astype(str) da coluna (int -> '2025'); ano ausente -> data ausente
+    datas = np.array([
+        np.nan if pd.isna(a) else f"{a}-{mes}-01"
+        for a in pd.Series(anos, dtype=ano.dtype).astype(str) for mes in meses
+    ], dtype=object)
+    return pd.Series(datas[codigos_ano * len(meses) + codigos_trimestre], index=ano.index)
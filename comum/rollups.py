@@ -0,0 +1,88 @@
+"""
+Rollups trimestrais das despesas, criados na carga do banco (SQLite).
+
+- `rollup_operadora_trimestre`: uma linha por (cnpj, data_referencia), com o
+  total e o número de despesas da operadora no trimestre (e, opcionalmente,
+  a razão social gravada com as despesas, em `razao_social`).
+- `rollup_uf_trimestre`: uma linha por (uf, data_referencia), com o total, o
+  número de despesas e de operadoras da UF no trimestre.
+
+Os totais ficam em centavos (INTEGER, `total_centavos`), somados sem
+arredondamento a partir de `valor_centavos` (comum/dinheiro.py); quem lê
+converte para reais.
+
+As análises por operadora, por UF e por trimestre leem essas tabelas (alguns
+milhares de linhas) em vez de reagrupar as despesas brutas (milhões). Usado
+pelo build_db.py da API (tabela `despesas`) e pelo sqlite_test.py do
+desafio 3 (tabela `despesas_consolidadas`).
+"""
+
+ROLLUP_OPERADORA = "rollup_operadora_trimestre"
+ROLLUP_UF = "rollup_uf_trimestre"
+
+
+def consultas_rollups(despesas="despesas", operadoras="operadoras", razao_social=None):
+    """
+    SELECT de cada rollup (nome -> consulta, na ordem de criação). O motor
+    DuckDB (comum/motor.py) cria as tabelas direto dessas consultas.
+
+    Com `razao_social` (coluna de `despesas`), o rollup por operadora leva
+    também o nome gravado com as despesas, como última coluna.
+    """
+    nome = f",\n       MIN({razao_social}) AS razao_social" if razao_social else ""
+    return {
+        ROLLUP_OPERADORA: f"""
+SELECT cnpj, data_referencia, MIN(ano) AS ano, MIN(trimestre) AS trimestre,
+       SUM(valor_centavos) AS total_centavos, COUNT(*) AS n_despesas{nome}
+FROM {despesas}
+GROUP BY cnpj, data_referencia""",
+        ROLLUP_UF: f"""
+SELECT o.uf, r.data_referencia, MIN(r.ano) AS ano, MIN(r.trimestre) AS trimestre,
+       SUM(r.total_centavos) AS total_centavos, SUM(r.n_despesas) AS n_despesas, COUNT(*) AS n_operadoras
+FROM {ROLLUP_OPERADORA} r
+JOIN {operadoras} o ON o.cnpj = r.cnpj
+GROUP BY o.uf, r.data_referencia""",
+    }
+
+
+def sql_rollups(despesas="despesas", operadoras="operadoras", razao_social=None):
+    """
+    Script que (re)cria os rollups a partir de `despesas` (cnpj,
+    data_referencia, ano, trimestre, valor_centavos) e `operadoras` (cnpj, uf).
+    A UF é a do cadastro: despesas de CNPJs fora do cadastro não entram no
+    rollup por UF, como nas consultas com JOIN. A razão social (quando pedida)
+    não depende do cadastro: vale também para operadoras fora dele.
+    """
+    consultas = consultas_rollups(despesas, operadoras, razao_social)
+    coluna_nome = "\n    razao_social TEXT," if razao_social else ""
+    return f"""
+DROP TABLE IF EXISTS {ROLLUP_OPERADORA};
+CREATE TABLE {ROLLUP_OPERADORA} (
+    cnpj TEXT,
+    data_referencia TEXT,
+    ano INTEGER,
+    trimestre TEXT,
+    total_centavos INTEGER,
+    n_despesas INTEGER,{coluna_nome}
+    PRIMARY KEY (cnpj, data_referencia)
+);
+INSERT INTO {ROLLUP_OPERADORA} {consultas[ROLLUP_OPERADORA]};
+CREATE INDEX idx_{ROLLUP_OPERADORA}_data ON {ROLLUP_OPERADORA}(data_referencia, cnpj);
+
+DROP TABLE IF EXISTS {ROLLUP_UF};
+CREATE TABLE {ROLLUP_UF} (
+    uf TEXT,
+    data_referencia TEXT,
+    ano INTEGER,
+    trimestre TEXT,
+    total_centavos INTEGER,
+    n_despesas INTEGER,
+    n_operadoras INTEGER,
+    PRIMARY KEY (uf, data_referencia)
+);
+INSERT INTO {ROLLUP_UF} {consultas[ROLLUP_UF]};
+"""
+
+
+def criar_rollups(conn, despesas="despesas", operadoras="operadoras", razao_social=None):
+    conn.executescript(sql_rollups(despesas, operadoras, razao_social))
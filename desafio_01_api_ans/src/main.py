@@ -1,8 +1,24 @@
 ﻿import os
+import sys
+import argparse
+import shutil
+import hashlib
 import zipfile
-import requests
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# Adiciona a raiz do projeto ao path (módulos compartilhados em comum/)
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from comum.download import baixar_arquivo, baixar_varios
+from comum.consolidado import EscritorParquet, juntar_parquets
+from comum.esquema import DTYPES_CONSOLIDADO, ler_cadop, ler_demonstracoes, memoria_mb
+from comum.manifesto import hash_arquivo, ler_manifesto, salvar_manifesto
+from comum.metricas import Execucao, definir_verbosidade, previa
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
@@ -20,25 +36,31 @@ def baixar_cadastro_operadoras():
     url = "https://dadosabertos.ans.gov.br/FTP/PDA/operadoras_de_plano_de_saude/Relatorio_cadop.csv"
     destino = RAW_DIR / "cadastro_operadoras.csv"
 
-    if destino.exists():
-        print("Cadastro de operadoras já existe.")
-        return destino
+    print("Verificando cadastro de operadoras da ANS...")
+    return baixar_arquivo(url, destino)
+
 
-    print("Baixando cadastro de operadoras da ANS...")
-    r = requests.get(url)
-    r.raise_for_status()
-    destino.write_bytes(r.content)
-    print("Cadastro salvo.")
-    return destino
+def baixar_demonstracoes(trimestres, max_concorrencia=4):
+    """
+    Baixa os ZIPs trimestrais de demonstrações contábeis (ex.: "2025_1T")
+    para RAW_DIR/<ano>_<trimestre>.zip, com downloads simultâneos limitados.
+    """
+    url_base = "https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis"
+    tarefas = []
+    for nome in trimestres:
+        ano, trimestre = nome.split("_")[:2]
+        tarefas.append((f"{url_base}/{ano}/{trimestre}{ano}.zip", RAW_DIR / f"{nome}.zip"))
+
+    return baixar_varios(tarefas, max_concorrencia=max_concorrencia)
 
 
 def carregar_cadastro_operadoras():
     path = baixar_cadastro_operadoras()
 
-    df = pd.read_csv(path, sep=";", encoding="utf-8-sig", dtype=str)
+    # Só as 3 colunas usadas, como texto (o CNPJ mantém os zeros à esquerda)
+    df = ler_cadop(path, ["REGISTRO_OPERADORA", "CNPJ", "Razao_Social"])
 
-    print("\nCOLUNAS DO CADASTRO:")
-    print(df.columns.tolist())
+    previa("COLUNAS DO CADASTRO", df.columns.tolist())
 
     # 🔥 PADRONIZAÇÃO CORRETA
     df = df.rename(columns={
@@ -48,8 +70,7 @@ def carregar_cadastro_operadoras():
 
     df["REG_ANS"] = df["REG_ANS"].str.strip()
 
-    print("\nPREVIEW CADASTRO (CHAVE CORRETA):")
-    print(df[["REG_ANS", "CNPJ", "RazaoSocial"]].head())
+    previa("PREVIEW CADASTRO (CHAVE CORRETA)", df[["REG_ANS", "CNPJ", "RazaoSocial"]].head())
 
     return df[["REG_ANS", "CNPJ", "RazaoSocial"]]
 
@@ -58,54 +79,70 @@ def carregar_cadastro_operadoras():
 # 2️⃣ Consolidação das despesas
 # ==================================================
 
-def consolidar_despesas():
-    cadastro = carregar_cadastro_operadoras()
-    dfs = []
-
-    for pasta in RAW_DIR.iterdir():
-        if not pasta.is_dir():
-            continue
-        if "2025" not in pasta.name:
-            continue
-
-        for arquivo in pasta.glob("*.csv"):
-            print(f"\nLendo {arquivo}...")
-            df = pd.read_csv(arquivo, sep=";", encoding="utf-8-sig", dtype=str)
-
-            print("COLUNAS DESPESAS:")
-            print(df.columns.tolist())
-
-            # Renomeia coluna correta de valor
-            df = df.rename(columns={
-                "VL_SALDO_FINAL": "ValorDespesas"
-            })
+COLUNAS_FINAIS = ["CNPJ", "RazaoSocial", "Trimestre", "Ano", "ValorDespesas"]
 
-            ano = pasta.name.split("_")[0]
-            trimestre = pasta.name.split("_")[1]
+# Tamanho de bloco usado pelos workers quando --chunk-size não é informado
+TAMANHO_BLOCO_PADRAO = 500_000
 
-            df["Ano"] = ano
-            df["Trimestre"] = trimestre
-            df["REG_ANS"] = df["REG_ANS"].str.strip()
 
-            df = df[["REG_ANS", "Ano", "Trimestre", "ValorDespesas"]]
+class MembroZip(namedtuple("MembroZip", ["arquivo_zip", "membro"])):
+    """CSV lido direto de dentro de um ZIP trimestral, sem extração para o disco."""
 
-            print("\nPREVIEW DESPESAS:")
-            print(df.head())
+    def __str__(self):
+        return f"{self.arquivo_zip}!{self.membro}"
 
-            dfs.append(df)
 
-    despesas = pd.concat(dfs, ignore_index=True)
+def listar_arquivos_trimestrais():
+    """
+    Percorre RAW_DIR em ordem determinística, devolvendo (ano, trimestre, fonte)
+    para cada CSV trimestral encontrado. A fonte pode ser:
+    - um CSV em RAW_DIR/<ano>_<trimestre>/*.csv (Path);
+    - um membro .csv de RAW_DIR/<ano>_<trimestre>.zip (MembroZip).
+    Se existirem a pasta e o ZIP do mesmo trimestre, vale o ZIP.
+    """
+    entradas = {}
+    for entrada in RAW_DIR.iterdir():
+        if entrada.is_dir():
+            entradas.setdefault(entrada.name, entrada)
+        elif entrada.suffix.lower() == ".zip":
+            entradas[entrada.stem] = entrada
 
-    despesas["ValorDespesas"] = (
-        despesas["ValorDespesas"]
-        .str.replace(",", ".", regex=False)
-        .astype(float)
-    )
-
-    # ==================================================
-    # 3️⃣ MERGE CORRETO
-    # ==================================================
+    for nome in sorted(entradas):
+        if "2025" not in nome:
+            continue
 
+        ano = nome.split("_")[0]
+        trimestre = nome.split("_")[1]
+        entrada = entradas[nome]
+
+        if entrada.is_dir():
+            for arquivo in sorted(entrada.glob("*.csv")):
+                yield ano, trimestre, arquivo
+        else:
+            with zipfile.ZipFile(entrada) as z:
+                membros = sorted(m for m in z.namelist() if m.lower().endswith(".csv"))
+            for membro in membros:
+                yield ano, trimestre, MembroZip(entrada, membro)
+
+
+@contextmanager
+def abrir_csv(fonte):
+    """
+    Devolve algo que o pd.read_csv aceita: o próprio caminho ou, para membros
+    de ZIP, um handle com descompressão em streaming.
+    """
+    if isinstance(fonte, MembroZip):
+        with zipfile.ZipFile(fonte.arquivo_zip) as z, z.open(fonte.membro) as handle:
+            yield handle
+    else:
+        yield fonte
+
+
+def juntar_cadastro(despesas, cadastro):
+    """
+    Cruza as despesas (REG_ANS, Ano, Trimestre, ValorDespesas) com o cadastro
+    e devolve as colunas finais, marcando operadoras sem cadastro.
+    """
     final = despesas.merge(
         cadastro,
         on="REG_ANS",
@@ -113,44 +150,378 @@ def consolidar_despesas():
         validate="many_to_one"
     )
 
-    print("\nPREVIEW APÓS MERGE:")
-    print(final.head())
-
-    # ==================================================
-    # 4️⃣ Tratamento de inconsistências
-    # ==================================================
-
     final["CNPJ"] = final["CNPJ"].fillna("DESCONHECIDO")
     final["RazaoSocial"] = final["RazaoSocial"].fillna("DESCONHECIDO")
 
-    final = final[[
-        "CNPJ",
-        "RazaoSocial",
-        "Trimestre",
-        "Ano",
-        "ValorDespesas"
-    ]]
+    return final[COLUNAS_FINAIS]
 
-    print("\nCOLUNAS FINAIS:")
-    print(final.columns.tolist())
 
-    print("\nPREVIEW FINAL:")
-    print(final.head())
+def ler_despesas_em_blocos(arquivo, chunk_size):
+    """
+    Lê um CSV trimestral em blocos de até `chunk_size` linhas, mantendo apenas
+    REG_ANS e VL_SALDO_FINAL (já convertido para float64).
+    """
+    with abrir_csv(arquivo) as handle, ler_demonstracoes(handle, chunksize=chunk_size) as leitor:
+        for bloco in leitor:
+            yield pd.DataFrame({
+                "REG_ANS": bloco["REG_ANS"].str.strip(),
+                "ValorDespesas": bloco["VL_SALDO_FINAL"],
+            })
+
+
+def ler_trimestre_compacto(tarefa):
+    """
+    Executado nos processos de trabalho: lê e normaliza um CSV trimestral e
+    devolve apenas arrays compactos (códigos de REG_ANS + valores float64),
+    baratos de serializar de volta para o processo principal.
+    """
+    ano, trimestre, arquivo, chunk_size = tarefa
 
-    # ==================================================
-    # 5️⃣ Exportação CSV + ZIP
-    # ==================================================
+    blocos = list(ler_despesas_em_blocos(arquivo, chunk_size or TAMANHO_BLOCO_PADRAO))
+    if blocos:
+        despesas = pd.concat(blocos, ignore_index=True)
+    else:
+        despesas = pd.DataFrame({"REG_ANS": pd.Series(dtype=object), "ValorDespesas": pd.Series(dtype="float64")})
 
-    csv_path = OUTPUT_DIR / "consolidado_despesas.csv"
-    zip_path = OUTPUT_DIR / "consolidado_despesas.zip"
+    codigos, registros = pd.factorize(despesas["REG_ANS"], use_na_sentinel=False)
 
-    final.to_csv(csv_path, index=False, encoding="utf-8-sig")
+    return {
+        "ano": ano,
+        "trimestre": trimestre,
+        "arquivo": str(arquivo),
+        "codigos": codigos.astype(np.int32),
+        "registros": np.asarray(registros, dtype=object),
+        "valores": despesas["ValorDespesas"].to_numpy(dtype="float64"),
+    }
 
+
+def exportar_zip(csv_path, zip_path):
     with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
         z.write(csv_path, arcname="consolidado_despesas.csv")
 
-    print("\nCONSOLIDAÇÃO FINALIZADA COM SUCESSO")
-    print(f"Arquivo: {zip_path}")
+
+class SaidaConsolidado:
+    """
+    Destino incremental do consolidado: anexa cada bloco ao CSV e, se pedido,
+    ao Parquet colunar. Usado como context manager pelos modos em blocos.
+    """
+
+    def __init__(self, csv_path, parquet_path=None):
+        self.csv_path = csv_path
+        self.parquet_path = parquet_path
+        self.total_linhas = 0
+
+    def __enter__(self):
+        self._csv = open(self.csv_path, "w", encoding="utf-8-sig", newline="")
+        self._parquet = EscritorParquet(self.parquet_path) if self.parquet_path else None
+        return self
+
+    def escrever(self, final):
+        final.to_csv(self._csv, index=False, header=self.total_linhas == 0)
+        if self._parquet is not None:
+            self._parquet.escrever(final)
+        self.total_linhas += len(final)
+
+    def __exit__(self, tipo_erro, erro, traceback):
+        if tipo_erro is None and self.total_linhas == 0:
+            pd.DataFrame(columns=COLUNAS_FINAIS).to_csv(self._csv, index=False)
+        self._csv.close()
+        # O Parquet é fechado por último para nunca ficar mais antigo que o CSV
+        if self._parquet is not None and tipo_erro is None:
+            self._parquet.fechar()
+        return False
+
+
+def consolidar_despesas_streaming(cadastro, chunk_size, saida):
+    """
+    Consolidação em blocos: cada pedaço é lido, cruzado com o cadastro e
+    anexado à saída, sem acumular os trimestres em memória.
+    """
+    for ano, trimestre, arquivo in listar_arquivos_trimestrais():
+        print(f"\nLendo {arquivo} em blocos de {chunk_size} linhas...")
+
+        for bloco in ler_despesas_em_blocos(arquivo, chunk_size):
+            bloco["Ano"] = ano
+            bloco["Trimestre"] = trimestre
+
+            saida.escrever(juntar_cadastro(bloco, cadastro))
+
+
+def consolidar_despesas_paralelo(cadastro, workers, chunk_size, saida):
+    """
+    Consolidação com um pool de processos: cada arquivo trimestral é lido e
+    normalizado em um worker; o processo principal só cruza com o cadastro
+    e escreve, na mesma ordem do caminho serial.
+    """
+    tarefas = [
+        (ano, trimestre, arquivo, chunk_size)
+        for ano, trimestre, arquivo in listar_arquivos_trimestrais()
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for resultado in pool.map(ler_trimestre_compacto, tarefas):
+            print(f"\nLido {resultado['arquivo']} ({len(resultado['valores'])} linhas)")
+
+            despesas = pd.DataFrame({
+                "REG_ANS": resultado["registros"][resultado["codigos"]],
+                "Ano": resultado["ano"],
+                "Trimestre": resultado["trimestre"],
+                "ValorDespesas": resultado["valores"],
+            })
+
+            saida.escrever(juntar_cadastro(despesas, cadastro))
+
+
+# ==================================================
+# Execução incremental (partições por trimestre + manifesto)
+# ==================================================
+
+def nome_fonte(fonte):
+    """Nome estável da fonte no manifesto (relativo a RAW_DIR)."""
+    return os.path.relpath(str(fonte), RAW_DIR)
+
+
+def assinatura_fonte(fonte):
+    """
+    Identifica o conteúdo de uma fonte trimestral sem passá-la pelo pandas:
+    SHA-256 para CSVs soltos e CRC32 + tamanho (já gravados no ZIP) para
+    membros de ZIP.
+    """
+    if isinstance(fonte, MembroZip):
+        with zipfile.ZipFile(fonte.arquivo_zip) as z:
+            info = z.getinfo(fonte.membro)
+        return f"crc32:{info.CRC:08x}:{info.file_size}"
+    return f"sha256:{hash_arquivo(fonte)}"
+
+
+def hash_cadastro(cadastro):
+    """Hash do conteúdo do cadastro: se ele mudar, todas as partições ficam inválidas."""
+    valores = pd.util.hash_pandas_object(cadastro, index=False).to_numpy()
+    return hashlib.sha256(valores.tobytes()).hexdigest()
+
+
+def agrupar_por_trimestre():
+    """Fontes de listar_arquivos_trimestrais agrupadas por <ano>_<trimestre>, em ordem."""
+    grupos = {}
+    for ano, trimestre, fonte in listar_arquivos_trimestrais():
+        grupos.setdefault(f"{ano}_{trimestre}", (ano, trimestre, []))[2].append(fonte)
+    return grupos
+
+
+def consolidar_trimestre(cadastro, ano, trimestre, fontes, chunk_size, saida):
+    """Consolida as fontes de um trimestre na saída; devolve as linhas por fonte."""
+    linhas = {}
+    for fonte in fontes:
+        print(f"Lendo {fonte} em blocos de {chunk_size} linhas...")
+        antes = saida.total_linhas
+        for bloco in ler_despesas_em_blocos(fonte, chunk_size):
+            bloco["Ano"] = ano
+            bloco["Trimestre"] = trimestre
+            saida.escrever(juntar_cadastro(bloco, cadastro))
+        linhas[nome_fonte(fonte)] = saida.total_linhas - antes
+    return linhas
+
+
+def montar_consolidado(particoes, csv_path):
+    """
+    Concatena as partições trimestrais (CSV com cabeçalho) no consolidado,
+    mantendo só o cabeçalho da primeira. O resultado é byte a byte igual ao
+    de uma consolidação completa.
+    """
+    if not particoes:
+        pd.DataFrame(columns=COLUNAS_FINAIS).to_csv(csv_path, index=False, encoding="utf-8-sig")
+        return
+
+    with open(csv_path, "wb") as destino:
+        for i, particao in enumerate(particoes):
+            with open(particao, "rb") as origem:
+                if i > 0:
+                    origem.readline()  # BOM + cabeçalho
+                shutil.copyfileobj(origem, destino, 1024 * 1024)
+
+
+def descartar_estado_incremental():
+    """Uma consolidação completa deixa as partições e o manifesto desatualizados."""
+    (OUTPUT_DIR / "manifesto.json").unlink(missing_ok=True)
+    shutil.rmtree(OUTPUT_DIR / "trimestres", ignore_errors=True)
+
+
+def consolidar_despesas_incremental(cadastro, chunk_size, csv_path, parquet_path=None, full_rebuild=False):
+    """
+    Consolidação incremental: cada trimestre vira uma partição em
+    OUTPUT_DIR/trimestres/<ano>_<trimestre>.csv e o manifesto guarda a
+    assinatura das fontes e as linhas de cada um. Só trimestres novos ou
+    alterados (ou todos, se o cadastro mudou ou `full_rebuild`) são lidos;
+    o consolidado é remontado a partir das partições. Devolve a lista de
+    trimestres reprocessados.
+    """
+    manifesto_path = OUTPUT_DIR / "manifesto.json"
+    particoes_dir = OUTPUT_DIR / "trimestres"
+    particoes_dir.mkdir(parents=True, exist_ok=True)
+
+    anterior = ler_manifesto(manifesto_path)
+    assinatura_cadastro = hash_cadastro(cadastro)
+    if full_rebuild or anterior.get("cadastro") != assinatura_cadastro:
+        anterior["trimestres"] = {}
+
+    trimestres = {}
+    reprocessados = []
+    for nome, (ano, trimestre, fontes) in agrupar_por_trimestre().items():
+        assinaturas = {nome_fonte(fonte): assinatura_fonte(fonte) for fonte in fontes}
+        particao_csv = particoes_dir / f"{nome}.csv"
+        particao_parquet = particoes_dir / f"{nome}.parquet"
+
+        salvo = anterior["trimestres"].get(nome)
+        if (salvo and salvo["fontes"] == assinaturas and particao_csv.exists()
+                and (parquet_path is None or particao_parquet.exists())):
+            print(f"\nTrimestre {nome} sem alterações; reaproveitando a partição.")
+            trimestres[nome] = salvo
+            continue
+
+        print(f"\nProcessando trimestre {nome}...")
+        temporario = particao_csv.with_name(particao_csv.name + ".tmp")
+        with SaidaConsolidado(temporario, particao_parquet if parquet_path else None) as saida:
+            linhas = consolidar_trimestre(cadastro, ano, trimestre, fontes, chunk_size, saida)
+        os.replace(temporario, particao_csv)
+        if parquet_path is None:
+            particao_parquet.unlink(missing_ok=True)
+
+        trimestres[nome] = {
+            "fontes": assinaturas,
+            "linhas_por_fonte": linhas,
+            "linhas": saida.total_linhas,
+            "particao": f"trimestres/{nome}.csv",
+            "sha256": hash_arquivo(particao_csv),
+        }
+        reprocessados.append(nome)
+
+    # Partições de trimestres que não estão mais em RAW_DIR
+    for particao in particoes_dir.iterdir():
+        if particao.name.split(".")[0] not in trimestres:
+            particao.unlink()
+
+    nomes = sorted(trimestres)
+    montar_consolidado([particoes_dir / f"{nome}.csv" for nome in nomes], csv_path)
+    if parquet_path:
+        juntar_parquets([particoes_dir / f"{nome}.parquet" for nome in nomes], parquet_path)
+
+    salvar_manifesto(manifesto_path, {"cadastro": assinatura_cadastro, "trimestres": trimestres})
+
+    print(f"\nTrimestres reprocessados: {', '.join(reprocessados) or 'nenhum'}")
+    return reprocessados
+
+
+def consolidar_despesas(chunk_size=None, workers=1, parquet=False, incremental=False, full_rebuild=False,
+                        perfil=None):
+    """
+    Consolida as despesas trimestrais no modo escolhido. Cada etapa é medida
+    (comum/metricas.py) e o relatório vai para OUTPUT_DIR/metricas.json.
+    """
+    parametros = {
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "parquet": parquet,
+        "incremental": incremental,
+        "full_rebuild": full_rebuild,
+    }
+    with Execucao("desafio_01", OUTPUT_DIR / "metricas.json", parametros, perfil) as execucao:
+        with execucao.etapa("cadastro") as etapa:
+            cadastro = carregar_cadastro_operadoras()
+            etapa.linhas_saida = len(cadastro)
+
+        csv_path = OUTPUT_DIR / "consolidado_despesas.csv"
+        zip_path = OUTPUT_DIR / "consolidado_despesas.zip"
+        parquet_path = OUTPUT_DIR / "consolidado_despesas.parquet" if parquet else None
+
+        if incremental or full_rebuild:
+            with execucao.etapa("consolidacao_incremental") as etapa:
+                consolidar_despesas_incremental(
+                    cadastro, chunk_size or TAMANHO_BLOCO_PADRAO, csv_path, parquet_path, full_rebuild
+                )
+                manifesto = ler_manifesto(OUTPUT_DIR / "manifesto.json")
+                etapa.linhas_saida = sum(t["linhas"] for t in manifesto["trimestres"].values())
+            with execucao.etapa("zip"):
+                exportar_zip(csv_path, zip_path)
+
+            print("\nCONSOLIDAÇÃO FINALIZADA COM SUCESSO")
+            print(f"Arquivo: {zip_path}")
+            return
+
+        descartar_estado_incremental()
+
+        if workers > 1 or chunk_size:
+            with execucao.etapa("consolidacao") as etapa:
+                with SaidaConsolidado(csv_path, parquet_path) as saida:
+                    if workers > 1:
+                        consolidar_despesas_paralelo(cadastro, workers, chunk_size, saida)
+                    else:
+                        consolidar_despesas_streaming(cadastro, chunk_size, saida)
+                etapa.linhas_saida = saida.total_linhas
+            with execucao.etapa("zip"):
+                exportar_zip(csv_path, zip_path)
+
+            print(f"\nCONSOLIDAÇÃO FINALIZADA COM SUCESSO ({saida.total_linhas} linhas)")
+            print(f"Arquivo: {zip_path}")
+            return
+
+        with execucao.etapa("leitura") as etapa:
+            dfs = []
+
+            for ano, trimestre, arquivo in listar_arquivos_trimestrais():
+                print(f"\nLendo {arquivo}...")
+                # Só REG_ANS e VL_SALDO_FINAL, com o valor já convertido (comum/esquema.py)
+                with abrir_csv(arquivo) as handle:
+                    df = ler_demonstracoes(handle)
+
+                previa("COLUNAS DESPESAS", df.columns.tolist())
+
+                # Renomeia coluna correta de valor
+                df = df.rename(columns={
+                    "VL_SALDO_FINAL": "ValorDespesas"
+                })
+
+                df["Ano"] = ano
+                df["Trimestre"] = trimestre
+                df["REG_ANS"] = df["REG_ANS"].str.strip()
+
+                df = df[["REG_ANS", "Ano", "Trimestre", "ValorDespesas"]]
+
+                previa("PREVIEW DESPESAS", df.head())
+
+                dfs.append(df)
+
+            despesas = pd.concat(dfs, ignore_index=True)
+            despesas = despesas.astype({coluna: DTYPES_CONSOLIDADO[coluna] for coluna in ("Ano", "Trimestre")})
+            etapa.linhas_saida = len(despesas)
+            etapa.dataframe_mb = memoria_mb(despesas)
+
+        # ==================================================
+        # 3️⃣ MERGE CORRETO + 4️⃣ Tratamento de inconsistências
+        # ==================================================
+
+        with execucao.etapa("merge", linhas_entrada=len(despesas)) as etapa:
+            final = juntar_cadastro(despesas, cadastro)
+            etapa.linhas_saida = len(final)
+            etapa.dataframe_mb = memoria_mb(final)
+
+        previa("COLUNAS FINAIS", final.columns.tolist())
+        previa("PREVIEW FINAL", final.head())
+
+        # ==================================================
+        # 5️⃣ Exportação CSV + ZIP (+ Parquet opcional)
+        # ==================================================
+
+        with execucao.etapa("exportacao", linhas_entrada=len(final)):
+            final.to_csv(csv_path, index=False, encoding="utf-8-sig")
+            exportar_zip(csv_path, zip_path)
+
+            if parquet_path:
+                escritor = EscritorParquet(parquet_path)
+                escritor.escrever(final)
+                escritor.fechar()
+
+        print("\nCONSOLIDAÇÃO FINALIZADA COM SUCESSO")
+        print(f"Arquivo: {zip_path}")
 
 
 # ==================================================
@@ -158,4 +529,63 @@ def consolidar_despesas():
 # ==================================================
 
 if __name__ == "__main__":
-    consolidar_despesas()
+    parser = argparse.ArgumentParser(description="Consolida as despesas trimestrais da ANS.")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Lê os CSVs trimestrais em blocos deste tamanho (modo streaming, memória constante)."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de processos para ler os arquivos trimestrais em paralelo (padrão: 1, serial)."
+    )
+    parser.add_argument(
+        "--baixar",
+        nargs="+",
+        metavar="ANO_TRIMESTRE",
+        help="Baixa antes os ZIPs trimestrais informados (ex.: 2025_1T 2025_2T)."
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Grava também consolidado_despesas.parquet (tipado, lido direto pelas etapas seguintes)."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Só reprocessa trimestres novos ou alterados (partições em output/trimestres + manifesto.json)."
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignora o manifesto e reprocessa todos os trimestres, regravando partições e manifesto."
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Imprime as prévias de depuração (colunas e primeiras linhas de cada etapa)."
+    )
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help="Grava cProfile e tracemalloc da etapa mais lenta ao lado de output/metricas.json."
+    )
+    args = parser.parse_args()
+
+    if args.verbose:
+        definir_verbosidade(True)
+
+    if args.baixar:
+        baixar_demonstracoes(args.baixar)
+
+    consolidar_despesas(
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        parquet=args.parquet,
+        incremental=args.incremental,
+        full_rebuild=args.full_rebuild,
+        perfil=args.perfil or None,
+    )
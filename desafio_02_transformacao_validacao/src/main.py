@@ -1,6 +1,20 @@
 import pandas as pd
+import numpy as np
 import os
 import re
+import sys
+import argparse
+from collections import OrderedDict
+
+# Adiciona a raiz do projeto ao path (módulos compartilhados em comum/)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from comum.download import baixar_arquivo
+from comum.consolidado import ler_consolidado
+from comum.dinheiro import centavos, reais
+from comum.esquema import ler_cadop, ler_consolidado_csv, memoria_mb
+from comum.manifesto import hash_arquivo, ler_manifesto, salvar_manifesto
+from comum.metricas import Execucao
 
 def validate_cnpj(cnpj):
     """
@@ -29,26 +43,161 @@ def validate_cnpj(cnpj):
     
     return cnpj[-2:] == f"{digit1}{digit2}"
 
-def main():
-    # Caminhos
-    # Pega o diretório raiz do projeto (subindo de src/ e desafio_02...)
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    input_path = os.path.join(base_dir, "desafio_01_api_ans", "output", "consolidado_despesas.csv")
-    output_dir = os.path.join(base_dir, "desafio_02_transformacao_validacao", "output")
-    
-    print(f"Lendo dados de: {input_path}")
-    
-    # 2.1. Validação de Dados
-    # Vamos carregar o CSV consolidado do teste 1.3
-    try:
-        # Lendo com low_memory=False para evitar o aviso de Dtype
-        df = pd.read_csv(input_path, low_memory=False, encoding='utf-8-sig')
-    except Exception as e:
-        print(f"Erro ao ler o arquivo: {e}")
-        return
+CNPJ_WEIGHTS1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+CNPJ_WEIGHTS2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+# Maior texto que entra na matriz: "12.345.678/0001-95" tem 18 caracteres, com
+# folga para espaços e outras formatações. Os mais longos vão para a referência
+CNPJ_MAX_WIDTH = 32
+
+def validate_cnpj_batch(cnpjs, batch_size=1_000_000):
+    """
+    Versão vetorizada de validate_cnpj para uma Series/array inteira.
+    Os textos viram uma matriz de códigos de caractere; os dígitos de cada
+    linha são extraídos com máscaras NumPy e os dois dígitos verificadores
+    são calculados como produtos matriciais. Retorna um array de bool.
+    validate_cnpj continua sendo a referência (usada para textos não-ASCII e
+    para os maiores que CNPJ_MAX_WIDTH, que alargariam a matriz inteira).
+    """
+    def check_digit(digits, weights):
+        rest = (digits @ weights) % 11
+        return np.where(rest < 2, 0, 11 - rest)
+
+    # dtype=object: uma lista só de números (e None) viraria float64 e "…0195.0"
+    textos = pd.Series(cnpjs, dtype=object, copy=False).astype(str).fillna("").to_numpy(dtype=object)
+    result = np.zeros(len(textos), dtype=bool)
+
+    for start in range(0, len(textos), batch_size):
+        chunk = textos[start:start + batch_size]
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        for i in np.flatnonzero(lengths > CNPJ_MAX_WIDTH):
+            result[start + i] = validate_cnpj(chunk[i])
+
+        # Posições (no lote) dos textos que entram na matriz
+        short = np.flatnonzero(lengths <= CNPJ_MAX_WIDTH)
+        chunk = chunk[short].astype(str)
+        if chunk.dtype.itemsize == 0:
+            continue
+
+        # (n, largura <= CNPJ_MAX_WIDTH) com o code point de cada caractere (0 = padding)
+        chars = chunk.view(np.uint32).reshape(len(chunk), -1)
+        is_digit = (chars >= 48) & (chars <= 57)
+        rows = np.flatnonzero(is_digit.sum(axis=1) == 14)
+
+        digits = (chars[rows][is_digit[rows]].reshape(-1, 14) - 48).astype(np.int64)
+
+        valid = (
+            (check_digit(digits[:, :12], CNPJ_WEIGHTS1) == digits[:, 12])
+            & (check_digit(digits[:, :13], CNPJ_WEIGHTS2) == digits[:, 13])
+            & ~(digits == digits[:, :1]).all(axis=1)
+        )
+        result[start + short[rows]] = valid
+
+        # \D do re também considera dígitos Unicode: esses casos raros vão para a referência
+        non_ascii = np.flatnonzero((chars > 127).any(axis=1))
+        for i in non_ascii:
+            result[start + short[i]] = validate_cnpj(chunk[i])
+
+    return result
+
+def normalize_cnpj(cnpjs):
+    """Remove a formatação e completa com zeros à esquerda (14 dígitos)."""
+    return pd.Series(cnpjs, dtype=object, copy=False).astype(str).str.replace(r'\D', '', regex=True).str.zfill(14)
+
+class CNPJCache:
+    """
+    Cache LRU limitado: CNPJ bruto -> (válido, CNPJ normalizado).
+    Mantido entre lotes para que um CNPJ já visto não seja revalidado.
+    """
+    def __init__(self, maxsize=200_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+def validate_unique_cnpjs(cnpjs, cache=None):
+    """
+    Etapa de validação deduplicada: fatoriza a coluna em códigos, valida e
+    normaliza cada CNPJ distinto uma única vez (consultando o cache LRU) e
+    devolve os resultados para todas as linhas pelos códigos.
+    Retorna (válidos: array de bool, normalizados: Series, estatísticas: dict).
+    """
+    series = pd.Series(cnpjs, dtype=object, copy=False)
+    # Chave = texto, do qual a validação e a normalização dependem: 11222333000181
+    # e 1.1222333000181e13 são iguais em Python, mas "…181" e "…181.0" não
+    codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=False)
+    keys = [None if pd.isna(u) else u for u in uniques]
 
-    print(f"Total de registros carregados: {len(df)}")
+    cached = [cache.get(k) for k in keys] if cache is not None else [None] * len(keys)
+    missing = [i for i, value in enumerate(cached) if value is None]
 
+    if missing:
+        missing_keys = [keys[i] for i in missing]
+        valid_missing = validate_cnpj_batch(pd.Series(missing_keys, dtype=object))
+        normalized_missing = normalize_cnpj(pd.Series(missing_keys, dtype=object)).tolist()
+        for i, key, valid, normalized in zip(missing, missing_keys, valid_missing, normalized_missing):
+            cached[i] = (bool(valid), normalized)
+            if cache is not None:
+                cache.put(key, cached[i])
+
+    valid_unique = np.array([value[0] for value in cached], dtype=bool)
+    normalized_unique = np.array([value[1] for value in cached], dtype=object)
+
+    stats = {
+        "rows": len(series),
+        "unique": len(uniques),
+        "validated": len(missing),
+        "dedup_ratio": len(series) / max(len(uniques), 1),
+    }
+    return valid_unique[codes], pd.Series(normalized_unique[codes], index=series.index), stats
+
+# Chaves do agregado final (uma linha por operadora/UF)
+AGGREGATION_KEYS = ['CNPJ', 'RazaoSocial', 'RegistroANS', 'Modalidade', 'UF']
+
+def load_cadop(cadop_path, cache=None):
+    """
+    Lê o cadastro de operadoras ativas e prepara as colunas usadas no join
+    (CNPJ normalizado, sem duplicatas).
+    """
+    print("Lendo dados cadastrais...")
+    # O arquivo da ANS costuma usar latin-1 ou cp1252 e separador ';' (encoding detectado antes da leitura)
+    # Só as colunas usadas, como texto: REGISTRO_OPERADORA sai igual no CSV, com ou sem operadoras não encontradas
+    df_cadop = ler_cadop(cadop_path, ['CNPJ', 'REGISTRO_OPERADORA', 'Modalidade', 'UF'])
+
+    # Limpeza básica do cadastro para o join
+    # Garantir que CNPJ seja string e formatado uniformemente
+    # (normalização feita uma vez por CNPJ distinto, reaproveitando o cache da validação)
+    df_cadop['CNPJ'] = validate_unique_cnpjs(df_cadop['CNPJ'], cache)[1]
+
+    # Tratar CNPJs duplicados no cadastro (Estratégia: keep first)
+    df_cadop = df_cadop.drop_duplicates(subset=['CNPJ'])
+
+    # Colunas desejadas: RegistroANS, Modalidade, UF
+    # No CSV da ANS os nomes são: REGISTRO_OPERADORA, Modalidade, UF
+    return df_cadop[['CNPJ', 'REGISTRO_OPERADORA', 'Modalidade', 'UF']]
+
+def clean_expenses(df, cache=None):
+    """
+    2.1: aplica as validações e devolve só os registros válidos, com o CNPJ
+    já normalizado (apenas dígitos).
+    """
     # Implementando validações
     # 1. Razão Social não vazia
     df['razao_social_valida'] = df['RazaoSocial'].notna() & (df['RazaoSocial'].str.strip() != '')
@@ -57,82 +206,288 @@ def main():
     df['valor_positivo'] = df['ValorDespesas'] >= 0
     
     # 3. CNPJ válido
-    print("Validando CNPJs (isso pode levar um tempo dependendo do volume)...")
-    df['cnpj_valido'] = df['CNPJ'].apply(validate_cnpj)
+    print("Validando CNPJs...")
+    cnpj_valido, cnpj_normalizado, stats = validate_unique_cnpjs(df['CNPJ'], cache)
+    df['cnpj_valido'] = cnpj_valido
+    print(f"{stats['rows']} linhas, {stats['unique']} CNPJs distintos "
+          f"(dedup {stats['dedup_ratio']:.0f}x, {stats['validated']} validados)")
 
     # Filtragem dos dados válidos
     df_clean = df[df['razao_social_valida'] & df['valor_positivo'] & df['cnpj_valido']].copy()
     print(f"Registros válidos: {len(df_clean)}")
 
-    # 2.2. Enriquecimento de Dados
-    cadop_url = "https://dadosabertos.ans.gov.br/FTP/PDA/operadoras_de_plano_de_saude_ativas/Relatorio_cadop.csv"
-    cadop_path = os.path.join(base_dir, "desafio_02_transformacao_validacao", "data", "Relatorio_cadop.csv")
-    
-    if not os.path.exists(cadop_path):
-        print(f"Baixando dados cadastrais de: {cadop_url}")
-        import requests
-        response = requests.get(cadop_url)
-        with open(cadop_path, 'wb') as f:
-            f.write(response.content)
-    
-    print("Lendo dados cadastrais...")
-    # O arquivo da ANS costuma usar latin-1 ou cp1252 e separador ';'
-    try:
-        df_cadop = pd.read_csv(cadop_path, sep=';', encoding='utf-8-sig')
-    except:
-        df_cadop = pd.read_csv(cadop_path, sep=';', encoding='latin-1')
+    df_clean['CNPJ'] = cnpj_normalizado[df_clean.index]
+    return df_clean
 
-    # Limpeza básica do cadastro para o join
-    # Garantir que CNPJ seja string e formatado uniformemente
-    df_cadop['CNPJ'] = df_cadop['CNPJ'].astype(str).str.replace(r'\D', '', regex=True).str.zfill(14)
-    df_clean['CNPJ'] = df_clean['CNPJ'].astype(str).str.replace(r'\D', '', regex=True).str.zfill(14)
+def quarterly_sums(df_clean):
+    """
+    Soma das despesas de cada operadora em cada trimestre, agrupando por
+    códigos inteiros em vez das colunas de texto: (CNPJ, RazaoSocial)
+    fatorados formam o grupo e (Ano, Trimestre) o índice do trimestre.
 
-    # Tratar CNPJs duplicados no cadastro (Estratégia: keep first)
-    df_cadop = df_cadop.drop_duplicates(subset=['CNPJ'])
+    Devolve (keys, sums): `keys` tem CNPJ e RazaoSocial de cada grupo, na
+    mesma ordem do groupby por texto; `sums` tem uma linha por
+    grupo/trimestre com lançamentos, em centavos (int64), indexada pelo
+    código do grupo e em ordem de trimestre.
+    """
+    cnpj_codes, cnpjs = pd.factorize(df_clean['CNPJ'], sort=True)
+    name_codes, names = pd.factorize(df_clean['RazaoSocial'], sort=True)
+    year_codes, _ = pd.factorize(df_clean['Ano'], sort=True)
+    quarter_codes, quarters = pd.factorize(df_clean['Trimestre'], sort=True)
+
+    n_names = max(len(names), 1)
+    group_codes, groups = pd.factorize(cnpj_codes.astype(np.int64) * n_names + name_codes, sort=True)
+    period_codes = year_codes.astype(np.int64) * max(len(quarters), 1) + quarter_codes
+    n_periods = int(period_codes.max()) + 1 if len(period_codes) else 1
+
+    # Uma única passada sobre os lançamentos, com chave inteira grupo x trimestre.
+    # Somas em centavos int64 (comum/dinheiro.py): exatas, iguais em qualquer
+    # ordem de linhas e idênticas às do agrupamento pelas colunas de texto.
+    cells = group_codes.astype(np.int64) * n_periods + period_codes
+    cell_sums = pd.Series(centavos(df_clean['ValorDespesas'])).groupby(cells).sum()
+    sums = pd.Series(cell_sums.to_numpy(), index=cell_sums.index.to_numpy() // n_periods)
+
+    # Textos de CNPJ/RazaoSocial só para os grupos (não para cada lançamento)
+    keys = pd.DataFrame({
+        'CNPJ': np.asarray(cnpjs.take(groups // n_names), dtype=object),
+        'RazaoSocial': np.asarray(names.take(groups % n_names), dtype=object),
+    })
+    return keys, sums
 
+def attach_descriptors(grouped, df_cadop):
+    """
+    2.2: junta RegistroANS, Modalidade e UF do cadastro ao resultado já
+    agrupado (uma linha por operadora, não por lançamento).
+    """
     print("Fazendo o Join das tabelas...")
-    # Colunas desejadas: RegistroANS, Modalidade, UF
-    # No CSV da ANS os nomes são: REGISTRO_OPERADORA, Modalidade, UF
-    cols_to_keep = ['CNPJ', 'REGISTRO_OPERADORA', 'Modalidade', 'UF']
-    
-    df_enriched = pd.merge(df_clean, df_cadop[cols_to_keep], on='CNPJ', how='left')
-    df_enriched = df_enriched.rename(columns={'REGISTRO_OPERADORA': 'RegistroANS'})
+    enriched = pd.merge(grouped, df_cadop, on='CNPJ', how='left')
+    enriched = enriched.rename(columns={'REGISTRO_OPERADORA': 'RegistroANS'})
 
-    # 2.3. Agregação
-    print("Agrupando e calculando métricas...")
     # Preencher nulos para garantir que apareçam no agrupamento
-    df_enriched['UF'] = df_enriched['UF'].fillna('N/A')
-    df_enriched['Modalidade'] = df_enriched['Modalidade'].fillna('N/A')
-    df_enriched['RegistroANS'] = df_enriched['RegistroANS'].fillna('N/A')
-
-    # Cálculo correto da média por trimestre:
-    # 1. Primeiro somamos as despesas por operadora/UF em cada trimestre individual
-    df_quarterly = df_enriched.groupby(['CNPJ', 'RazaoSocial', 'RegistroANS', 'Modalidade', 'UF', 'Ano', 'Trimestre']).agg(
-        Soma_Trimestre=('ValorDespesas', 'sum')
-    ).reset_index()
+    for column in ['RegistroANS', 'Modalidade', 'UF']:
+        enriched[column] = enriched[column].fillna('N/A')
+
+    values = [column for column in grouped.columns if column not in AGGREGATION_KEYS]
+    return enriched[AGGREGATION_KEYS + values]
+
+def aggregate_expenses(df_clean, df_cadop):
+    """
+    2.3 sobre as somas trimestrais (poucas linhas por operadora): Total,
+    Média dos trimestres e Desvio Padrão amostral por operadora/UF,
+    calculados em centavos e convertidos para reais no final.
+    """
+    keys, sums = quarterly_sums(df_clean)
+    stats = sums.groupby(level=0).agg(['sum', 'mean', 'std'])
 
-    # 2. Agora calculamos o Total, a Média dos trimestres e o Desvio Padrão
-    agregado = df_quarterly.groupby(['CNPJ', 'RazaoSocial', 'RegistroANS', 'Modalidade', 'UF']).agg(
-        Total_Despesas=('Soma_Trimestre', 'sum'),
-        Media_Trimestral=('Soma_Trimestre', 'mean'), 
-        Desvio_Padrao_Despesas=('Soma_Trimestre', 'std')
+    grouped = keys.assign(
+        Total_Despesas=reais(stats['sum']),
+        Media_Trimestral=reais(stats['mean']),
+        Desvio_Padrao_Despesas=reais(stats['std'])
+    )
+    return attach_descriptors(grouped, df_cadop)
+
+# ==================================================
+# Execução incremental (parciais por trimestre)
+# ==================================================
+
+def quarter_partial(df_clean, df_cadop):
+    """
+    Parcial de um trimestre: a soma (centavos int64) de cada operadora/UF em
+    cada trimestre da partição, uma linha por soma. Juntando as parciais de
+    vários trimestres, Total, Média e Desvio Padrão são recalculados sobre
+    as mesmas somas inteiras do caminho completo, sem reler os dados.
+    """
+    keys, sums = quarterly_sums(df_clean)
+    grouped = keys.take(sums.index).reset_index(drop=True).assign(SomaCentavos=sums.to_numpy())
+    return attach_descriptors(grouped, df_cadop)
+
+def merge_partials(partials):
+    """
+    Junta as somas trimestrais das parciais no agregado final, com as mesmas
+    contas do `aggregate_expenses`. O desvio não sai de somas de quadrados:
+    em float64, Σx² − (Σx)²/n perde todos os dígitos quando as somas
+    trimestrais são grandes e quase iguais.
+    """
+    columns = AGGREGATION_KEYS + ['Total_Despesas', 'Media_Trimestral', 'Desvio_Padrao_Despesas']
+    if not partials:
+        return pd.DataFrame(columns=columns)
+
+    stats = pd.concat(partials, ignore_index=True).groupby(AGGREGATION_KEYS, sort=False)['SomaCentavos'].agg(
+        ['sum', 'mean', 'std']
     ).reset_index()
 
-    # Ordenar por valor total (maior para menor)
-    agregado = agregado.sort_values(by='Total_Despesas', ascending=False)
+    stats['Total_Despesas'] = reais(stats['sum'])
+    stats['Media_Trimestral'] = reais(stats['mean'])
+    stats['Desvio_Padrao_Despesas'] = reais(stats['std'])
+    return stats[columns]
 
-    # Salvar resultado
-    output_file = os.path.join(output_dir, "despesas_agregadas.csv")
-    agregado.to_csv(output_file, index=False, encoding='utf-8-sig')
-    print(f"Resultado salvo em: {output_file}")
+def sort_aggregate(agregado):
+    """
+    Maior total primeiro; empates desfeitos pelas chaves, com ordenação
+    estável. O caminho completo e o incremental gravam o mesmo arquivo.
+    """
+    return agregado.sort_values(
+        by=['Total_Despesas'] + AGGREGATION_KEYS,
+        ascending=[False] + [True] * len(AGGREGATION_KEYS),
+        kind='mergesort'
+    ).reset_index(drop=True)
 
-    # Compactar em ZIP
-    import zipfile
-    zip_path = os.path.join(base_dir, "Teste_Thiago_Rodrigues.zip")
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        zipf.write(output_file, arcname="despesas_agregadas.csv")
-    
-    print(f"Arquivo final compactado em: {zip_path}")
+def load_partition(path):
+    """Lê a partição de um trimestre gravada pelo desafio 1 (mesmos tipos do consolidado)."""
+    return ler_consolidado_csv(path)
+
+# Versão das colunas das parciais: parciais de outra versão (ex.: soma em
+# reais, antes dos centavos, ou soma dos quadrados) são recalculadas
+PARTIALS_FORMAT = 3
+
+def read_partial(path):
+    return pd.read_csv(path, dtype={**{key: str for key in AGGREGATION_KEYS}, 'SomaCentavos': 'int64'},
+                       keep_default_na=False,
+                       float_precision='round_trip', encoding='utf-8')
+
+def update_partials(stage1_manifest, stage1_dir, output_dir, df_cadop, cadop_hash,
+                    cache=None, full_rebuild=False):
+    """
+    Atualiza as parciais de `output_dir/parciais` a partir das partições do
+    desafio 1, reprocessando só os trimestres cuja partição mudou (ou todos,
+    se o cadastro mudou ou `full_rebuild`). Devolve o agregado final e a
+    lista de trimestres reprocessados.
+    """
+    partials_dir = os.path.join(output_dir, "parciais")
+    os.makedirs(partials_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, "manifesto.json")
+
+    previous = ler_manifesto(manifest_path)
+    if full_rebuild or previous.get("cadop") != cadop_hash or previous.get("formato") != PARTIALS_FORMAT:
+        previous["trimestres"] = {}
+
+    quarters = {}
+    reprocessed = []
+    for name, info in sorted(stage1_manifest["trimestres"].items()):
+        partial_path = os.path.join(partials_dir, f"{name}.csv")
+        saved = previous["trimestres"].get(name, {})
+        if saved.get("particao") == info["sha256"] and os.path.exists(partial_path):
+            quarters[name] = saved
+            continue
+
+        print(f"\nProcessando trimestre {name}...")
+        df_quarter = load_partition(os.path.join(stage1_dir, info["particao"]))
+        partial = quarter_partial(clean_expenses(df_quarter, cache), df_cadop)
+
+        temporary = partial_path + ".tmp"
+        partial.to_csv(temporary, index=False, encoding='utf-8')
+        os.replace(temporary, partial_path)
+
+        quarters[name] = {"particao": info["sha256"], "linhas": len(partial)}
+        reprocessed.append(name)
+
+    # Parciais de trimestres que não existem mais no desafio 1
+    for file_name in os.listdir(partials_dir):
+        if file_name.endswith(".csv") and file_name[:-4] not in quarters:
+            os.remove(os.path.join(partials_dir, file_name))
+
+    salvar_manifesto(manifest_path, {"cadop": cadop_hash, "formato": PARTIALS_FORMAT, "trimestres": quarters})
+    print(f"Trimestres reprocessados: {', '.join(reprocessed) or 'nenhum'}")
+
+    partials = [read_partial(os.path.join(partials_dir, f"{name}.csv")) for name in sorted(quarters)]
+    return merge_partials(partials), reprocessed
+
+def main(base_dir=None, full_rebuild=False, perfil=None):
+    # Caminhos
+    # Pega o diretório raiz do projeto (subindo de src/ e desafio_02...)
+    if base_dir is None:
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    stage1_dir = os.path.join(base_dir, "desafio_01_api_ans", "output")
+    input_path = os.path.join(stage1_dir, "consolidado_despesas.csv")
+    output_dir = os.path.join(base_dir, "desafio_02_transformacao_validacao", "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Tempo, CPU, memória e linhas de cada etapa (comum/metricas.py)
+    metrics_path = os.path.join(output_dir, "metricas.json")
+    with Execucao("desafio_02", metrics_path, {"full_rebuild": full_rebuild}, perfil) as run:
+        cnpj_cache = CNPJCache()
+
+        # 2.2. Enriquecimento de Dados
+        cadop_url = "https://dadosabertos.ans.gov.br/FTP/PDA/operadoras_de_plano_de_saude_ativas/Relatorio_cadop.csv"
+        cadop_path = os.path.join(base_dir, "desafio_02_transformacao_validacao", "data", "Relatorio_cadop.csv")
+
+        with run.etapa("cadastro") as stage:
+            # Baixa ou revalida (ETag/Last-Modified) a cópia local do cadastro
+            print(f"Verificando dados cadastrais em: {cadop_url}")
+            baixar_arquivo(cadop_url, cadop_path)
+            df_cadop = load_cadop(cadop_path, cnpj_cache)
+            stage.linhas_saida = len(df_cadop)
+
+        # Se o desafio 1 rodou com --incremental, há partições por trimestre e
+        # só as que mudaram desde a última execução são reprocessadas
+        stage1_manifest = ler_manifesto(os.path.join(stage1_dir, "manifesto.json"))
+        if stage1_manifest["trimestres"]:
+            print("Manifesto do desafio 1 encontrado: execução incremental.")
+            with run.etapa("parciais") as stage:
+                agregado, _ = update_partials(stage1_manifest, stage1_dir, output_dir, df_cadop,
+                                              hash_arquivo(cadop_path), cnpj_cache, full_rebuild)
+                stage.linhas_saida = len(agregado)
+        else:
+            print(f"Lendo dados de: {input_path}")
+
+            # 2.1. Validação de Dados
+            # Vamos carregar o CSV consolidado do teste 1.3
+            with run.etapa("leitura") as stage:
+                try:
+                    # Usa o Parquet do desafio 1 se existir; senão lê o CSV (low_memory=False)
+                    df = ler_consolidado(input_path)
+                except Exception as e:
+                    print(f"Erro ao ler o arquivo: {e}")
+                    return
+                stage.linhas_saida = len(df)
+                stage.dataframe_mb = memoria_mb(df)
+
+            print(f"Total de registros carregados: {len(df)}")
+
+            with run.etapa("validacao", linhas_entrada=len(df)) as stage:
+                df_clean = clean_expenses(df, cnpj_cache)
+                stage.linhas_saida = len(df_clean)
+                stage.dataframe_mb = memoria_mb(df_clean)
+
+            # 2.3. Agregação
+            print("Agrupando e calculando métricas...")
+            # Cálculo correto da média por trimestre:
+            # 1. Primeiro somamos as despesas por operadora em cada trimestre individual
+            # 2. Depois calculamos o Total, a Média dos trimestres e o Desvio Padrão
+            # (grupos em códigos inteiros; RegistroANS/Modalidade/UF entram só no final)
+            with run.etapa("agregacao", linhas_entrada=len(df_clean)) as stage:
+                agregado = aggregate_expenses(df_clean, df_cadop)
+                stage.linhas_saida = len(agregado)
+
+        with run.etapa("exportacao", linhas_entrada=len(agregado)):
+            # Ordenar por valor total (maior para menor), com desempate pelas chaves
+            agregado = sort_aggregate(agregado)
+
+            # Salvar resultado
+            output_file = os.path.join(output_dir, "despesas_agregadas.csv")
+            agregado.to_csv(output_file, index=False, encoding='utf-8-sig')
+            print(f"Resultado salvo em: {output_file}")
+
+            # Compactar em ZIP
+            import zipfile
+            zip_path = os.path.join(base_dir, "Teste_Thiago_Rodrigues.zip")
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                zipf.write(output_file, arcname="despesas_agregadas.csv")
+
+        print(f"Arquivo final compactado em: {zip_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Valida, enriquece e agrega o consolidado de despesas.")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignora as parciais salvas e recalcula todos os trimestres."
+    )
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help="Grava cProfile e tracemalloc da etapa mais lenta ao lado de output/metricas.json."
+    )
+    args = parser.parse_args()
+
+    main(full_rebuild=args.full_rebuild, perfil=args.perfil or None)
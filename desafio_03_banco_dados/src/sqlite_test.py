@@ -1,139 +1,181 @@
-import sqlite3
 import pandas as pd
 import os
+import sys
+import argparse
 
-def run_test():
-    # Caminhos
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    despesas_path = os.path.join(base_dir, "desafio_01_api_ans", "output", "consolidado_despesas.csv")
-    cadop_path = os.path.join(base_dir, "desafio_02_transformacao_validacao", "data", "Relatorio_cadop.csv")
-    
-    # Criar Banco em memória
-    conn = sqlite3.connect(':memory:')
-    
-    print("--- Simulação de Banco de Dados (SQLite) ---")
-    
-    # Função para limpar textos de acentuação zoada
-    def clean_text(df, column):
-        if column in df.columns:
-            # Tenta corrigir o erro clássico de ler UTF-8 como Latin-1
-            def fix(text):
-                if not isinstance(text, str): return text
-                try:
-                    return text.encode('latin-1').decode('utf-8')
-                except:
-                    return text
-            df[column] = df[column].apply(fix)
-        return df
-
-    # 1. Carregar Operadoras
-    print("Carregando dados cadastrais...")
-    try:
-        # Relatorio_cadop agora é processado como utf-8-sig
-        df_cadop = pd.read_csv(cadop_path, sep=';', encoding='utf-8-sig')
-        df_cadop = df_cadop[['CNPJ', 'REGISTRO_OPERADORA', 'Modalidade', 'UF', 'Razao_Social']].drop_duplicates(subset=['CNPJ'])
-        df_cadop.to_sql('operadoras', conn, index=False)
-    except Exception as e:
-        # Fallback para latin-1 caso o download original ainda esteja lá
-        df_cadop = pd.read_csv(cadop_path, sep=';', encoding='latin-1')
-        df_cadop = df_cadop[['CNPJ', 'REGISTRO_OPERADORA', 'Modalidade', 'UF', 'Razao_Social']].drop_duplicates(subset=['CNPJ'])
-        df_cadop.to_sql('operadoras', conn, index=False)
+# Adiciona a raiz do projeto ao path (módulos compartilhados em comum/)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-    # 2. Carregar Despesas
-    print("Carregando despesas (Base completa)...")
-    try:
-        # Nosso consolidado agora é salvo em utf-8-sig
-        df_despesas = pd.read_csv(despesas_path, low_memory=False, encoding='utf-8-sig')
-        
-        df_despesas['data_referencia'] = df_despesas['Ano'].astype(str) + "-" + \
-                                       df_despesas['Trimestre'].apply(lambda x: '01' if '1' in str(x) else ('04' if '2' in str(x) else '07' if '3' in str(x) else '10')) + "-01"
-        df_despesas.to_sql('despesas_consolidadas', conn, index=False)
-    except Exception as e:
-        print(f"Erro ao carregar despesas: {e}")
-        return
+from comum.esquema import ler_cadop, memoria_mb
+from comum.metricas import Execucao
+from comum.motor import MOTORES, abrir_motor
+from comum.normalizacao import corrigir_encoding
+from comum.rollups import ROLLUP_OPERADORA
 
-    # Execução das Queries
-    print("\n" + "="*50)
-    print("QUERY 1: TOP 5 CRESCIMENTO PERCENTUAL")
-    query1 = """
-    WITH primeiro_ponto AS (
-        SELECT CNPJ, RazaoSocial, SUM(ValorDespesas) as inicial
-        FROM despesas_consolidadas
-        WHERE data_referencia = (SELECT MIN(data_referencia) FROM despesas_consolidadas)
-        GROUP BY CNPJ
-    ),
-    ultimo_ponto AS (
-        SELECT CNPJ, SUM(ValorDespesas) as final
-        FROM despesas_consolidadas
-        WHERE data_referencia = (SELECT MAX(data_referencia) FROM despesas_consolidadas)
-        GROUP BY CNPJ
-    )
+# Queries analíticas sobre o rollup por operadora/trimestre (comum/rollups.py),
+# com os totais em centavos (INTEGER) convertidos para reais só no resultado.
+# A razão social é a gravada no consolidado pelo desafio 1, levada para o
+# rollup (coluna razao_social), como na versão que agrupava as despesas: o
+# cadastro (operadoras) só lista as operadoras ativas e não serve de fonte
+# do nome para as que já encerraram as atividades.
+QUERY_CRESCIMENTO = f"""
+WITH crescimento AS (
     SELECT 
-        p.RazaoSocial,
-        ROUND(p.inicial, 2) as Gasto_Inicial,
-        ROUND(u.final, 2) as Gasto_Final,
-        ROUND(((u.final - p.inicial) / NULLIF(p.inicial, 0)) * 100, 2) as Crescimento_Perc
-    FROM primeiro_ponto p
-    JOIN ultimo_ponto u ON p.CNPJ = u.CNPJ
-    WHERE p.inicial > 0
+        p.cnpj,
+        p.razao_social,
+        p.total_centavos as inicial,
+        u.total_centavos as final,
+        ROUND((u.total_centavos - p.total_centavos) * 100.0 / NULLIF(p.total_centavos, 0), 2) as Crescimento_Perc
+    FROM {ROLLUP_OPERADORA} p
+    JOIN {ROLLUP_OPERADORA} u ON u.cnpj = p.cnpj
+        AND u.data_referencia = (SELECT MAX(data_referencia) FROM {ROLLUP_OPERADORA})
+    WHERE p.data_referencia = (SELECT MIN(data_referencia) FROM {ROLLUP_OPERADORA})
+        AND p.total_centavos > 0
     ORDER BY Crescimento_Perc DESC
     LIMIT 5
-    """
-    print(pd.read_sql(query1, conn).to_string(index=False))
+)
+SELECT 
+    c.razao_social as RazaoSocial,
+    ROUND(c.inicial / 100.0, 2) as Gasto_Inicial,
+    ROUND(c.final / 100.0, 2) as Gasto_Final,
+    c.Crescimento_Perc
+FROM crescimento c
+ORDER BY c.Crescimento_Perc DESC
+"""
 
-    print("\n" + "="*50)
-    print("QUERY 2: DISTRIBUIÇÃO POR UF (ORDEM DE GASTO)")
-    query2 = """
-    SELECT 
-        o.UF,
-        ROUND(SUM(d.ValorDespesas), 2) as Total_UF,
-        ROUND(SUM(d.ValorDespesas) / COUNT(DISTINCT o.CNPJ), 2) as Media_Por_Operadora
-    FROM despesas_consolidadas d
-    JOIN operadoras o ON d.CNPJ = o.CNPJ
-    GROUP BY o.UF
-    ORDER BY Total_UF DESC
-    LIMIT 5
-    """
-    print(pd.read_sql(query2, conn).to_string(index=False))
+QUERY_UF = f"""
+SELECT 
+    o.UF,
+    ROUND(SUM(r.total_centavos) / 100.0, 2) as Total_UF,
+    ROUND(SUM(r.total_centavos) / 100.0 / COUNT(DISTINCT o.CNPJ), 2) as Media_Por_Operadora
+FROM {ROLLUP_OPERADORA} r
+JOIN operadoras o ON r.cnpj = o.CNPJ
+GROUP BY o.UF
+ORDER BY Total_UF DESC
+LIMIT 5
+"""
 
-    print("\n" + "="*50)
-    print("QUERY 3: ACIMA DA MÉDIA EM 2+ TRIMESTRES")
-    query3 = """
-    WITH total_operadora_trimestre AS (
-        SELECT CNPJ, RazaoSocial, data_referencia, SUM(ValorDespesas) as total_op
-        FROM despesas_consolidadas
-        GROUP BY CNPJ, data_referencia
-    ),
-    media_global_trimestre AS (
-        SELECT data_referencia, AVG(total_op) as media_global
-        FROM total_operadora_trimestre
-        GROUP BY data_referencia
-    )
-    SELECT 
-        t.RazaoSocial,
-        COUNT(*) as Trimestres_Acima_Media
-    FROM total_operadora_trimestre t
+QUERY_ACIMA_MEDIA = f"""
+WITH media_global_trimestre AS (
+    SELECT data_referencia, AVG(total_centavos) as media_global
+    FROM {ROLLUP_OPERADORA}
+    GROUP BY data_referencia
+),
+acima_media AS (
+    SELECT t.cnpj, MIN(t.razao_social) as razao_social, COUNT(*) as Trimestres_Acima_Media
+    FROM {ROLLUP_OPERADORA} t
     JOIN media_global_trimestre m ON t.data_referencia = m.data_referencia
-    WHERE t.total_op > m.media_global
-    GROUP BY t.CNPJ
+    WHERE t.total_centavos > m.media_global
+    GROUP BY t.cnpj
     HAVING Trimestres_Acima_Media >= 2
+    ORDER BY t.cnpj
     LIMIT 5
-    """
-    print(pd.read_sql(query3, conn).to_string(index=False))
+)
+SELECT 
+    a.razao_social as RazaoSocial,
+    a.Trimestres_Acima_Media
+FROM acima_media a
+ORDER BY a.cnpj
+"""
+
+QUERIES = [
+    ("TOP 5 CRESCIMENTO PERCENTUAL", QUERY_CRESCIMENTO),
+    ("DISTRIBUIÇÃO POR UF (ORDEM DE GASTO)", QUERY_UF),
+    ("ACIMA DA MÉDIA EM 2+ TRIMESTRES", QUERY_ACIMA_MEDIA),
+]
+
+def run_test(despesas_path=None, cadop_path=None, perfil=None, motor="sqlite"):
+    # Caminhos
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if despesas_path is None:
+        despesas_path = os.path.join(base_dir, "desafio_01_api_ans", "output", "consolidado_despesas.csv")
+    if cadop_path is None:
+        cadop_path = os.path.join(base_dir, "desafio_02_transformacao_validacao", "data", "Relatorio_cadop.csv")
+    
+    # Banco em memória: SQLite (padrão) ou DuckDB lendo o consolidado no lugar (comum/motor.py)
+    banco = abrir_motor(motor)
+    
+    print(f"--- Simulação de Banco de Dados ({'SQLite' if motor == 'sqlite' else 'DuckDB'}) ---")
+
+    try:
+        # Tempo, CPU, memória e linhas de cada etapa, gravados ao lado do log (comum/metricas.py)
+        with Execucao("sqlite_test", "metricas_sqlite_test.json", {"motor": motor}, perfil) as execucao:
+            # 1. Carregar Operadoras
+            print("Carregando dados cadastrais...")
+            with execucao.etapa("operadoras") as etapa:
+                # Relatorio_cadop agora é processado como utf-8-sig; o original da ANS ainda pode estar em latin-1
+                # (encoding detectado na leitura). Só as colunas usadas, como texto (CNPJ com zeros à esquerda)
+                df_cadop = ler_cadop(cadop_path, ['CNPJ', 'REGISTRO_OPERADORA', 'Modalidade', 'UF', 'Razao_Social'])
+                df_cadop = df_cadop[['CNPJ', 'REGISTRO_OPERADORA', 'Modalidade', 'UF', 'Razao_Social']].drop_duplicates(subset=['CNPJ'])
+                # Limpeza de acentuação zoada (UTF-8 lido como Latin-1), uma vez por texto distinto
+                for column in ['Modalidade', 'UF', 'Razao_Social']:
+                    df_cadop[column] = corrigir_encoding(df_cadop[column])
+                banco.carregar_dataframe('operadoras', df_cadop)
+                etapa.linhas_saida = len(df_cadop)
+
+            # 2. Carregar Despesas
+            print("Carregando despesas (Base completa)...")
+            with execucao.etapa("despesas") as etapa:
+                try:
+                    # Nosso consolidado agora é salvo em utf-8-sig (ou em Parquet, se gerado com --parquet),
+                    # com data_referencia e valor_centavos acrescentados pelo motor. No DuckDB é só uma
+                    # visão sobre o arquivo (None): não há cópia para medir
+                    df_despesas = banco.carregar_consolidado('despesas_consolidadas', despesas_path)
+                except Exception as e:
+                    # Propaga: as métricas ficam com sucesso=false e o banco é fechado no finally
+                    print(f"Erro ao carregar despesas: {e}")
+                    raise
+                if df_despesas is not None:
+                    etapa.linhas_saida = len(df_despesas)
+                    etapa.dataframe_mb = memoria_mb(df_despesas)
+
+            # O DataFrame não é mais usado (o SQLite tem a própria cópia): liberado antes dos rollups
+            linhas_despesas = None if df_despesas is None else len(df_despesas)
+            del df_despesas
+
+            # Rollups trimestrais: as queries leem os totais por operadora/trimestre
+            # em vez de reagrupar todas as despesas
+            print("Calculando rollups trimestrais...")
+            with execucao.etapa("rollups", linhas_entrada=linhas_despesas):
+                banco.criar_rollups(despesas="despesas_consolidadas", razao_social="RazaoSocial")
+
+            # Execução das Queries (cada uma roda uma vez: o mesmo resultado vai para a tela e para o log)
+            resultados = []
+            for numero, (titulo, query) in enumerate(QUERIES, start=1):
+                print("\n" + "="*50)
+                print(f"QUERY {numero}: {titulo}")
+                with execucao.etapa(f"query_{numero}") as etapa:
+                    colunas, linhas = banco.consultar(query)
+                    df_resultado = pd.DataFrame(linhas, columns=colunas)
+                    etapa.linhas_saida = len(df_resultado)
+                resultado = df_resultado.to_string(index=False)
+                print(resultado)
+                resultados.append(resultado)
+    finally:
+        banco.fechar()
     
     # Salvar resultados em um log para conferência
     with open("test_results.txt", "w", encoding="utf-8") as f:
         f.write("--- RESULTADOS DO TESTE ---\n\n")
-        
-        f.write("QUERY 1:\n")
-        f.write(pd.read_sql(query1, conn).to_string(index=False))
-        f.write("\n\nQUERY 2:\n")
-        f.write(pd.read_sql(query2, conn).to_string(index=False))
-        f.write("\n\nQUERY 3:\n")
-        f.write(pd.read_sql(query3, conn).to_string(index=False))
+        f.write("\n\n".join(f"QUERY {numero}:\n{resultado}" for numero, resultado in enumerate(resultados, start=1)))
 
     print("\n" + "="*50)
     print("Teste concluído com sucesso! Verifique 'test_results.txt' para os dados limpos.")
 
 if __name__ == "__main__":
-    run_test()
+    parser = argparse.ArgumentParser(description="Carrega os CSVs em um banco em memória e roda as queries analíticas.")
+    parser.add_argument(
+        "--motor",
+        choices=MOTORES,
+        default="sqlite",
+        help="sqlite (padrão) copia os dados para um SQLite em memória; duckdb consulta o consolidado no lugar, "
+             "em todos os núcleos (requer pip install duckdb)."
+    )
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help="Grava cProfile e tracemalloc da etapa mais lenta ao lado de metricas_sqlite_test.json."
+    )
+    args = parser.parse_args()
+
+    run_test(perfil=args.perfil or None, motor=args.motor)
@@ -0,0 +1,140 @@
+"""
+Motor das rotas agregadas da API (/api/estatisticas e análises do desafio 3).
+
+Por padrão (ANS_MOTOR=sqlite) essas rotas leem o ans.db, nos rollups e
+resumos gravados pelo build_db.py. Com ANS_MOTOR=duckdb elas rodam no DuckDB
+(comum/motor.py) direto sobre o consolidado do desafio 1 e o cadastro, sem
+reconstruir o banco:
+- `despesas` é uma visão sobre o arquivo, com as colunas do ans.db;
+- `operadoras` vem do cadastro, preparado como no build_db;
+- os rollups são recalculados em todos os núcleos na abertura do motor;
+- os resumos são visões com os mesmos SELECT do build_db.
+O motor é reaberto quando o consolidado ou o cadastro mudam. As demais rotas
+(busca, detalhe, despesas, lote, exportação) continuam no ans.db.
+
+Os caminhos podem ser trocados por ANS_CONSOLIDADO e ANS_CADOP.
+"""
+import hashlib
+import os
+import threading
+
+from comum.consolidado import parquet_atual
+from comum.motor import abrir_motor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONSOLIDADO_PADRAO = os.path.join(BASE_DIR, "desafio_01_api_ans", "output", "consolidado_despesas.csv")
+CADOP_PADRAO = os.path.join(BASE_DIR, "desafio_02_transformacao_validacao", "data", "Relatorio_cadop.csv")
+
+# Colunas de despesas do ans.db (build_db.prepare_despesas) a partir do consolidado
+SELECT_DESPESAS = """
+SELECT lpad(regexp_replace(CNPJ, '[^0-9]', '', 'g'), 14, '0') AS cnpj, data_referencia,
+       Ano AS ano, Trimestre AS trimestre, valor_centavos
+FROM consolidado
+"""
+
+
+def motor_configurado():
+    return os.environ.get("ANS_MOTOR", "sqlite")
+
+
+def caminho_consolidado():
+    return os.environ.get("ANS_CONSOLIDADO", CONSOLIDADO_PADRAO)
+
+
+def caminho_cadop():
+    return os.environ.get("ANS_CADOP", CADOP_PADRAO)
+
+
+class MotorAnalitico:
+    """Motor DuckDB das rotas agregadas, reaberto quando os arquivos de origem mudam."""
+
+    def __init__(self, consolidado=None, cadop=None):
+        self._consolidado = consolidado
+        self._cadop = cadop
+        self._lock = threading.Lock()
+        self._aberto = (None, None)  # (versão dos arquivos, motor)
+
+    @property
+    def consolidado(self):
+        # Resolvidos a cada uso, como o ANS_DB_PATH em db.py
+        return self._consolidado or caminho_consolidado()
+
+    @property
+    def cadop(self):
+        return self._cadop or caminho_cadop()
+
+    def versao_atual(self):
+        """Identifica os arquivos lidos (muda quando o desafio 1 ou o cadastro são regerados)."""
+        arquivos = [self.consolidado, parquet_atual(self.consolidado), self.cadop]
+        versao = []
+        for caminho in arquivos:
+            if caminho is not None and os.path.exists(caminho):
+                st = os.stat(caminho)
+                versao.append((str(caminho), st.st_size, st.st_mtime_ns))
+        return tuple(versao)
+
+    def build_id(self, versao=None):
+        """Equivalente ao build_id do ans.db: o mesmo enquanto os arquivos não mudam."""
+        versao = self.versao_atual() if versao is None else versao
+        return hashlib.sha1(repr(versao).encode()).hexdigest()
+
+    def _motor(self):
+        versao = self.versao_atual()
+        with self._lock:
+            if self._aberto[0] != versao:
+                # O motor anterior não é fechado: requisições em andamento ainda
+                # podem estar lendo dele, e ele é liberado com a última referência
+                self._aberto = (versao, self._abrir(versao))
+            return self._aberto[1]
+
+    def _abrir(self, versao):
+        # Import tardio: o build_db traz o pandas, que o modo SQLite da API não usa
+        from desafio_04_api_interface.backend.build_db import CONSULTAS_RESUMOS, prepare_operadoras
+
+        motor = abrir_motor("duckdb")
+        motor.carregar_consolidado("consolidado", self.consolidado)
+        motor.criar_visao("despesas", SELECT_DESPESAS)
+        motor.carregar_dataframe("operadoras", prepare_operadoras(self.cadop))
+        motor.criar_rollups()
+        for nome, select in CONSULTAS_RESUMOS.items():
+            motor.criar_visao(nome, select)
+        motor.criar_visao("build_info", f"SELECT 'build_id' AS chave, '{self.build_id(versao)}' AS valor")
+        return motor
+
+    def consultar(self, *consultas):
+        """
+        Cada consulta é (sql, params); devolve uma lista de dicts por consulta,
+        todas no mesmo motor (mesma versão dos arquivos).
+        """
+        motor = self._motor()
+        resultados = []
+        for sql, params in consultas:
+            colunas, linhas = motor.consultar(sql, params)
+            resultados.append([dict(zip(colunas, linha)) for linha in linhas])
+        return resultados
+
+
+class VersaoComposta:
+    """
+    build_id para o cache HTTP (cache_http.py) quando as rotas agregadas leem
+    o motor analítico: muda com o ans.db ou com os arquivos de origem.
+    """
+
+    def __init__(self, pool, motor):
+        self.pool = pool
+        self.motor = motor
+
+    def build_id(self):
+        return f"{self.pool.build_id()}-{self.motor.build_id()[:16]}"
+
+
+def criar_motor():
+    """MotorAnalitico com ANS_MOTOR=duckdb; None com o padrão (rotas agregadas no ans.db)."""
+    nome = motor_configurado()
+    if nome == "sqlite":
+        return None
+    if nome != "duckdb":
+        raise ValueError(f"ANS_MOTOR desconhecido: {nome} (opções: sqlite, duckdb)")
+    # Falha já na subida da API se o duckdb não estiver instalado
+    abrir_motor("duckdb").fechar()
+    return MotorAnalitico()
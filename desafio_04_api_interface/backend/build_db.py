@@ -1,59 +1,288 @@
 import sqlite3
-import pandas as pd
 import os
-import re
+import sys
+import uuid
+import argparse
+from datetime import datetime, timezone
 
-def build_db():
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    db_path = os.path.join(base_dir, "backend", "ans.db")
-    despesas_csv = os.path.join(base_dir, "..", "desafio_01_api_ans", "output", "consolidado_despesas.csv")
-    cadop_csv = os.path.join(base_dir, "..", "desafio_02_transformacao_validacao", "data", "Relatorio_cadop.csv")
-    
-    conn = sqlite3.connect(db_path)
-    
-    # 1. Operadoras
-    print("Populado tabela de operadoras...")
-    df_cadop = pd.read_csv(cadop_csv, sep=';', encoding='latin-1')
+# Adiciona a raiz do projeto ao path (módulos compartilhados em comum/)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from comum.consolidado import ler_consolidado
+from comum.dinheiro import coluna_centavos
+from comum.esquema import ler_cadop, memoria_mb
+from comum.metricas import Execucao
+from comum.normalizacao import corrigir_encoding, data_referencia
+from comum.rollups import criar_rollups
+
+# Esquema tipado (espelha desafio_03_banco_dados/sql/schema.sql, em SQLite).
+# O DECIMAL(18,2) vira centavos em INTEGER (somas exatas, comum/dinheiro.py);
+# a API devolve valor_centavos / 100.0 com o nome ValorDespesas do frontend.
+SCHEMA = """
+CREATE TABLE operadoras (
+    registro_ans TEXT,
+    cnpj TEXT PRIMARY KEY,
+    razao_social TEXT,
+    nome_fantasia TEXT,
+    modalidade TEXT,
+    uf TEXT
+);
+
+CREATE TABLE despesas (
+    id INTEGER PRIMARY KEY,
+    cnpj TEXT,
+    data_referencia TEXT, -- início do trimestre (AAAA-MM-DD)
+    ano INTEGER,
+    trimestre TEXT,
+    valor_centavos INTEGER
+);
+"""
+
+# Índices criados só depois da carga (mais barato que mantê-los a cada INSERT)
+INDEXES = """
+CREATE INDEX idx_modalidade ON operadoras(modalidade);
+CREATE INDEX idx_uf ON operadoras(uf);
+CREATE INDEX idx_cnpj_data ON despesas(cnpj, data_referencia);
+"""
+
+# Busca textual das operadoras (/api/operadoras?search=): índice FTS5 sobre
+# razão social e nome fantasia, sem acentos e sem diferenciar maiúsculas.
+# Guarda o próprio conteúdo (o VACUUM pode renumerar o rowid de operadoras) e
+# é preenchido dos nomes mais curtos para os mais longos: é a ordem usada
+# quando há resultados demais para ordenar por relevância.
+SEARCH_INDEX = """
+CREATE VIRTUAL TABLE operadoras_busca USING fts5(
+    cnpj UNINDEXED,
+    razao_social,
+    nome_fantasia,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '1 2 3'
+);
+INSERT INTO operadoras_busca (cnpj, razao_social, nome_fantasia)
+SELECT cnpj, razao_social, nome_fantasia FROM operadoras
+ORDER BY length(razao_social), cnpj;
+INSERT INTO operadoras_busca (operadoras_busca) VALUES ('optimize');
+"""
+
+# Resumos materializados para o /api/estatisticas (calculados uma vez, no build),
+# já em reais: somas exatas em centavos, divididas por 100 uma única vez.
+# Os mesmos SELECT viram visões no motor DuckDB da API (analitico.py).
+CONSULTAS_RESUMOS = {
+    "resumo_geral": """
+SELECT SUM(valor_centavos) / 100.0 AS total_geral, AVG(valor_centavos) / 100.0 AS media_geral, COUNT(*) AS n_despesas
+FROM despesas""",
+    "resumo_operadoras": """
+SELECT d.cnpj, o.razao_social, SUM(d.valor_centavos) / 100.0 AS total
+FROM despesas d
+JOIN operadoras o ON d.cnpj = o.cnpj
+GROUP BY d.cnpj, o.razao_social""",
+    "resumo_uf": """
+SELECT o.uf, SUM(d.valor_centavos) / 100.0 AS total
+FROM despesas d
+JOIN operadoras o ON d.cnpj = o.cnpj
+WHERE o.uf IS NOT NULL AND o.uf != 'N/A'
+GROUP BY o.uf""",
+    "resumo_trimestres": """
+SELECT data_referencia, ano, trimestre, SUM(valor_centavos) / 100.0 AS total, AVG(valor_centavos) / 100.0 AS media,
+       COUNT(*) AS n_despesas
+FROM despesas
+GROUP BY data_referencia, ano, trimestre""",
+}
+
+# build_info identifica cada build; a API descarta o cache quando o banco muda.
+RESUMOS = f"""
+CREATE TABLE build_info (chave TEXT PRIMARY KEY, valor TEXT);
+
+CREATE TABLE resumo_geral (total_geral REAL, media_geral REAL, n_despesas INTEGER);
+INSERT INTO resumo_geral {CONSULTAS_RESUMOS['resumo_geral']};
+
+CREATE TABLE resumo_operadoras (cnpj TEXT PRIMARY KEY, razao_social TEXT, total REAL);
+INSERT INTO resumo_operadoras {CONSULTAS_RESUMOS['resumo_operadoras']};
+CREATE INDEX idx_resumo_operadoras_total ON resumo_operadoras(total DESC);
+
+CREATE TABLE resumo_uf (uf TEXT PRIMARY KEY, total REAL);
+INSERT INTO resumo_uf {CONSULTAS_RESUMOS['resumo_uf']};
+
+CREATE TABLE resumo_trimestres (
+    data_referencia TEXT PRIMARY KEY,
+    ano INTEGER,
+    trimestre TEXT,
+    total REAL,
+    media REAL,
+    n_despesas INTEGER
+);
+INSERT INTO resumo_trimestres {CONSULTAS_RESUMOS['resumo_trimestres']};
+"""
+
+OPERADORAS_COLUMNS = ['registro_ans', 'cnpj', 'razao_social', 'nome_fantasia', 'modalidade', 'uf']
+DESPESAS_COLUMNS = ['cnpj', 'data_referencia', 'ano', 'trimestre', 'valor_centavos']
+
+BATCH_SIZE = 100_000
+# Limite de parâmetros por comando em SQLite anteriores à 3.32 (SQLITE_MAX_VARIABLE_NUMBER)
+MAX_VARIABLES = 999
+
+def prepare_operadoras(cadop_csv):
+    df_cadop = ler_cadop(cadop_csv)
     df_cadop = df_cadop.rename(columns={
         'REGISTRO_OPERADORA': 'registro_ans',
         'CNPJ': 'cnpj',
         'Razao_Social': 'razao_social',
+        'Nome_Fantasia': 'nome_fantasia',
         'Modalidade': 'modalidade',
         'UF': 'uf'
     })
-    
-    def fix_encoding(text):
-        if not isinstance(text, str): return text
-        try: return text.encode('latin-1').decode('utf-8')
-        except: return text
-
-    # Aplicar correção de acentos em todas as colunas de texto
-    text_cols = ['razao_social', 'modalidade', 'uf']
+    if 'nome_fantasia' not in df_cadop.columns:
+        df_cadop['nome_fantasia'] = None
+
+    # Aplicar correção de acentos em todas as colunas de texto (uma vez por valor distinto)
+    text_cols = ['razao_social', 'nome_fantasia', 'modalidade', 'uf']
     for col in text_cols:
-        df_cadop[col] = df_cadop[col].apply(fix_encoding)
+        df_cadop[col] = corrigir_encoding(df_cadop[col])
 
     df_cadop['cnpj'] = df_cadop['cnpj'].astype(str).str.replace(r'\D', '', regex=True).str.zfill(14)
-    df_cadop = df_cadop[['registro_ans', 'cnpj', 'razao_social', 'modalidade', 'uf']].drop_duplicates(subset=['cnpj'])
-    df_cadop.to_sql('operadoras', conn, if_exists='replace', index=False)
-    
-    # 2. Despesas
-    print("Populado tabela de despesas (isso pode demorar um pouco)...")
-    df_despesas = pd.read_csv(despesas_csv, encoding='utf-8-sig')
+    return df_cadop[OPERADORAS_COLUMNS].drop_duplicates(subset=['cnpj'])
+
+def prepare_despesas(despesas_csv):
+    df_despesas = ler_consolidado(despesas_csv)
     df_despesas['cnpj'] = df_despesas['CNPJ'].astype(str).str.replace(r'\D', '', regex=True).str.zfill(14)
-    
+
     # Padronizar data para facilitar queries
-    df_despesas['data_referencia'] = df_despesas['Ano'].astype(str) + "-" + \
-                                   df_despesas['Trimestre'].apply(lambda x: '01' if '1' in str(x) else ('04' if '2' in str(x) else '07' if '3' in str(x) else '10')) + "-01"
-    
-    df_despesas_clean = df_despesas[['cnpj', 'data_referencia', 'Ano', 'Trimestre', 'ValorDespesas']]
-    df_despesas_clean.to_sql('despesas', conn, if_exists='replace', index=False)
-    
-    # Criar índices
-    conn.execute("CREATE INDEX idx_cnpj ON despesas(cnpj)")
-    conn.execute("CREATE INDEX idx_cnpj_cad ON operadoras(cnpj)")
-    
-    print(f"Banco de dados criado em: {db_path}")
-    conn.close()
+    df_despesas['data_referencia'] = data_referencia(df_despesas['Ano'], df_despesas['Trimestre'])
+    # Reais -> centavos int64 (valor ausente continua NULL)
+    df_despesas['valor_centavos'] = coluna_centavos(df_despesas['ValorDespesas'])
+
+    df_despesas = df_despesas.rename(columns={'Ano': 'ano', 'Trimestre': 'trimestre'})
+    return df_despesas[DESPESAS_COLUMNS].astype({'ano': 'int64', 'trimestre': str})
+
+def insert_batches(conn, table, df, batch_size=BATCH_SIZE):
+    """
+    INSERT via executemany em lotes de `batch_size` linhas. Cada comando
+    insere várias linhas (VALUES (...), (...), ...), o que divide o custo
+    por comando, e os valores são convertidos coluna a coluna.
+    """
+    columns = list(df.columns)
+    width = len(columns)
+    rows_per_statement = max(1, MAX_VARIABLES // width)
+
+    def statement(n_rows):
+        row = f"({', '.join('?' * width)})"
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row] * n_rows)}"
+
+    full_statement = statement(rows_per_statement)
+    step = rows_per_statement * width
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        # NaN (texto ou número) é gravado como NULL pelo próprio SQLite, como no to_sql
+        values = [value for row in zip(*(batch[col].tolist() for col in columns)) for value in row]
+
+        n_full = len(batch) // rows_per_statement
+        conn.executemany(full_statement, (values[i * step:(i + 1) * step] for i in range(n_full)))
+        rest = values[n_full * step:]
+        if rest:
+            conn.execute(statement(len(rest) // width), rest)
+
+def write_summaries(conn, build_id):
+    conn.executescript(RESUMOS)
+    conn.executemany("INSERT INTO build_info (chave, valor) VALUES (?, ?)", [
+        ('build_id', build_id),
+        ('criado_em', datetime.now(timezone.utc).isoformat(timespec='seconds')),
+    ])
+
+def bulk_load(db_path, df_cadop, df_despesas, batch_size=BATCH_SIZE, run=None):
+    """
+    Cria o banco do zero em um arquivo temporário e o move para `db_path`
+    no final (a API nunca enxerga um banco pela metade):
+    esquema tipado -> carga em uma transação (WAL, synchronous=OFF, cache
+    maior) -> índices e busca FTS5 -> rollups trimestrais (comum/rollups.py)
+    -> resumos -> ANALYZE -> VACUUM.
+    Cada fase é uma etapa de `run` (comum/metricas.py), se informado.
+    Devolve o build_id gravado em build_info.
+    """
+    if run is None:
+        run = Execucao("bulk_load")
+    build_id = uuid.uuid4().hex
+    tmp_path = str(db_path) + ".tmp"
+    for path in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-262144")  # 256 MiB
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        conn.executescript(SCHEMA)
+        with run.etapa("insercao", linhas_entrada=len(df_cadop) + len(df_despesas)):
+            insert_batches(conn, 'operadoras', df_cadop, batch_size)
+            # Em ordem de (cnpj, data_referencia): a tabela fica agrupada por operadora
+            # e o idx_cnpj_data é montado sobre dados já ordenados
+            df_despesas = df_despesas.sort_values(['cnpj', 'data_referencia'], kind='stable')
+            insert_batches(conn, 'despesas', df_despesas, batch_size)
+            conn.commit()
+
+        with run.etapa("indices"):
+            conn.executescript(INDEXES)
+        with run.etapa("busca"):
+            conn.executescript(SEARCH_INDEX)
+        with run.etapa("rollups"):
+            criar_rollups(conn)
+        with run.etapa("resumos"):
+            write_summaries(conn, build_id)
+        with run.etapa("analyze"):
+            # Estatísticas para o planejador a partir de uma amostra de cada índice
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("ANALYZE")
+            conn.commit()
+
+        with run.etapa("vacuum"):
+            # Arquivo único (sem -wal) para distribuir o banco
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    return build_id
+
+def build_db(db_path=None, despesas_csv=None, cadop_csv=None, perfil=None):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if db_path is None:
+        db_path = os.path.join(base_dir, "backend", "ans.db")
+    if despesas_csv is None:
+        despesas_csv = os.path.join(base_dir, "..", "desafio_01_api_ans", "output", "consolidado_despesas.csv")
+    if cadop_csv is None:
+        cadop_csv = os.path.join(base_dir, "..", "desafio_02_transformacao_validacao", "data", "Relatorio_cadop.csv")
+
+    # Tempo, CPU, memória e linhas de cada etapa, ao lado do banco (comum/metricas.py)
+    metrics_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), "metricas_build_db.json")
+    with Execucao("build_db", metrics_path, {"db_path": db_path}, perfil) as run:
+        # 1. Operadoras
+        print("Preparando dados de operadoras...")
+        with run.etapa("operadoras") as stage:
+            df_cadop = prepare_operadoras(cadop_csv)
+            stage.linhas_saida = len(df_cadop)
+
+        # 2. Despesas
+        print("Preparando dados de despesas...")
+        with run.etapa("despesas") as stage:
+            df_despesas = prepare_despesas(despesas_csv)
+            stage.linhas_saida = len(df_despesas)
+            stage.dataframe_mb = memoria_mb(df_despesas)
+
+        print(f"Carregando {len(df_cadop)} operadoras e {len(df_despesas)} despesas...")
+        build_id = bulk_load(db_path, df_cadop, df_despesas, run=run)
+
+    print(f"Banco de dados criado em: {db_path} (build {build_id})")
 
 if __name__ == "__main__":
-    build_db()
+    parser = argparse.ArgumentParser(description="Gera o ans.db da API a partir do consolidado e do cadastro.")
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help="Grava cProfile e tracemalloc da etapa mais lenta ao lado de metricas_build_db.json."
+    )
+    args = parser.parse_args()
+
+    build_db(perfil=args.perfil or None)
@@ -0,0 +1,78 @@
+"""
+Cache HTTP da API: ETag forte derivado do build_id do ans.db e Cache-Control
+por rota.
+
+Os dados só mudam quando o build_db.py reconstrói o banco, então a mesma
+URL devolve a mesma resposta durante todo um build. Um `If-None-Match` com o
+ETag atual é respondido com 304 sem abrir conexão com o SQLite: o build_id
+fica em memória enquanto o arquivo do banco não muda.
+"""
+import re
+
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+# Por quanto tempo o navegador/proxy pode reaproveitar sem revalidar
+CACHE_CONTROL = [
+    (re.compile(r"^/api/estatisticas(/[^/]+)?$"), "public, max-age=300"),
+    (re.compile(r"^/api/operadoras/[^/]+(/despesas|/trimestres)?$"), "public, max-age=3600"),
+    (re.compile(r"^/api/ufs/[^/]+/trimestres$"), "public, max-age=3600"),
+    (re.compile(r"^/api/"), "public, max-age=60"),
+]
+
+
+def cache_control(path):
+    for padrao, politica in CACHE_CONTROL:
+        if padrao.match(path):
+            return politica
+    return None
+
+
+def etag_confere(if_none_match, etags):
+    """
+    Devolve o ETag de `etags` citado no If-None-Match (ou None). A comparação
+    é a fraca, como manda o If-None-Match: ignora o prefixo W/ e aceita *.
+    """
+    for valor in if_none_match.split(","):
+        valor = valor.strip().removeprefix("W/")
+        if valor == "*":
+            return etags[0]
+        if valor in etags:
+            return valor
+    return None
+
+
+class CacheHttpMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, pool):
+        super().__init__(app)
+        self.pool = pool
+
+    async def dispatch(self, request, call_next):
+        politica = cache_control(request.url.path)
+        if request.method not in ("GET", "HEAD") or politica is None:
+            return await call_next(request)
+
+        try:
+            build_id = await run_in_threadpool(self.pool.build_id)
+        except OSError:
+            # Sem ans.db: a própria rota responde com o erro
+            return await call_next(request)
+
+        # A resposta comprimida é outra representação e tem o próprio ETag
+        etag = f'"{build_id}"'
+        etag_gzip = f'"{build_id}-gzip"'
+        confere = etag_confere(request.headers.get("if-none-match", ""), (etag, etag_gzip))
+        if confere:
+            return Response(status_code=304, headers={
+                "ETag": confere,
+                "Cache-Control": politica,
+                "Vary": "Accept-Encoding",
+            })
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            comprimida = response.headers.get("content-encoding") == "gzip"
+            response.headers["ETag"] = etag_gzip if comprimida else etag
+            response.headers["Cache-Control"] = politica
+        return response
@@ -0,0 +1,110 @@
+"""
+Acesso ao ans.db pela API: pool limitado de conexões somente leitura.
+
+- As conexões são abertas com `mode=ro` e `PRAGMA query_only`, e os pragmas
+  de mmap/cache são configurados uma única vez, na abertura.
+- São reaproveitadas entre requisições e usadas pelas rotas síncronas, que o
+  FastAPI executa no threadpool: as queries não bloqueiam o event loop.
+- O build_db.py substitui o ans.db inteiro (os.replace). Quando o arquivo
+  muda, as conexões abertas no arquivo antigo são descartadas.
+
+O caminho do banco pode ser trocado pela variável de ambiente ANS_DB_PATH.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+DB_PATH_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ans.db")
+
+TAMANHO_POOL = 8
+TIMEOUT_POOL = 30  # segundos esperando uma conexão livre
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_KIB = 64 * 1024
+
+
+def caminho_banco():
+    return os.environ.get("ANS_DB_PATH", DB_PATH_PADRAO)
+
+
+class PoolConexoes:
+    """Pool de no máximo `tamanho` conexões somente leitura ao ans.db."""
+
+    def __init__(self, db_path=None, tamanho=TAMANHO_POOL, timeout=TIMEOUT_POOL):
+        self._db_path = db_path
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._build = (None, None)  # (versão do arquivo, build_id)
+
+    @property
+    def db_path(self):
+        # Resolvido a cada uso para respeitar ANS_DB_PATH definido depois do import
+        return self._db_path or caminho_banco()
+
+    def versao_arquivo(self, db_path):
+        """Identifica o arquivo atual do banco (muda quando o build_db o substitui)."""
+        st = os.stat(db_path)
+        return (db_path, st.st_dev, st.st_ino, st.st_mtime_ns)
+
+    def versao_atual(self):
+        return self.versao_arquivo(self.db_path)
+
+    def build_id(self):
+        """build_id gravado pelo build_db em build_info (lido uma vez por versão do arquivo)."""
+        versao = self.versao_atual()
+        if self._build[0] != versao:
+            with self.conexao() as conn:
+                build_id = conn.execute("SELECT valor FROM build_info WHERE chave = 'build_id'").fetchone()[0]
+            self._build = (versao, build_id)
+        return self._build[1]
+
+    def _abrir(self, db_path):
+        conn = sqlite3.connect(
+            Path(db_path).resolve().as_uri() + "?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _obter(self, versao):
+        # Reaproveita a conexão livre mais recente; as de um arquivo antigo são fechadas
+        while True:
+            try:
+                conn, versao_conn = self._livres.get_nowait()
+            except queue.Empty:
+                return self._abrir(versao[0])
+            if versao_conn == versao:
+                return conn
+            conn.close()
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool pelo tempo do bloco `with`."""
+        if not self._vagas.acquire(timeout=self.timeout):
+            raise TimeoutError("Nenhuma conexão livre no pool do banco")
+        try:
+            versao = self.versao_atual()
+            conn = self._obter(versao)
+            try:
+                yield conn
+            finally:
+                self._livres.put((conn, versao))
+        finally:
+            self._vagas.release()
+
+    def fechar(self):
+        while True:
+            try:
+                conn, _ = self._livres.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
@@ -0,0 +1,148 @@
+"""
+Exportação em massa da API (/api/exportar): despesas com o cadastro da
+operadora, em CSV, NDJSON ou Parquet.
+
+Cada escritor lê o cursor do SQLite em lotes (`fetchmany`) e devolve os
+bytes de cada lote assim que ficam prontos, para a StreamingResponse enviar.
+A memória usada depende do tamanho do lote, não do tamanho do resultado.
+
+O pyarrow é opcional: sem ele, só o Parquet fica indisponível.
+"""
+import csv
+import io
+
+from desafio_04_api_interface.backend.serializacao import dumps
+
+LINHAS_POR_LOTE = 10_000
+
+CONSULTA = """
+    SELECT d.cnpj, o.registro_ans, o.razao_social, o.modalidade, o.uf,
+           d.data_referencia, d.ano, d.trimestre, d.valor_centavos / 100.0 AS ValorDespesas
+    FROM despesas d
+    LEFT JOIN operadoras o ON o.cnpj = d.cnpj
+"""
+
+# Filtros aceitos pela rota -> coluna da consulta
+FILTROS = {"uf": "o.uf", "modalidade": "o.modalidade", "ano": "d.ano", "trimestre": "d.trimestre"}
+
+# formato -> (media type, extensão do arquivo)
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def montar_consulta(filtros):
+    """SELECT da exportação com os filtros informados (valores None são ignorados)."""
+    condicoes, params = [], []
+    for nome, valor in filtros.items():
+        if valor is not None:
+            condicoes.append(f"{FILTROS[nome]} = ?")
+            params.append(valor)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    # O build_db insere as despesas em ordem de (cnpj, data_referencia): ordenar
+    # pelo id devolve essa ordem percorrendo a tabela, sem ordenação extra
+    return f"{CONSULTA} {where} ORDER BY d.id", params
+
+
+def lotes(cursor, linhas_por_lote):
+    while True:
+        linhas = cursor.fetchmany(linhas_por_lote)
+        if not linhas:
+            return
+        yield linhas
+
+
+def csv_em_lotes(cursor, linhas_por_lote=LINHAS_POR_LOTE):
+    """CSV separado por vírgula, UTF-8 com BOM (como o consolidado_despesas.csv)."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow([coluna[0] for coluna in cursor.description])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    for linhas in lotes(cursor, linhas_por_lote):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(linhas)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_em_lotes(cursor, linhas_por_lote=LINHAS_POR_LOTE):
+    """Um objeto JSON por linha."""
+    colunas = [coluna[0] for coluna in cursor.description]
+    for linhas in lotes(cursor, linhas_por_lote):
+        yield b"".join(dumps(dict(zip(colunas, linha))) + b"\n" for linha in linhas)
+
+
+class _Saida:
+    """Destino do ParquetWriter que acumula os bytes até serem enviados."""
+
+    def __init__(self):
+        self.partes = []
+        self.posicao = 0
+        self.closed = False
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self.posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drenar(self):
+        dados = b"".join(self.partes)
+        self.partes = []
+        return dados
+
+
+def schema_parquet(pa):
+    return pa.schema([
+        ("cnpj", pa.string()),
+        ("registro_ans", pa.string()),
+        ("razao_social", pa.string()),
+        ("modalidade", pa.string()),
+        ("uf", pa.string()),
+        ("data_referencia", pa.string()),
+        ("ano", pa.int16()),
+        ("trimestre", pa.string()),
+        ("ValorDespesas", pa.float64()),
+    ])
+
+
+def parquet_em_lotes(cursor, linhas_por_lote=LINHAS_POR_LOTE):
+    """Um row group por lote; o rodapé do arquivo vai no último pedaço."""
+    pa = _pyarrow()
+    schema = schema_parquet(pa)
+    saida = _Saida()
+    escritor = pa.parquet.ParquetWriter(saida, schema)
+
+    for linhas in lotes(cursor, linhas_por_lote):
+        colunas = list(zip(*linhas))
+        escritor.write_table(pa.Table.from_arrays(
+            [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, schema)],
+            schema=schema,
+        ))
+        yield saida.drenar()
+
+    escritor.close()
+    yield saida.drenar()
+
+
+ESCRITORES = {"csv": csv_em_lotes, "ndjson": ndjson_em_lotes, "parquet": parquet_em_lotes}
@@ -1,12 +1,54 @@
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import sqlite3
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 import os
-from typing import List, Optional
-from pydantic import BaseModel
+import re
+import sys
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, Field
+
+# Adiciona a raiz do projeto ao path (módulos compartilhados em comum/)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from desafio_04_api_interface.backend import analitico
+from desafio_04_api_interface.backend.cache_http import CacheHttpMiddleware
+from desafio_04_api_interface.backend.db import PoolConexoes
+from desafio_04_api_interface.backend import exportacao
+from comum.rollups import ROLLUP_OPERADORA, ROLLUP_UF
+from desafio_04_api_interface.backend.paginacao import (
+    PROXIMA, ANTERIOR, CacheTotais, codificar_cursor, decodificar_cursor
+)
+from desafio_04_api_interface.backend.serializacao import (
+    RespostaJSON, array_json, dumps, linhas_como_tuplas, validar
+)
 
 app = FastAPI(title="ANS Data API")
 
+# As rotas devolvem o JSON já serializado (serializacao.py), sem passar pelos
+# modelos; com ANS_API_DEBUG=1 as respostas também são validadas contra eles
+DEBUG = os.environ.get("ANS_API_DEBUG") == "1"
+
+# Conexões somente leitura reaproveitadas entre requisições (ver db.py).
+# As rotas são síncronas: o FastAPI as executa no threadpool e as queries
+# não bloqueiam o event loop.
+pool = PoolConexoes()
+
+# Rotas agregadas no ans.db (padrão) ou, com ANS_MOTOR=duckdb, no DuckDB
+# direto sobre os arquivos de origem (ver analitico.py)
+motor_analitico = analitico.criar_motor()
+
+# Respostas JSON maiores que isso saem comprimidas (ex.: histórico de despesas)
+TAMANHO_MINIMO_GZIP = 1000
+
+# Middlewares, do mais interno para o mais externo: gzip, ETag/Cache-Control
+# (ver cache_http.py) e CORS, para que até o 304 leve os cabeçalhos de CORS
+app.add_middleware(GZipMiddleware, minimum_size=TAMANHO_MINIMO_GZIP)
+app.add_middleware(
+    CacheHttpMiddleware,
+    pool=pool if motor_analitico is None else analitico.VersaoComposta(pool, motor_analitico)
+)
+
 # Habilitar CORS para o Vue frontend
 app.add_middleware(
     CORSMiddleware,
@@ -15,126 +57,454 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "ans.db")
+# Acima disso a busca não calcula o bm25 de todos os resultados: a ordem é a
+# do índice (nomes mais curtos primeiro)
+LIMITE_RELEVANCIA = 1000
+
+# Total de cada busca, reaproveitado entre páginas (e zerado a cada rebuild)
+totais = CacheTotais()
+
+# Máximo de CNPJs por requisição em /api/operadoras/lote
+LIMITE_LOTE = 500
+
+# O banco guarda centavos (INTEGER); as respostas continuam em reais
+COLUNAS_DESPESA = "d.id, d.cnpj, d.data_referencia, d.ano, d.trimestre, d.valor_centavos / 100.0 AS ValorDespesas"
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return pool.conexao()
+
+def consultar(sql, params=()):
+    """Linhas da consulta como dicts, lidas em tuplas (sem sqlite3.Row)."""
+    with get_db_connection() as conn:
+        cursor = linhas_como_tuplas(conn, sql, params)
+        colunas = [coluna[0] for coluna in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor]
+
+def consultar_agregados(*consultas):
+    """
+    Consultas (sql, params) das rotas agregadas, todas na mesma versão dos
+    dados: uma conexão do ans.db ou o motor analítico. Uma lista de dicts
+    por consulta.
+    """
+    if motor_analitico is not None:
+        return motor_analitico.consultar(*consultas)
+    with get_db_connection() as conn:
+        resultados = []
+        for sql, params in consultas:
+            cursor = linhas_como_tuplas(conn, sql, params)
+            colunas = [coluna[0] for coluna in cursor.description]
+            resultados.append([dict(zip(colunas, linha)) for linha in cursor])
+        return resultados
+
+def versao_agregados():
+    return pool.versao_atual() if motor_analitico is None else motor_analitico.versao_atual()
 
 # Models
 class Operadora(BaseModel):
     registro_ans: Optional[str]
     cnpj: str
     razao_social: str
+    nome_fantasia: Optional[str]
     modalidade: Optional[str]
     uf: Optional[str]
 
 class Despesa(BaseModel):
+    id: int
     cnpj: str
     data_referencia: str
     ano: int
     trimestre: str
-    valor: float
+    ValorDespesas: float
+
+class DespesaTrimestre(BaseModel):
+    data_referencia: str
+    ano: int
+    trimestre: str
+    total: float
+    n_despesas: int
+
+class TrimestreUF(BaseModel):
+    data_referencia: str
+    ano: int
+    trimestre: str
+    total: float
+    n_despesas: int
+    n_operadoras: int
+
+class CrescimentoOperadora(BaseModel):
+    cnpj: str
+    razao_social: Optional[str]
+    total_inicial: float
+    total_final: float
+    crescimento_percentual: float
+
+class DistribuicaoUF(BaseModel):
+    uf: Optional[str]
+    total: float
+    n_operadoras: int
+    media_por_operadora: float
+
+class OperadoraAcimaMedia(BaseModel):
+    cnpj: str
+    razao_social: Optional[str]
+    trimestres_acima_media: int
+
+class LoteRequest(BaseModel):
+    cnpjs: List[str] = Field(min_length=1, max_length=LIMITE_LOTE)
+    por_trimestre: bool = False
+
+class OperadoraLote(BaseModel):
+    operadora: Optional[Operadora]
+    despesas: List[Union[Despesa, DespesaTrimestre]]
+
+class LoteResponse(BaseModel):
+    operadoras: Dict[str, OperadoraLote]
+    nao_encontradas: List[str]
 
 class PaginatedResponse(BaseModel):
-    data: List[dict]
+    data: List[Operadora]
     total: int
     page: int
     limit: int
+    next: Optional[str] = None
+    prev: Optional[str] = None
+
+def prefixo_cnpj(search):
+    """Busca só com dígitos (e a pontuação do CNPJ) é tratada como prefixo de CNPJ."""
+    digitos = re.sub(r"[\s./-]", "", search)
+    return digitos if re.fullmatch(r"[0-9]+", digitos) else None
+
+def expressao_busca(search):
+    """
+    Consulta FTS5: todas as palavras precisam aparecer; a última é um prefixo
+    ("unimed camp" -> "unimed" "camp"*), pois é a que ainda está sendo digitada.
+    """
+    termos = [f'"{termo}"' for termo in re.findall(r"\w+", search)]
+    if not termos:
+        return None
+    termos[-1] += "*"
+    return " ".join(termos)
+
+def consulta_busca(cnpj, termos, relevancia=False):
+    """
+    SELECT do cnpj e das chaves de ordenação (k1, k2) das operadoras da busca,
+    com os parâmetros e as chaves (nome -> tipo do valor, conferido no cursor).
+    A ordem é sempre indexada (chave primária ou rowid do FTS5), exceto o bm25,
+    usado só com poucos resultados.
+    """
+    if cnpj and termos:
+        # Só dígitos: prefixo de CNPJ (faixa na chave primária) ou números no nome
+        # ("OPERADORA 00012"), os dois em ordem de CNPJ
+        return (
+            "SELECT cnpj, cnpj AS k1 FROM operadoras WHERE cnpj >= ? AND cnpj < ? "
+            "UNION SELECT cnpj, cnpj AS k1 FROM operadoras_busca WHERE operadoras_busca MATCH ?",
+            [cnpj, cnpj + ":", termos], {"k1": str}
+        )
+    if cnpj:
+        # Prefixo de CNPJ: faixa na chave primária
+        return "SELECT cnpj, cnpj AS k1 FROM operadoras WHERE cnpj >= ? AND cnpj < ?", [cnpj, cnpj + ":"], {"k1": str}
+    if termos and relevancia:
+        # Nome: índice FTS5, do mais para o menos relevante
+        return (
+            "SELECT cnpj, bm25(operadoras_busca) AS k1, rowid AS k2 FROM operadoras_busca WHERE operadoras_busca MATCH ?",
+            [termos], {"k1": float, "k2": int}
+        )
+    if termos:
+        return "SELECT cnpj, rowid AS k1 FROM operadoras_busca WHERE operadoras_busca MATCH ?", [termos], {"k1": int}
+    return "SELECT cnpj, cnpj AS k1 FROM operadoras", [], {"k1": str}
 
 # Routes
 
 @app.get("/api/operadoras", response_model=PaginatedResponse)
-async def get_operadoras(
+def get_operadoras(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
-    conn = get_db_connection()
-    offset = (page - 1) * limit
-    
-    query = "SELECT * FROM operadoras"
-    params = []
+    """
+    Duas formas de paginar: `page` (OFFSET) ou `cursor`, com os tokens
+    `next`/`prev` da resposta. O cursor continua do ponto em que a página
+    anterior parou, com o mesmo custo em qualquer profundidade.
+    """
+    cnpj = prefixo_cnpj(search) if search else None
+    termos = expressao_busca(search) if search else None
+    if search and termos is None:
+        # Só pontuação ou espaços: nada a buscar (e não a lista inteira)
+        resposta = {"data": [], "total": 0, "page": page, "limit": limit, "next": None, "prev": None}
+        return RespostaJSON(validar(PaginatedResponse, resposta) if DEBUG else resposta)
+    versao = pool.versao_atual()
     
-    if search:
-        query += " WHERE razao_social LIKE ? OR cnpj LIKE ?"
-        params.extend([f"%{search}%", f"%{search}%"])
+    with get_db_connection() as conn:
+        def contar():
+            consulta, params, _ = consulta_busca(cnpj, termos)
+            return conn.execute(f"SELECT COUNT(*) FROM ({consulta})", params).fetchone()[0]
+        
+        total = totais.obter(versao, (cnpj, termos), contar)
+        consulta, params, chaves = consulta_busca(cnpj, termos, relevancia=total <= LIMITE_RELEVANCIA)
+        
+        if cursor:
+            direcao, valores = decodificar_cursor(cursor, search, list(chaves.values()))
+            comparacao = ">" if direcao == PROXIMA else "<"
+            filtro = f"WHERE ({', '.join(chaves)}) {comparacao} ({', '.join('?' * len(chaves))})"
+            params = params + valores
+            offset = 0
+        else:
+            direcao, filtro, offset = PROXIMA, "", (page - 1) * limit
+        
+        # Para a página anterior, percorre a ordem ao contrário e desinverte no final
+        sentido = "" if direcao == PROXIMA else " DESC"
+        rows = conn.execute(f"""
+            SELECT o.*, {', '.join('b.' + c for c in chaves)} FROM (
+                SELECT * FROM ({consulta}) {filtro}
+                ORDER BY {', '.join(c + sentido for c in chaves)}
+                LIMIT ? OFFSET ?
+            ) b
+            JOIN operadoras o ON o.cnpj = b.cnpj
+            ORDER BY {', '.join('b.' + c + sentido for c in chaves)}
+        """, params + [limit + 1, offset]).fetchall()
     
-    # Total count for pagination
-    count_query = f"SELECT COUNT(*) FROM ({query})"
-    total = conn.execute(count_query, params).fetchone()[0]
+    # Uma linha a mais indica que existe outra página nessa direção
+    mais = len(rows) > limit
+    rows = rows[:limit]
+    if direcao == ANTERIOR:
+        rows.reverse()
     
-    # Paginated data
-    query += " LIMIT ? OFFSET ?"
-    params.extend([limit, offset])
+    def token(direcao_token, row):
+        return codificar_cursor(search, direcao_token, [row[c] for c in chaves])
     
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
+    proxima = anterior = None
+    if rows:
+        if direcao == PROXIMA:
+            proxima = token(PROXIMA, rows[-1]) if mais else None
+            anterior = token(ANTERIOR, rows[0]) if cursor or offset else None
+        else:
+            proxima = token(PROXIMA, rows[-1])
+            anterior = token(ANTERIOR, rows[0]) if mais else None
     
-    return {
-        "data": [dict(row) for row in rows],
+    colunas = rows[0].keys()[:-len(chaves)] if rows else []
+    resposta = {
+        "data": [{col: row[col] for col in colunas} for row in rows],
         "total": total,
         "page": page,
-        "limit": limit
+        "limit": limit,
+        "next": proxima,
+        "prev": anterior
     }
+    return RespostaJSON(validar(PaginatedResponse, resposta) if DEBUG else resposta)
 
-@app.get("/api/operadoras/{cnpj}")
-async def get_operadora_detail(cnpj: str):
-    conn = get_db_connection()
-    row = conn.execute("SELECT * FROM operadoras WHERE cnpj = ?", (cnpj,)).fetchone()
-    conn.close()
+@app.get("/api/operadoras/{cnpj}", response_model=Operadora)
+def get_operadora_detail(cnpj: str):
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT * FROM operadoras WHERE cnpj = ?", (cnpj,)).fetchone()
     
     if not row:
         raise HTTPException(status_code=404, detail="Operadora não encontrada")
     
-    return dict(row)
+    operadora = dict(row)
+    return RespostaJSON(validar(Operadora, operadora) if DEBUG else operadora)
 
-@app.get("/api/operadoras/{cnpj}/despesas")
-async def get_operadora_despesas(cnpj: str):
-    conn = get_db_connection()
-    rows = conn.execute("SELECT * FROM despesas WHERE cnpj = ? ORDER BY data_referencia DESC", (cnpj,)).fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+def despesas_em_lotes(cnpj):
+    # A conexão fica emprestada enquanto a resposta é enviada e volta ao pool
+    # no fim (ou se o cliente desconectar no meio)
+    with get_db_connection() as conn:
+        cursor = linhas_como_tuplas(
+            conn, f"SELECT {COLUNAS_DESPESA} FROM despesas d WHERE d.cnpj = ? ORDER BY d.data_referencia DESC", (cnpj,)
+        )
+        yield from array_json(cursor, List[Despesa] if DEBUG else None)
 
-@app.get("/api/estatisticas")
-async def get_estatisticas():
-    conn = get_db_connection()
-    
-    # Estatísticas simples (cached em memória na vida real, aqui calculamos para o demo)
-    total_despesas = conn.execute("SELECT SUM(ValorDespesas) FROM despesas").fetchone()[0]
-    media_despesa = conn.execute("SELECT AVG(ValorDespesas) FROM despesas").fetchone()[0]
-    
-    # Top 5 operadoras com mais despesas
-    top_5_query = """
-        SELECT o.razao_social, SUM(d.ValorDespesas) as total
-        FROM despesas d
-        JOIN operadoras o ON d.cnpj = o.cnpj
-        GROUP BY d.cnpj
-        ORDER BY total DESC
-        LIMIT 5
+@app.get("/api/operadoras/{cnpj}/despesas", response_model=List[Despesa])
+def get_operadora_despesas(cnpj: str):
+    # Histórico pode ter milhares de linhas: vai do cursor para o JSON em lotes
+    return StreamingResponse(despesas_em_lotes(cnpj), media_type="application/json")
+
+@app.get("/api/operadoras/{cnpj}/trimestres", response_model=List[DespesaTrimestre])
+def get_operadora_trimestres(cnpj: str):
+    """Série trimestral da operadora, lida do rollup do build_db (comum/rollups.py)."""
+    trimestres = consultar(f"""
+        SELECT data_referencia, ano, trimestre, total_centavos / 100.0 AS total, n_despesas
+        FROM {ROLLUP_OPERADORA}
+        WHERE cnpj = ?
+        ORDER BY data_referencia
+    """, (cnpj,))
+    return RespostaJSON(validar(List[DespesaTrimestre], trimestres) if DEBUG else trimestres)
+
+@app.get("/api/ufs/{uf}/trimestres", response_model=List[TrimestreUF])
+def get_uf_trimestres(uf: str):
+    """Série trimestral da UF (UF do cadastro da operadora)."""
+    trimestres = consultar(f"""
+        SELECT data_referencia, ano, trimestre, total_centavos / 100.0 AS total, n_despesas, n_operadoras
+        FROM {ROLLUP_UF}
+        WHERE uf = ?
+        ORDER BY data_referencia
+    """, (uf.upper(),))
+    return RespostaJSON(validar(List[TrimestreUF], trimestres) if DEBUG else trimestres)
+
+@app.post("/api/operadoras/lote", response_model=LoteResponse)
+def get_operadoras_lote(pedido: LoteRequest):
     """
-    top_5 = conn.execute(top_5_query).fetchall()
-    
-    # Distribuição por UF para o gráfico
-    uf_query = """
-        SELECT o.uf, SUM(d.ValorDespesas) as total
-        FROM despesas d
-        JOIN operadoras o ON d.cnpj = o.cnpj
-        WHERE o.uf IS NOT NULL AND o.uf != 'N/A'
-        GROUP BY o.uf
-        ORDER BY total DESC
+    Detalhe e despesas de vários CNPJs em uma requisição: a lista vai como um
+    array JSON (json_each) e cada tabela é lida com um único join pelos
+    índices. Com `por_trimestre`, as despesas vêm somadas por trimestre
+    (do rollup por operadora, sem reagrupar as despesas).
     """
-    uf_dist = conn.execute(uf_query).fetchall()
+    cnpjs = list(dict.fromkeys(pedido.cnpjs))
+    lista = dumps(cnpjs).decode()
+    if pedido.por_trimestre:
+        consulta_despesas = f"""
+            SELECT r.cnpj AS lote, r.data_referencia, r.ano, r.trimestre, r.total_centavos / 100.0 AS total,
+                   r.n_despesas
+            FROM json_each(?) c
+            JOIN {ROLLUP_OPERADORA} r ON r.cnpj = c.value
+            ORDER BY r.cnpj, r.data_referencia DESC
+        """
+    else:
+        consulta_despesas = f"""
+            SELECT d.cnpj AS lote, {COLUNAS_DESPESA} FROM json_each(?) c
+            JOIN despesas d ON d.cnpj = c.value
+            ORDER BY d.cnpj, d.data_referencia DESC
+        """
     
-    conn.close()
+    resultado = {cnpj: {"operadora": None, "despesas": []} for cnpj in cnpjs}
+    with get_db_connection() as conn:
+        operadoras = linhas_como_tuplas(
+            conn, "SELECT o.* FROM json_each(?) c JOIN operadoras o ON o.cnpj = c.value", (lista,)
+        )
+        colunas = [coluna[0] for coluna in operadoras.description]
+        for linha in operadoras:
+            operadora = dict(zip(colunas, linha))
+            resultado[operadora["cnpj"]]["operadora"] = operadora
+        
+        # A primeira coluna (lote) só indica a qual CNPJ a linha pertence
+        despesas = linhas_como_tuplas(conn, consulta_despesas, (lista,))
+        colunas = [coluna[0] for coluna in despesas.description][1:]
+        for linha in despesas:
+            resultado[linha[0]]["despesas"].append(dict(zip(colunas, linha[1:])))
     
-    return {
-        "total_geral": total_despesas,
-        "media_geral": media_despesa,
-        "top_5": [dict(row) for row in top_5],
-        "distribuicao_uf": [dict(row) for row in uf_dist]
+    resposta = {
+        "operadoras": resultado,
+        "nao_encontradas": [cnpj for cnpj, item in resultado.items() if item["operadora"] is None]
     }
+    return RespostaJSON(validar(LoteResponse, resposta) if DEBUG else resposta)
+
+# Resposta do /api/estatisticas por versão do arquivo do banco (ou dos
+# arquivos lidos pelo motor analítico): só é recalculada depois de um rebuild
+_estatisticas = {}
+
+@app.get("/api/estatisticas")
+def get_estatisticas():
+    versao = versao_agregados()
+    resposta = _estatisticas.get(versao)
+    if resposta is not None:
+        return RespostaJSON(resposta)
+
+    build_info, geral, top_5, uf_dist, por_trimestre = consultar_agregados(
+        ("SELECT valor FROM build_info WHERE chave = 'build_id'", ()),
+        ("SELECT total_geral, media_geral FROM resumo_geral", ()),
+        # Top 5 operadoras com mais despesas
+        ("SELECT razao_social, total FROM resumo_operadoras ORDER BY total DESC, cnpj LIMIT 5", ()),
+        # Distribuição por UF para o gráfico
+        ("SELECT uf, total FROM resumo_uf ORDER BY total DESC", ()),
+        ("SELECT ano, trimestre, total, media, n_despesas FROM resumo_trimestres ORDER BY data_referencia", ()),
+    )
+
+    resposta = {
+        "total_geral": geral[0]["total_geral"],
+        "media_geral": geral[0]["media_geral"],
+        "top_5": top_5,
+        "distribuicao_uf": uf_dist,
+        "por_trimestre": por_trimestre,
+        "build_id": build_info[0]["valor"]
+    }
+    # Guardada já serializada: as próximas requisições só copiam os bytes
+    _estatisticas.clear()
+    _estatisticas[versao] = dumps(resposta)
+    return RespostaJSON(_estatisticas[versao])
+
+# Análises do desafio 3 (sqlite_test.py) sobre os rollups trimestrais (no ans.db
+# ou no motor analítico, como o /api/estatisticas)
+
+@app.get("/api/estatisticas/crescimento", response_model=List[CrescimentoOperadora])
+def get_crescimento(limit: int = Query(5, ge=1, le=100)):
+    """Maior crescimento percentual entre o primeiro e o último trimestre da base."""
+    ranking = consultar_agregados((f"""
+        SELECT p.cnpj, o.razao_social, p.total_centavos / 100.0 AS total_inicial,
+               u.total_centavos / 100.0 AS total_final,
+               (u.total_centavos - p.total_centavos) * 100.0 / p.total_centavos AS crescimento_percentual
+        FROM {ROLLUP_OPERADORA} p
+        JOIN {ROLLUP_OPERADORA} u ON u.cnpj = p.cnpj
+            AND u.data_referencia = (SELECT MAX(data_referencia) FROM {ROLLUP_OPERADORA})
+        LEFT JOIN operadoras o ON o.cnpj = p.cnpj
+        WHERE p.data_referencia = (SELECT MIN(data_referencia) FROM {ROLLUP_OPERADORA})
+            AND p.total_centavos > 0
+        ORDER BY crescimento_percentual DESC, p.cnpj
+        LIMIT ?
+    """, (limit,)))[0]
+    return RespostaJSON(validar(List[CrescimentoOperadora], ranking) if DEBUG else ranking)
+
+@app.get("/api/estatisticas/ufs", response_model=List[DistribuicaoUF])
+def get_distribuicao_ufs():
+    """Total por UF e média por operadora (operadoras da UF com despesas)."""
+    ufs = consultar_agregados((f"""
+        SELECT o.uf, SUM(r.total_centavos) / 100.0 AS total, COUNT(DISTINCT r.cnpj) AS n_operadoras,
+               SUM(r.total_centavos) / 100.0 / COUNT(DISTINCT r.cnpj) AS media_por_operadora
+        FROM {ROLLUP_OPERADORA} r
+        JOIN operadoras o ON o.cnpj = r.cnpj
+        GROUP BY o.uf
+        ORDER BY total DESC
+    """, ()))[0]
+    return RespostaJSON(validar(List[DistribuicaoUF], ufs) if DEBUG else ufs)
+
+@app.get("/api/estatisticas/acima_media", response_model=List[OperadoraAcimaMedia])
+def get_acima_media(
+    min_trimestres: int = Query(2, ge=1),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Operadoras com total acima da média das operadoras em `min_trimestres` trimestres ou mais."""
+    operadoras = consultar_agregados((f"""
+        WITH media_trimestre AS (
+            SELECT data_referencia, AVG(total_centavos) AS media
+            FROM {ROLLUP_OPERADORA}
+            GROUP BY data_referencia
+        )
+        SELECT r.cnpj, o.razao_social, COUNT(*) AS trimestres_acima_media
+        FROM {ROLLUP_OPERADORA} r
+        JOIN media_trimestre m ON m.data_referencia = r.data_referencia
+        LEFT JOIN operadoras o ON o.cnpj = r.cnpj
+        WHERE r.total_centavos > m.media
+        GROUP BY r.cnpj, o.razao_social
+        HAVING trimestres_acima_media >= ?
+        ORDER BY trimestres_acima_media DESC, r.cnpj
+        LIMIT ?
+    """, (min_trimestres, limit)))[0]
+    return RespostaJSON(validar(List[OperadoraAcimaMedia], operadoras) if DEBUG else operadoras)
+
+def exportacao_em_lotes(formato, sql, params):
+    # Como em despesas_em_lotes: a conexão fica emprestada até o fim do envio
+    with get_db_connection() as conn:
+        yield from exportacao.ESCRITORES[formato](linhas_como_tuplas(conn, sql, params))
+
+@app.get("/api/exportar")
+def exportar_despesas(
+    formato: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    uf: Optional[str] = None,
+    modalidade: Optional[str] = None,
+    ano: Optional[int] = None,
+    trimestre: Optional[str] = None
+):
+    """Despesas com o cadastro da operadora, filtradas e enviadas em lotes (ver exportacao.py)."""
+    if formato == "parquet" and exportacao._pyarrow() is None:
+        raise HTTPException(status_code=501, detail="Exportação em Parquet requer o pyarrow")
+
+    sql, params = exportacao.montar_consulta(
+        {"uf": uf, "modalidade": modalidade, "ano": ano, "trimestre": trimestre}
+    )
+    media_type, extensao = exportacao.FORMATOS[formato]
+    return StreamingResponse(
+        exportacao_em_lotes(formato, sql, params),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="despesas.{extensao}"'}
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,86 @@
+"""
+Paginação por cursor (keyset) e cache de totais do /api/operadoras.
+
+- O cursor é opaco para o cliente: JSON em base64url com a busca, a direção
+  e as chaves de ordenação da linha de fronteira. A próxima página continua
+  com `(chaves) > (cursor)` sobre uma ordem indexada, sem OFFSET.
+- Os totais por busca ficam em um LRU. Todos são descartados quando o arquivo
+  do banco muda (rebuild).
+"""
+import base64
+import binascii
+import json
+import math
+import threading
+from collections import OrderedDict
+
+from fastapi import HTTPException
+
+PROXIMA = "n"
+ANTERIOR = "p"
+
+TAMANHO_CACHE_TOTAIS = 256
+
+
+def codificar_cursor(search, direcao, chaves):
+    dados = json.dumps({"q": search or "", "d": direcao, "k": list(chaves)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+
+def _chave_valida(valor, tipo):
+    """Escalar do tipo da coluna de ordenação (int serve para uma coluna REAL)."""
+    if isinstance(valor, bool):
+        return False
+    if tipo is float:
+        return isinstance(valor, (int, float)) and math.isfinite(valor)
+    return isinstance(valor, tipo)
+
+
+def decodificar_cursor(cursor, search, tipos):
+    """
+    Devolve (direção, chaves); cursor malformado, de outra busca ou com chaves
+    que não são escalares do tipo de cada coluna de ordenação (`tipos`) -> 400.
+    """
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        direcao, chaves = dados["d"], dados["k"]
+        valido = (
+            dados["q"] == (search or "")
+            and direcao in (PROXIMA, ANTERIOR)
+            and isinstance(chaves, list)
+            and len(chaves) == len(tipos)
+            and all(_chave_valida(valor, tipo) for valor, tipo in zip(chaves, tipos))
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        valido = False
+    if not valido:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return direcao, chaves
+
+
+class CacheTotais:
+    """LRU de totais por busca, válido para uma versão do arquivo do banco."""
+
+    def __init__(self, tamanho=TAMANHO_CACHE_TOTAIS):
+        self.tamanho = tamanho
+        self._versao = None
+        self._totais = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, versao, chave, calcular):
+        with self._trava:
+            if versao != self._versao:
+                self._versao = versao
+                self._totais.clear()
+            elif chave in self._totais:
+                self._totais.move_to_end(chave)
+                return self._totais[chave]
+
+        # Calculado fora da trava: duas requisições iguais podem contar em paralelo
+        total = calcular()
+        with self._trava:
+            if versao == self._versao:
+                self._totais[chave] = total
+                if len(self._totais) > self.tamanho:
+                    self._totais.popitem(last=False)
+        return total
@@ -0,0 +1,74 @@
+"""
+Serialização JSON das respostas da API sem `dict(row)` + `jsonable_encoder`:
+as linhas saem do cursor (tuplas) direto para o encoder.
+
+- `RespostaJSON`: resposta já serializada (aceita bytes prontos, ex.: cache).
+- `array_json`: escreve um array JSON em lotes a partir de um cursor, para
+  respostas grandes irem sendo enviadas sem montar a lista inteira.
+
+O orjson é opcional: sem ele, usa o json da biblioteca padrão com as mesmas
+opções do JSONResponse do FastAPI.
+"""
+import json
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+LINHAS_POR_LOTE = 1000
+
+
+def _orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+_ORJSON = _orjson()
+
+
+def dumps(conteudo):
+    if _ORJSON is not None:
+        return _ORJSON.dumps(conteudo)
+    return json.dumps(conteudo, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class RespostaJSON(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def validar(modelo, dados):
+    """Valida `dados` contra o modelo Pydantic (usado só no modo debug)."""
+    TypeAdapter(modelo).validate_python(dados)
+    return dados
+
+
+def linhas_como_tuplas(conn, sql, params=()):
+    """Executa a consulta em um cursor sem row_factory (tuplas, sem sqlite3.Row)."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor.execute(sql, params)
+
+
+def array_json(cursor, modelo=None, linhas_por_lote=LINHAS_POR_LOTE):
+    """
+    Gera um array JSON de objetos, em pedaços de `linhas_por_lote` linhas do
+    cursor. Com `modelo`, cada lote é validado antes de ser escrito.
+    """
+    colunas = [coluna[0] for coluna in cursor.description]
+    yield b"["
+    separador = b""
+    while True:
+        linhas = cursor.fetchmany(linhas_por_lote)
+        if not linhas:
+            break
+        lote = [dict(zip(colunas, linha)) for linha in linhas]
+        if modelo is not None:
+            validar(modelo, lote)
+        yield separador + dumps(lote)[1:-1]
+        separador = b","
+    yield b"]"
@@ -11,7 +11,8 @@ export const useAnsStore = defineStore('ans', {
         limit: 10,
         loading: false,
         error: null,
-        estatisticas: null
+        estatisticas: null,
+        detalhes: {}
     }),
     actions: {
         async fetchOperadoras(page = 1, search = '') {
@@ -31,6 +32,18 @@ export const useAnsStore = defineStore('ans', {
                 this.loading = false
             }
         },
+        async fetchOperadorasLote(cnpjs, porTrimestre = false) {
+            // Detalhe + despesas de vários CNPJs em uma única requisição
+            // (comparações e exportações; um CNPJ só usa os GETs, com cache HTTP)
+            const response = await axios.post(`${API_BASE}/operadoras/lote`, {
+                cnpjs,
+                por_trimestre: porTrimestre
+            })
+            if (!porTrimestre) {
+                Object.assign(this.detalhes, response.data.operadoras)
+            }
+            return response.data.operadoras
+        },
         async fetchEstatisticas() {
             try {
                 const response = await axios.get(`${API_BASE}/estatisticas`)
@@ -0,0 +1,31 @@
+import pytest
+import sys
+import os
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+
+@pytest.fixture(scope="session")
+def banco_api(tmp_path_factory):
+    """
+    ans.db sintético para os testes da API (apontado por ANS_DB_PATH).
+    Com ANS_DB_PATH já definido, os testes rodam contra esse banco.
+    """
+    if os.environ.get("ANS_DB_PATH"):
+        yield os.environ["ANS_DB_PATH"]
+        return
+
+    from desafio_04_api_interface.backend.build_db import build_db
+
+    base = tmp_path_factory.mktemp("banco_api")
+    gerar_cadastro(base / "Relatorio_cadop.csv", n_operadoras=50)
+    gerar_consolidado(base / "consolidado_despesas.csv", 5_000, n_operadoras=50)
+    db_path = str(base / "ans.db")
+    build_db(db_path, str(base / "consolidado_despesas.csv"), str(base / "Relatorio_cadop.csv"))
+
+    os.environ["ANS_DB_PATH"] = db_path
+    yield db_path
+    del os.environ["ANS_DB_PATH"]
@@ -0,0 +1,167 @@
+import pytest
+import sys
+import os
+from decimal import Decimal
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from desafio_02_transformacao_validacao.src.main import (
+    AGGREGATION_KEYS, aggregate_expenses, quarter_partial, merge_partials, sort_aggregate
+)
+from benchmarks.sintetico import gerar_cnpj
+from comum.dinheiro import centavos
+
+
+def agregacao_por_groupby(df_clean, df_cadop):
+    """Referência: merge linha a linha + dois groupby pelas colunas de texto (implementação original, em centavos)"""
+    df_enriched = pd.merge(df_clean.assign(Centavos=centavos(df_clean['ValorDespesas'])), df_cadop, on='CNPJ', how='left')
+    df_enriched = df_enriched.rename(columns={'REGISTRO_OPERADORA': 'RegistroANS'})
+    df_enriched['UF'] = df_enriched['UF'].fillna('N/A')
+    df_enriched['Modalidade'] = df_enriched['Modalidade'].fillna('N/A')
+    df_enriched['RegistroANS'] = df_enriched['RegistroANS'].fillna('N/A')
+
+    df_quarterly = df_enriched.groupby(AGGREGATION_KEYS + ['Ano', 'Trimestre']).agg(
+        Soma_Trimestre=('Centavos', 'sum')
+    ).reset_index()
+    agregado = df_quarterly.groupby(AGGREGATION_KEYS).agg(
+        Total_Despesas=('Soma_Trimestre', 'sum'),
+        Media_Trimestral=('Soma_Trimestre', 'mean'),
+        Desvio_Padrao_Despesas=('Soma_Trimestre', 'std')
+    ).reset_index()
+    for coluna in ['Total_Despesas', 'Media_Trimestral', 'Desvio_Padrao_Despesas']:
+        agregado[coluna] = agregado[coluna] / 100
+    return agregado
+
+
+@pytest.fixture
+def despesas():
+    """
+    Despesas já validadas com os casos que importam para o agrupamento:
+    trimestres faltando, operadora com um só trimestre, CNPJ com duas razões
+    sociais, CNPJ fora do cadastro e UF vazia no cadastro.
+    """
+    rng = np.random.default_rng(7)
+    cnpjs = [gerar_cnpj(10_000_000_0001 + i * 7919) for i in range(60)]
+    periodos = [(2024, '4T'), (2025, '1T'), (2025, '2T'), (2025, '3T')]
+
+    n = 20_000
+    escolha = rng.integers(0, len(cnpjs), n)
+    periodo = rng.integers(0, len(periodos), n)
+    # Operadoras 0-9 só aparecem no 1T/2025; 10-19 pulam o 2T
+    periodo[escolha < 10] = 1
+    periodo[(escolha >= 10) & (escolha < 20) & (periodo == 2)] = 3
+
+    df_clean = pd.DataFrame({
+        'CNPJ': np.array(cnpjs, dtype=object)[escolha],
+        'RazaoSocial': [f"OPERADORA {i:03d}" for i in escolha],
+        'Ano': [periodos[p][0] for p in periodo],
+        'Trimestre': [periodos[p][1] for p in periodo],
+        'ValorDespesas': rng.normal(1e6, 5e5, n).round(2).clip(0),
+    })
+    df_clean.loc[df_clean.index[:50], 'RazaoSocial'] = 'NOME ANTIGO'
+
+    df_cadop = pd.DataFrame({
+        'CNPJ': cnpjs[:55],
+        'REGISTRO_OPERADORA': [str(300000 + i) for i in range(55)],
+        'Modalidade': ['Medicina de Grupo'] * 55,
+        'UF': ['SP'] * 54 + [np.nan],
+    })
+    return df_clean, df_cadop
+
+
+def ordenar(agregado):
+    return agregado.sort_values(AGGREGATION_KEYS).reset_index(drop=True)
+
+
+def test_motor_igual_ao_groupby(despesas):
+    """O agrupamento por códigos inteiros deve reproduzir o resultado dos dois groupby"""
+    df_clean, df_cadop = despesas
+
+    esperado = ordenar(agregacao_por_groupby(df_clean, df_cadop))
+    obtido = ordenar(aggregate_expenses(df_clean, df_cadop))
+
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False, check_exact=True)
+    # Operadoras com um só trimestre ficam com desvio indefinido
+    um_trimestre = obtido['RazaoSocial'].isin([f"OPERADORA {i:03d}" for i in range(10)])
+    assert obtido.loc[um_trimestre, 'Desvio_Padrao_Despesas'].isna().all()
+    assert obtido.loc[~um_trimestre & (obtido['RazaoSocial'] != 'NOME ANTIGO'), 'Desvio_Padrao_Despesas'].notna().all()
+
+
+def test_motor_com_colunas_categoricas(despesas):
+    """Com o consolidado lido do Parquet (colunas categóricas) o resultado é o mesmo"""
+    df_clean, df_cadop = despesas
+    categorico = df_clean.astype({'CNPJ': 'category', 'RazaoSocial': 'category', 'Trimestre': 'category'})
+
+    pd.testing.assert_frame_equal(
+        ordenar(aggregate_expenses(categorico, df_cadop)),
+        ordenar(aggregate_expenses(df_clean, df_cadop)),
+    )
+
+
+def test_parciais_reconstroem_o_agregado(despesas):
+    """Juntar as parciais (somas trimestrais em centavos) por trimestre dá exatamente o mesmo agregado"""
+    df_clean, df_cadop = despesas
+    trimestres = df_clean.groupby(['Ano', 'Trimestre'])
+    parciais = [quarter_partial(parte.copy(), df_cadop) for _, parte in trimestres]
+
+    pd.testing.assert_frame_equal(
+        ordenar(merge_partials(parciais)),
+        ordenar(aggregate_expenses(df_clean, df_cadop)),
+        check_exact=True
+    )
+
+
+def test_parciais_com_totais_grandes_e_quase_iguais():
+    """Somas trimestrais de ~500 bilhões de reais que variam poucos reais: o desvio não se perde na junção"""
+    totais = [50_000_000_000_000, 50_000_000_012_345, 50_000_000_025_000]  # centavos
+    df_clean = pd.DataFrame({
+        'CNPJ': ['11222333000181'] * 3,
+        'RazaoSocial': ['OPERADORA GRANDE'] * 3,
+        'Ano': [2025] * 3,
+        'Trimestre': ['1T', '2T', '3T'],
+        'ValorDespesas': [total / 100 for total in totais],
+    })
+    df_cadop = pd.DataFrame({'CNPJ': ['11222333000181'], 'REGISTRO_OPERADORA': ['300001'],
+                             'Modalidade': ['Medicina de Grupo'], 'UF': ['SP']})
+    parciais = [quarter_partial(parte.copy(), df_cadop) for _, parte in df_clean.groupby('Trimestre')]
+
+    completo = aggregate_expenses(df_clean, df_cadop)
+    incremental = merge_partials(parciais)
+    assert completo['Desvio_Padrao_Despesas'].iloc[0] == pytest.approx(125.00, abs=0.01)
+    pd.testing.assert_frame_equal(incremental, completo, check_exact=True)
+
+
+def test_empates_na_mesma_ordem_nos_dois_caminhos(despesas):
+    """Totais empatados saem ordenados pelas chaves: o arquivo do incremental é igual ao do completo"""
+    df_clean, df_cadop = despesas
+    # Uma operadora nova com os mesmos lançamentos de outra, chegando antes e em outra ordem
+    ultima = df_clean.iloc[-1]
+    empate = df_clean[(df_clean['CNPJ'] == ultima['CNPJ']) & (df_clean['RazaoSocial'] == ultima['RazaoSocial'])]
+    gemea = empate.iloc[::-1].assign(CNPJ=gerar_cnpj(999_999), RazaoSocial='ZZ GEMEA')
+    df_clean = pd.concat([gemea, df_clean], ignore_index=True)
+    parciais = [quarter_partial(parte.copy(), df_cadop) for _, parte in df_clean.groupby(['Ano', 'Trimestre'])]
+
+    completo = sort_aggregate(aggregate_expenses(df_clean, df_cadop))
+    incremental = sort_aggregate(merge_partials(parciais))
+    assert completo['Total_Despesas'].duplicated().any()
+    pd.testing.assert_frame_equal(incremental, completo, check_exact=True)
+    assert completo.to_csv(index=False) == incremental.to_csv(index=False)
+
+
+def test_totais_exatos_em_qualquer_ordem(despesas):
+    """Somas em centavos: o mesmo agregado com as linhas embaralhadas, com o total igual à soma decimal"""
+    df_clean, df_cadop = despesas
+    obtido = ordenar(aggregate_expenses(df_clean, df_cadop))
+
+    for seed in range(3):
+        embaralhado = df_clean.sample(frac=1, random_state=seed)
+        pd.testing.assert_frame_equal(ordenar(aggregate_expenses(embaralhado, df_cadop)), obtido, check_exact=True)
+
+    soma_decimal = df_clean.groupby(['CNPJ', 'RazaoSocial'])['ValorDespesas'].agg(
+        lambda valores: sum(Decimal(f"{valor:.2f}") for valor in valores)
+    )
+    totais = obtido.set_index(['CNPJ', 'RazaoSocial'])['Total_Despesas']
+    assert all(totais[chave] == float(soma) for chave, soma in soma_decimal.items())
@@ -10,6 +10,9 @@ from desafio_04_api_interface.backend.main import app
 
 client = TestClient(app)
 
+# Banco sintético (tests/conftest.py), a menos que ANS_DB_PATH aponte para outro
+pytestmark = pytest.mark.usefixtures("banco_api")
+
 def test_status_api():
     """Testa se a API está online"""
     response = client.get("/api/estatisticas")
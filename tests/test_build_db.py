@@ -0,0 +1,151 @@
+import pytest
+import sys
+import os
+import sqlite3
+from decimal import Decimal
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_04_api_interface.backend.build_db as desafio4
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+from comum.dinheiro import centavos
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Gera o ans.db a partir de um consolidado e um cadastro sintéticos"""
+    cadop = gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=30)
+    despesas = gerar_consolidado(tmp_path / "consolidado_despesas.csv", 5_000, n_operadoras=30)
+    db_path = str(tmp_path / "ans.db")
+
+    desafio4.build_db(db_path, str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+
+    conn = sqlite3.connect(db_path)
+    yield conn, cadop, despesas
+    conn.close()
+
+
+def test_esquema_tipado(banco):
+    """As colunas devem ter tipo declarado e os valores gravados com esse tipo"""
+    conn, _, _ = banco
+
+    colunas = {nome: tipo for _, nome, tipo, *_ in conn.execute("PRAGMA table_info(despesas)")}
+    assert colunas == {
+        "id": "INTEGER", "cnpj": "TEXT", "data_referencia": "TEXT",
+        "ano": "INTEGER", "trimestre": "TEXT", "valor_centavos": "INTEGER",
+    }
+
+    tipos = conn.execute(
+        "SELECT DISTINCT typeof(cnpj), typeof(ano), typeof(trimestre), typeof(valor_centavos) FROM despesas"
+    ).fetchall()
+    assert tipos == [("text", "integer", "text", "integer")]
+    assert conn.execute("SELECT DISTINCT typeof(registro_ans) FROM operadoras").fetchall() == [("text",)]
+
+
+def test_conteudo_carregado(banco):
+    """Todas as linhas chegam ao banco, com datas de referência e acentos corrigidos"""
+    conn, cadop, despesas = banco
+
+    assert conn.execute("SELECT COUNT(*) FROM operadoras").fetchone()[0] == len(cadop)
+    assert conn.execute("SELECT COUNT(*) FROM despesas").fetchone()[0] == len(despesas)
+    total = conn.execute("SELECT SUM(valor_centavos) FROM despesas").fetchone()[0]
+    assert total == centavos(despesas["ValorDespesas"]).sum()
+
+    assert sorted(r[0] for r in conn.execute("SELECT DISTINCT data_referencia FROM despesas")) == [
+        "2025-01-01", "2025-04-01", "2025-07-01"
+    ]
+    nome, fantasia = conn.execute(
+        "SELECT razao_social, nome_fantasia FROM operadoras WHERE cnpj = ?", (cadop["CNPJ"][0],)
+    ).fetchone()
+    assert nome == "OPERADORA DE SAÚDE 00000 LTDA"
+    assert fantasia == "SAÚDE 00000"
+
+
+def test_indices_estatisticas_e_arquivo_final(banco, tmp_path):
+    """Índices criados após a carga, ANALYZE executado e banco final sem WAL nem temporários"""
+    conn, cadop, _ = banco
+
+    indices = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+    assert {"idx_cnpj_data", "idx_modalidade", "idx_uf"} <= indices
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+    plano = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM despesas WHERE cnpj = ? ORDER BY data_referencia DESC",
+        (cadop["CNPJ"][0],)
+    ).fetchall()
+    assert "idx_cnpj_data" in str(plano)
+
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("ans.db")) == ["ans.db"]
+
+
+def test_resumos_materializados(banco):
+    """Os resumos do build batem com as consultas sobre as despesas (as que o endpoint fazia)"""
+    conn, _, despesas = banco
+
+    total, media, n = conn.execute("SELECT total_geral, media_geral, n_despesas FROM resumo_geral").fetchone()
+    assert (total, media, n) == conn.execute(
+        "SELECT SUM(valor_centavos) / 100.0, AVG(valor_centavos) / 100.0, COUNT(*) FROM despesas"
+    ).fetchone()
+
+    top_5 = conn.execute("""
+        SELECT o.razao_social, SUM(d.valor_centavos) / 100.0 as total
+        FROM despesas d JOIN operadoras o ON d.cnpj = o.cnpj
+        GROUP BY d.cnpj ORDER BY total DESC LIMIT 5
+    """).fetchall()
+    assert conn.execute(
+        "SELECT razao_social, total FROM resumo_operadoras ORDER BY total DESC LIMIT 5"
+    ).fetchall() == top_5
+
+    por_uf = conn.execute("""
+        SELECT o.uf, SUM(d.valor_centavos) / 100.0 FROM despesas d JOIN operadoras o ON d.cnpj = o.cnpj
+        GROUP BY o.uf ORDER BY o.uf
+    """).fetchall()
+    assert conn.execute("SELECT uf, total FROM resumo_uf ORDER BY uf").fetchall() == por_uf
+
+    trimestres = conn.execute("SELECT ano, trimestre, n_despesas FROM resumo_trimestres ORDER BY data_referencia").fetchall()
+    assert trimestres == [(2025, t, int(n)) for t, n in despesas.groupby("Trimestre").size().items()]
+
+    build_id = conn.execute("SELECT valor FROM build_info WHERE chave = 'build_id'").fetchone()[0]
+    assert len(build_id) == 32
+
+
+def test_reconstrucao_substitui_o_banco(tmp_path):
+    """Rodar o build de novo troca o banco inteiro (sem duplicar linhas)"""
+    gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=10)
+    gerar_consolidado(tmp_path / "consolidado_despesas.csv", 1_000, n_operadoras=10)
+    args = (str(tmp_path / "ans.db"), str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+
+    desafio4.build_db(*args)
+    desafio4.build_db(*args)
+
+    with sqlite3.connect(args[0]) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM despesas").fetchone()[0] == 1_000
+
+
+def test_totais_iguais_em_qualquer_ordem(tmp_path):
+    """Valores em centavos: o consolidado embaralhado gera exatamente os mesmos rollups e resumos"""
+    gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=30)
+    despesas = gerar_consolidado(tmp_path / "consolidado_despesas.csv", 5_000, n_operadoras=30)
+    despesas.sample(frac=1, random_state=1).to_csv(tmp_path / "embaralhado.csv", index=False, encoding="utf-8-sig")
+
+    consultas = [
+        "SELECT * FROM rollup_operadora_trimestre ORDER BY cnpj, data_referencia",
+        "SELECT * FROM rollup_uf_trimestre ORDER BY uf, data_referencia",
+        "SELECT * FROM resumo_geral",
+        "SELECT * FROM resumo_operadoras ORDER BY cnpj",
+        "SELECT * FROM resumo_uf ORDER BY uf",
+        "SELECT * FROM resumo_trimestres ORDER BY data_referencia",
+    ]
+    resultados = []
+    for nome in ("consolidado_despesas", "embaralhado"):
+        db_path = str(tmp_path / f"{nome}.db")
+        desafio4.build_db(db_path, str(tmp_path / f"{nome}.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+        conn = sqlite3.connect(db_path)
+        resultados.append([conn.execute(consulta).fetchall() for consulta in consultas])
+        conn.close()
+
+    assert resultados[0] == resultados[1]
+    total_geral = resultados[0][2][0][0]
+    assert total_geral == float(sum(Decimal(f"{valor:.2f}") for valor in despesas["ValorDespesas"]))
@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desafio_04_api_interface.backend.build_db import build_db
+from desafio_04_api_interface.backend.main import app
+import desafio_04_api_interface.backend.main as desafio4
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+NOMES = [
+    ("UNIMED CAMPINAS COOPERATIVA DE TRABALHO MÉDICO", "UNIMED CAMPINAS"),
+    ("ODONTOPREV S.A.", "ODONTOPREV"),
+    ("SAÚDE VIDA ASSISTÊNCIA MÉDICA LTDA", "CLÍNICA 24 HORAS"),
+    ("VIDA", "VIDA"),
+    ("ASSOCIAÇÃO DOS SERVIDORES DE SÃO PAULO", "ASSIM SAÚDE"),
+]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """ans.db com nomes reais de formato (acentos, siglas, nome fantasia vazio)"""
+    cadastro = gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=len(NOMES))
+    cadastro["Razao_Social"] = [n for n, _ in NOMES]
+    cadastro["Nome_Fantasia"] = [f for _, f in NOMES]
+    cadastro.to_csv(tmp_path / "Relatorio_cadop.csv", sep=";", index=False, encoding="utf-8")
+    gerar_consolidado(tmp_path / "consolidado_despesas.csv", 100, n_operadoras=len(NOMES))
+    db_path = str(tmp_path / "ans.db")
+    build_db(db_path, str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+
+    monkeypatch.setenv("ANS_DB_PATH", db_path)
+    client = TestClient(app)
+    client.cadastro = cadastro
+    client.db_path = db_path
+    return client
+
+
+def buscar(client, termo, **params):
+    resposta = client.get("/api/operadoras", params={"search": termo, **params})
+    assert resposta.status_code == 200
+    return resposta.json()
+
+
+def nomes(resultado):
+    return [op["razao_social"] for op in resultado["data"]]
+
+
+def test_busca_ignora_acentos_e_maiusculas(client):
+    """'saude', 'SAÚDE' e 'Saúde' encontram as mesmas operadoras (razão social ou nome fantasia)"""
+    esperado = {"SAÚDE VIDA ASSISTÊNCIA MÉDICA LTDA", "ASSOCIAÇÃO DOS SERVIDORES DE SÃO PAULO"}
+    for termo in ["saude", "SAÚDE", "Saúde"]:
+        resultado = buscar(client, termo)
+        assert set(nomes(resultado)) == esperado
+        assert resultado["total"] == 2
+
+    assert nomes(buscar(client, "associacao sao paulo")) == ["ASSOCIAÇÃO DOS SERVIDORES DE SÃO PAULO"]
+
+
+def test_busca_com_todas_as_palavras_e_a_ultima_como_prefixo(client):
+    """Todas as palavras precisam aparecer; a última (ainda sendo digitada) é um prefixo"""
+    assert nomes(buscar(client, "unimed camp")) == ["UNIMED CAMPINAS COOPERATIVA DE TRABALHO MÉDICO"]
+    assert nomes(buscar(client, "odonto")) == ["ODONTOPREV S.A."]
+    assert buscar(client, "unim campinas")["total"] == 0
+    assert buscar(client, "unimed paulo")["total"] == 0
+
+
+def test_busca_ordenada_por_relevancia(client, monkeypatch):
+    """O nome mais curto com o termo vem primeiro (bm25); com resultados demais, a ordem do índice"""
+    assert nomes(buscar(client, "vida")) == ["VIDA", "SAÚDE VIDA ASSISTÊNCIA MÉDICA LTDA"]
+    assert nomes(buscar(client, "medico")) == ["UNIMED CAMPINAS COOPERATIVA DE TRABALHO MÉDICO"]
+
+    monkeypatch.setattr(desafio4, "LIMITE_RELEVANCIA", 1)
+    assert nomes(buscar(client, "m")) == [
+        "SAÚDE VIDA ASSISTÊNCIA MÉDICA LTDA", "UNIMED CAMPINAS COOPERATIVA DE TRABALHO MÉDICO"
+    ]
+
+
+def test_busca_por_prefixo_de_cnpj(client):
+    """Dígitos (com ou sem pontuação) buscam por prefixo de CNPJ, usando a chave primária"""
+    cnpj = client.cadastro["CNPJ"][2]
+    formatado = f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}"
+
+    resultado = buscar(client, formatado)
+    assert [op["cnpj"] for op in resultado["data"]] == [cnpj]
+    assert buscar(client, cnpj[:2])["total"] == sum(c.startswith(cnpj[:2]) for c in client.cadastro["CNPJ"])
+
+    with sqlite3.connect(client.db_path) as conn:
+        plano = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM operadoras WHERE cnpj >= ? AND cnpj < ?", ("12", "12:")
+        ).fetchall()
+    assert "USING INDEX sqlite_autoindex_operadoras_1" in str(plano)
+
+
+def test_busca_so_com_digitos_tambem_no_nome(client):
+    """Dígitos que não são prefixo de CNPJ ainda encontram números no nome"""
+    assert nomes(buscar(client, "24")) == ["SAÚDE VIDA ASSISTÊNCIA MÉDICA LTDA"]
+    assert nomes(buscar(client, "2")) == ["SAÚDE VIDA ASSISTÊNCIA MÉDICA LTDA"]
+    assert buscar(client, "999")["total"] == 0
+
+
+def test_busca_paginada_e_sem_termos(client):
+    """A paginação segue a ordem de relevância; busca só com pontuação não encontra nada"""
+    pagina_1 = buscar(client, "vida", limit=1)
+    pagina_2 = buscar(client, "vida", limit=1, page=2)
+    assert nomes(pagina_1) + nomes(pagina_2) == nomes(buscar(client, "vida"))
+    for termo in ['%"*', "-", "  "]:
+        resultado = buscar(client, termo)
+        assert resultado["total"] == 0 and resultado["data"] == [] and resultado["next"] is None
@@ -0,0 +1,99 @@
+import pytest
+import sys
+import os
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_04_api_interface.backend.main as desafio4
+from desafio_04_api_interface.backend.build_db import build_db
+from desafio_04_api_interface.backend.cache_http import etag_confere
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+client = TestClient(desafio4.app)
+
+pytestmark = pytest.mark.usefixtures("banco_api")
+
+
+def primeiro_cnpj():
+    return client.get("/api/operadoras?limit=1").json()["data"][0]["cnpj"]
+
+
+def test_etag_do_build_e_cache_control_por_rota():
+    """Todas as rotas levam o build_id como ETag e um Cache-Control próprio"""
+    build_id = client.get("/api/estatisticas").json()["build_id"]
+    cnpj = primeiro_cnpj()
+
+    politicas = {
+        "/api/estatisticas": "public, max-age=300",
+        "/api/operadoras?limit=5": "public, max-age=60",
+        f"/api/operadoras/{cnpj}": "public, max-age=3600",
+        f"/api/operadoras/{cnpj}/despesas": "public, max-age=3600",
+        f"/api/operadoras/{cnpj}/trimestres": "public, max-age=3600",
+        "/api/ufs/SP/trimestres": "public, max-age=3600",
+        "/api/estatisticas/crescimento": "public, max-age=300",
+    }
+    for url, politica in politicas.items():
+        resposta = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert resposta.headers["etag"] == f'"{build_id}"'
+        assert resposta.headers["cache-control"] == politica
+
+    nao_encontrada = client.get("/api/operadoras/00000000000000")
+    assert nao_encontrada.status_code == 404
+    assert "etag" not in nao_encontrada.headers
+
+
+def test_if_none_match_responde_304_sem_consultar_o_banco(monkeypatch):
+    """Com o ETag atual, a resposta é 304 sem corpo e sem abrir conexão com o SQLite"""
+    etag = client.get("/api/estatisticas").headers["etag"]
+
+    def sem_banco():
+        raise AssertionError("o 304 não deveria consultar o banco")
+    monkeypatch.setattr(desafio4.pool, "conexao", sem_banco)
+
+    for url in ["/api/estatisticas", "/api/operadoras?limit=5"]:
+        resposta = client.get(url, headers={"If-None-Match": etag})
+        assert resposta.status_code == 304
+        assert resposta.content == b""
+        assert resposta.headers["etag"] == etag
+
+
+def test_respostas_grandes_comprimidas():
+    """JSON grande sai em gzip, com ETag próprio dessa representação; o pequeno não"""
+    cnpj = primeiro_cnpj()
+    grande = client.get(f"/api/operadoras/{cnpj}/despesas", headers={"Accept-Encoding": "gzip"})
+    assert grande.headers["content-encoding"] == "gzip"
+    assert grande.headers["etag"].endswith('-gzip"')
+    assert len(grande.json()) > 0
+
+    pequena = client.get(f"/api/operadoras/{cnpj}", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in pequena.headers
+
+    revalidada = client.get(f"/api/operadoras/{cnpj}/despesas", headers={"If-None-Match": grande.headers["etag"]})
+    assert revalidada.status_code == 304
+
+
+def test_etag_muda_com_o_rebuild(tmp_path, monkeypatch):
+    """Depois de reconstruir o banco, o ETag antigo não vale mais"""
+    gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=10)
+    gerar_consolidado(tmp_path / "consolidado_despesas.csv", 100, n_operadoras=10)
+    args = (str(tmp_path / "ans.db"), str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+    build_db(*args)
+    monkeypatch.setenv("ANS_DB_PATH", args[0])
+
+    etag = client.get("/api/estatisticas").headers["etag"]
+    build_db(*args)
+
+    resposta = client.get("/api/estatisticas", headers={"If-None-Match": etag})
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"] != etag
+
+
+def test_if_none_match_comparacao_fraca():
+    etags = ('"abc"', '"abc-gzip"')
+    assert etag_confere('"x", W/"abc-gzip"', etags) == '"abc-gzip"'
+    assert etag_confere("*", etags) == '"abc"'
+    assert etag_confere('"abcd"', etags) is None
+    assert etag_confere("", etags) is None
@@ -0,0 +1,82 @@
+import pytest
+import sys
+import os
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import desafio_01_api_ans.src.main as desafio1
+from benchmarks.sintetico import gerar_base_bruta, compactar_trimestres
+
+
+@pytest.fixture
+def base_bruta(tmp_path, monkeypatch):
+    """Monta uma RAW_DIR sintética pequena e redireciona o desafio 1 para ela"""
+    raw_dir = tmp_path / "raw"
+    output_dir = tmp_path / "output"
+    raw_dir.mkdir()
+    output_dir.mkdir()
+    gerar_base_bruta(raw_dir, linhas_por_trimestre=2_500, n_operadoras=50)
+
+    monkeypatch.setattr(desafio1, "RAW_DIR", raw_dir)
+    monkeypatch.setattr(desafio1, "OUTPUT_DIR", output_dir)
+    # Usa o cadastro sintético em vez de revalidar o arquivo com a ANS
+    monkeypatch.setattr(desafio1, "baixar_cadastro_operadoras", lambda: raw_dir / "cadastro_operadoras.csv")
+    return output_dir
+
+
+def test_streaming_igual_ao_caminho_em_memoria(base_bruta):
+    """O modo em blocos deve gerar exatamente o mesmo CSV que o caminho atual"""
+    csv_path = base_bruta / "consolidado_despesas.csv"
+
+    desafio1.consolidar_despesas()
+    esperado = csv_path.read_bytes()
+
+    desafio1.consolidar_despesas(chunk_size=700)
+    assert csv_path.read_bytes() == esperado
+
+
+def test_paralelo_igual_ao_caminho_serial(base_bruta):
+    """A leitura com pool de processos deve gerar o mesmo CSV, byte a byte"""
+    csv_path = base_bruta / "consolidado_despesas.csv"
+
+    desafio1.consolidar_despesas()
+    esperado = csv_path.read_bytes()
+
+    desafio1.consolidar_despesas(workers=2)
+    assert csv_path.read_bytes() == esperado
+
+
+@pytest.mark.parametrize("opcoes", [{}, {"chunk_size": 700}, {"workers": 2}])
+def test_leitura_direta_dos_zips(base_bruta, opcoes):
+    """Ler os CSVs de dentro dos ZIPs trimestrais deve dar o mesmo resultado que as pastas extraídas"""
+    csv_path = base_bruta / "consolidado_despesas.csv"
+
+    desafio1.consolidar_despesas()
+    esperado = csv_path.read_bytes()
+
+    compactar_trimestres(desafio1.RAW_DIR)
+    assert not any(p.is_dir() for p in desafio1.RAW_DIR.iterdir())
+
+    desafio1.consolidar_despesas(**opcoes)
+    assert csv_path.read_bytes() == esperado
+
+
+def test_saida_parquet_equivale_ao_csv(base_bruta):
+    """O Parquet opcional deve ter os mesmos dados do CSV, com tipos compactos"""
+    pytest.importorskip("pyarrow")
+    from comum.consolidado import ler_consolidado
+
+    desafio1.consolidar_despesas(chunk_size=700, parquet=True)
+    csv_path = base_bruta / "consolidado_despesas.csv"
+
+    do_parquet = ler_consolidado(csv_path)
+    do_csv = pd.read_csv(csv_path, encoding="utf-8-sig", dtype={"CNPJ": str})
+
+    assert str(do_parquet["CNPJ"].dtype) == "category"
+    assert str(do_parquet["Ano"].dtype) == "int16"
+    pd.testing.assert_frame_equal(
+        do_parquet.astype({"CNPJ": str, "RazaoSocial": str, "Trimestre": str, "Ano": "int64"}),
+        do_csv.astype({"CNPJ": str, "RazaoSocial": str, "Trimestre": str}),
+    )
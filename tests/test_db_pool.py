@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desafio_04_api_interface.backend.db import PoolConexoes
+from desafio_04_api_interface.backend.build_db import build_db
+from desafio_04_api_interface.backend.main import app
+import desafio_04_api_interface.backend.main as desafio4
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+
+
+def gerar_banco(base, n_linhas):
+    gerar_cadastro(base / "Relatorio_cadop.csv", n_operadoras=10)
+    gerar_consolidado(base / "consolidado_despesas.csv", n_linhas, n_operadoras=10)
+    build_db(str(base / "ans.db"), str(base / "consolidado_despesas.csv"), str(base / "Relatorio_cadop.csv"))
+    return str(base / "ans.db")
+
+
+@pytest.fixture
+def banco(tmp_path):
+    return gerar_banco(tmp_path, 1_000)
+
+
+def test_conexoes_somente_leitura(banco):
+    """Nenhuma escrita passa pelas conexões do pool"""
+    pool = PoolConexoes(banco)
+    with pool.conexao() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM despesas").fetchone()[0] == 1_000
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM despesas")
+    pool.fechar()
+
+
+def test_pool_limitado_e_reaproveitado(banco):
+    """No máximo `tamanho` conexões emprestadas; devolvidas, são reaproveitadas"""
+    pool = PoolConexoes(banco, tamanho=2, timeout=0.1)
+    with pool.conexao() as a, pool.conexao() as b:
+        assert a is not b
+        with pytest.raises(TimeoutError):
+            with pool.conexao():
+                pass
+
+    with pool.conexao() as c:
+        assert c in (a, b)
+    pool.fechar()
+
+
+def test_banco_reconstruido_e_reaberto(tmp_path, banco):
+    """Depois que o build_db substitui o ans.db, o pool passa a ler o arquivo novo"""
+    pool = PoolConexoes(banco)
+    with pool.conexao() as antiga:
+        assert antiga.execute("SELECT COUNT(*) FROM despesas").fetchone()[0] == 1_000
+
+    gerar_banco(tmp_path, 2_000)
+
+    with pool.conexao() as nova:
+        assert nova is not antiga
+        assert nova.execute("SELECT COUNT(*) FROM despesas").fetchone()[0] == 2_000
+    pool.fechar()
+
+
+def test_rotas_no_threadpool_com_clientes_concorrentes(banco_api):
+    """As rotas são síncronas (rodam no threadpool) e atendem requisições simultâneas"""
+    rotas = [r for r in app.routes if getattr(r, "path", "").startswith("/api")]
+    assert rotas and not any(asyncio.iscoroutinefunction(r.endpoint) for r in rotas)
+
+    with TestClient(app) as client:
+        cnpj = client.get("/api/operadoras?limit=1").json()["data"][0]["cnpj"]
+        urls = ["/api/estatisticas", "/api/operadoras?page=2&limit=5",
+                f"/api/operadoras/{cnpj}", f"/api/operadoras/{cnpj}/despesas"] * 10
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            respostas = list(executor.map(client.get, urls))
+
+    assert all(r.status_code == 200 for r in respostas)
+
+
+def test_estatisticas_em_cache_ate_a_reconstrucao(tmp_path, banco, monkeypatch):
+    """/api/estatisticas vem dos resumos, fica em cache e é recalculada quando o banco muda"""
+    monkeypatch.setenv("ANS_DB_PATH", banco)
+    client = TestClient(app)
+
+    primeira = client.get("/api/estatisticas").json()
+    with sqlite3.connect(banco) as conn:
+        assert primeira["total_geral"] == conn.execute("SELECT SUM(valor_centavos) FROM despesas").fetchone()[0] / 100
+    assert sum(t["n_despesas"] for t in primeira["por_trimestre"]) == 1_000
+    assert client.get("/api/estatisticas").json() == primeira
+    assert len(desafio4._estatisticas) == 1
+
+    gerar_banco(tmp_path, 2_000)
+
+    segunda = client.get("/api/estatisticas").json()
+    assert segunda["build_id"] != primeira["build_id"]
+    assert sum(t["n_despesas"] for t in segunda["por_trimestre"]) == 2_000
@@ -0,0 +1,204 @@
+import pytest
+import sys
+import os
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.download import baixar_arquivo, baixar_varios, criar_sessao
+
+
+class ServidorANSFalso:
+    """Servidor HTTP local que imita o FTP da ANS (ETag, Last-Modified e Range)"""
+
+    def __init__(self):
+        self.arquivos = {}
+        self.requisicoes = []
+        self.atraso = 0
+        self.comprimir = False  # gzip mesmo quando o cliente pede identity
+        self.desvio_range = 0  # 206 começando em outro ponto que o pedido
+        self.ativas = 0
+        self.max_ativas = 0
+        self.trava = threading.Lock()
+
+    def publicar(self, caminho, conteudo, versao):
+        self.arquivos[caminho] = (conteudo, f'"{versao}"')
+
+    def handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with servidor.trava:
+                    servidor.ativas += 1
+                    servidor.max_ativas = max(servidor.max_ativas, servidor.ativas)
+                    servidor.requisicoes.append((self.path, dict(self.headers)))
+                try:
+                    time.sleep(servidor.atraso)
+                    self.responder()
+                finally:
+                    with servidor.trava:
+                        servidor.ativas -= 1
+
+            def responder(self):
+                if self.path not in servidor.arquivos:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                conteudo, etag = servidor.arquivos[self.path]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                inicio = 0
+                intervalo = self.headers.get("Range")
+                if intervalo and self.headers.get("If-Range", etag) == etag:
+                    inicio = int(intervalo.split("=")[1].split("-")[0]) + servidor.desvio_range
+                    if inicio >= len(conteudo):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(conteudo)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+
+                corpo = conteudo[inicio:]
+                self.send_response(206 if inicio else 200)
+                self.send_header("ETag", etag)
+                if servidor.comprimir:
+                    corpo = gzip.compress(corpo)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(corpo)))
+                if inicio:
+                    self.send_header("Content-Range", f"bytes {inicio}-{len(conteudo) - 1}/{len(conteudo)}")
+                self.end_headers()
+                self.wfile.write(corpo)
+
+        return Handler
+
+
+@pytest.fixture
+def servidor():
+    falso = ServidorANSFalso()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), falso.handler())
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    falso.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield falso
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_e_revalidacao_com_etag(servidor, tmp_path):
+    """Segunda chamada deve receber 304 e manter o arquivo; nova versão deve ser baixada"""
+    servidor.publicar("/Relatorio_cadop.csv", b"REGISTRO_OPERADORA;CNPJ\n1;2\n", "v1")
+    destino = tmp_path / "Relatorio_cadop.csv"
+    sessao = criar_sessao()
+
+    baixar_arquivo(f"{servidor.url}/Relatorio_cadop.csv", destino, sessao=sessao)
+    assert destino.read_bytes() == b"REGISTRO_OPERADORA;CNPJ\n1;2\n"
+    assert not (tmp_path / "Relatorio_cadop.csv.part").exists()
+
+    baixar_arquivo(f"{servidor.url}/Relatorio_cadop.csv", destino, sessao=sessao)
+    assert servidor.requisicoes[-1][1].get("If-None-Match") == '"v1"'
+    assert destino.read_bytes() == b"REGISTRO_OPERADORA;CNPJ\n1;2\n"
+
+    servidor.publicar("/Relatorio_cadop.csv", b"REGISTRO_OPERADORA;CNPJ\n3;4\n", "v2")
+    baixar_arquivo(f"{servidor.url}/Relatorio_cadop.csv", destino, sessao=sessao)
+    assert destino.read_bytes() == b"REGISTRO_OPERADORA;CNPJ\n3;4\n"
+
+
+def test_retoma_download_parcial(servidor, tmp_path):
+    """Um .part existente deve ser completado via Range em vez de baixado do zero"""
+    conteudo = bytes(range(256)) * 100
+    servidor.publicar("/1T2025.zip", conteudo, "zip-v1")
+    destino = tmp_path / "2025_1T.zip"
+
+    (tmp_path / "2025_1T.zip.part").write_bytes(conteudo[:1000])
+    (tmp_path / "2025_1T.zip.meta.json").write_text('{"parcial": {"etag": "\\"zip-v1\\""}}')
+
+    baixar_arquivo(f"{servidor.url}/1T2025.zip", destino, sessao=criar_sessao())
+
+    assert servidor.requisicoes[-1][1].get("Range") == "bytes=1000-"
+    assert destino.read_bytes() == conteudo
+
+
+def test_parcial_de_versao_antiga_e_descartado(servidor, tmp_path):
+    """Se o arquivo mudou no servidor, o If-Range faz o download recomeçar"""
+    servidor.publicar("/1T2025.zip", b"B" * 5000, "zip-v2")
+    destino = tmp_path / "2025_1T.zip"
+
+    (tmp_path / "2025_1T.zip.part").write_bytes(b"A" * 1000)
+    (tmp_path / "2025_1T.zip.meta.json").write_text('{"parcial": {"etag": "\\"zip-v1\\""}}')
+
+    baixar_arquivo(f"{servidor.url}/1T2025.zip", destino, sessao=criar_sessao())
+    assert destino.read_bytes() == b"B" * 5000
+
+
+def test_sem_compressao_de_transporte(servidor, tmp_path):
+    """Pede identity; se o servidor comprimir mesmo assim, o Content-Length (comprimido) ainda confere"""
+    conteudo = b"REGISTRO_OPERADORA;CNPJ\n" + b"300001;11222333000181\n" * 2000
+    servidor.publicar("/Relatorio_cadop.csv", conteudo, "v1")
+    servidor.comprimir = True
+    destino = tmp_path / "Relatorio_cadop.csv"
+
+    baixar_arquivo(f"{servidor.url}/Relatorio_cadop.csv", destino, sessao=criar_sessao(), tentativas=1)
+
+    assert servidor.requisicoes[-1][1].get("Accept-Encoding") == "identity"
+    assert destino.read_bytes() == conteudo
+
+
+def test_content_range_inesperado_recomeca_do_zero(servidor, tmp_path):
+    """Um 206 que não continua o .part não é gravado como arquivo: o parcial é descartado e baixado sem Range"""
+    conteudo = bytes(range(256)) * 100
+    servidor.publicar("/1T2025.zip", conteudo, "zip-v1")
+    servidor.desvio_range = 500
+    destino = tmp_path / "2025_1T.zip"
+
+    (tmp_path / "2025_1T.zip.part").write_bytes(conteudo[:1000])
+    (tmp_path / "2025_1T.zip.meta.json").write_text('{"parcial": {"etag": "\\"zip-v1\\""}}')
+
+    baixar_arquivo(f"{servidor.url}/1T2025.zip", destino, sessao=criar_sessao())
+
+    assert [requisicao[1].get("Range") for requisicao in servidor.requisicoes] == ["bytes=1000-", None]
+    assert destino.read_bytes() == conteudo
+
+
+def test_range_recusado_recomeca_do_zero(servidor, tmp_path):
+    """Um .part já completo (processo parado antes do os.replace) recebe 416: é descartado e baixado sem Range"""
+    conteudo = bytes(range(256)) * 100
+    servidor.publicar("/1T2025.zip", conteudo, "zip-v1")
+    destino = tmp_path / "2025_1T.zip"
+
+    (tmp_path / "2025_1T.zip.part").write_bytes(conteudo)
+    (tmp_path / "2025_1T.zip.meta.json").write_text('{"parcial": {"etag": "\\"zip-v1\\""}}')
+
+    baixar_arquivo(f"{servidor.url}/1T2025.zip", destino, sessao=criar_sessao())
+
+    assert [requisicao[1].get("Range") for requisicao in servidor.requisicoes] == [f"bytes={len(conteudo)}-", None]
+    assert destino.read_bytes() == conteudo
+    assert not (tmp_path / "2025_1T.zip.part").exists()
+
+
+def test_limite_de_concorrencia(servidor, tmp_path):
+    """baixar_varios não deve passar do limite de downloads simultâneos"""
+    servidor.atraso = 0.05
+    tarefas = []
+    for i in range(8):
+        servidor.publicar(f"/{i}T.zip", b"x" * 100, f"v{i}")
+        tarefas.append((f"{servidor.url}/{i}T.zip", tmp_path / f"{i}T.zip"))
+
+    destinos = baixar_varios(tarefas, max_concorrencia=3, sessao=criar_sessao())
+
+    assert destinos == [destino for _, destino in tarefas]
+    assert all(destino.read_bytes() == b"x" * 100 for destino in destinos)
+    assert 1 < servidor.max_ativas <= 3
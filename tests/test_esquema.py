@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_01_api_ans.src.main as desafio1
+from benchmarks.sintetico import gerar_base_bruta, gerar_cadastro, gerar_consolidado, gerar_trimestre
+from comum.consolidado import caminho_parquet, ler_consolidado
+from comum.esquema import (COLUNAS_CONSOLIDADO, DTYPES_CONSOLIDADO, ler_cadop, ler_consolidado_csv,
+                           ler_demonstracoes, memoria_mb)
+
+
+def test_consolidado_com_tipos_compactos(tmp_path):
+    """Texto repetido como category e ano em int16, com os mesmos valores e menos memória que a leitura como texto"""
+    caminho = tmp_path / "consolidado_despesas.csv"
+    gerar_consolidado(caminho, 20_000, n_operadoras=50)
+
+    df = ler_consolidado_csv(caminho)
+    assert {coluna: str(tipo) for coluna, tipo in df.dtypes.items()} == DTYPES_CONSOLIDADO
+
+    como_texto = pd.read_csv(caminho, dtype={"CNPJ": str}, low_memory=False)
+    assert memoria_mb(df) < memoria_mb(como_texto) / 3
+    pd.testing.assert_frame_equal(df.astype({"CNPJ": str, "RazaoSocial": str, "Trimestre": str, "Ano": "int64"}),
+                                  como_texto, check_dtype=False)
+    assert df["CNPJ"].str.len().eq(14).all()  # zeros à esquerda preservados
+
+
+def test_trimestral_so_com_as_colunas_usadas(tmp_path):
+    """Valor convertido na leitura igual à conversão anterior (texto, troca da vírgula e astype)"""
+    caminho = tmp_path / "1T2025.csv"
+    gerar_trimestre(caminho, ["300001", "300002", "300003"], 5_000)
+
+    df = ler_demonstracoes(caminho)
+    assert list(df.columns) == ["REG_ANS", "VL_SALDO_FINAL"]
+    assert df["VL_SALDO_FINAL"].dtype == "float64"
+
+    como_texto = pd.read_csv(caminho, sep=";", encoding="utf-8-sig", dtype=str)
+    esperado = como_texto["VL_SALDO_FINAL"].str.replace(",", ".", regex=False).astype(float)
+    assert (df["VL_SALDO_FINAL"] == esperado).all()
+
+
+def test_cadop_com_colunas_ausentes(tmp_path):
+    """Colunas pedidas e ausentes no arquivo (versões antigas sem Nome_Fantasia) são ignoradas"""
+    gerado = gerar_cadastro(tmp_path / "completo.csv", n_operadoras=20)
+    gerado.drop(columns=["Nome_Fantasia"]).to_csv(tmp_path / "antigo.csv", sep=";", index=False, encoding="latin-1")
+
+    df = ler_cadop(tmp_path / "antigo.csv")
+    assert "Nome_Fantasia" not in df.columns
+    assert all(pd.api.types.is_string_dtype(tipo) for tipo in df.dtypes)
+    assert df["CNPJ"].tolist() == gerado["CNPJ"].tolist()
+
+    assert list(ler_cadop(tmp_path / "completo.csv", ["CNPJ", "UF"]).columns) == ["CNPJ", "UF"]
+
+
+def test_csv_e_parquet_chegam_iguais(tmp_path, monkeypatch):
+    """O consolidado do desafio 1 lido do CSV e do Parquet tem os mesmos tipos e valores"""
+    pytest.importorskip("pyarrow")
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    gerar_base_bruta(raw_dir, linhas_por_trimestre=2_000, n_operadoras=30)
+    monkeypatch.setattr(desafio1, "RAW_DIR", raw_dir)
+    monkeypatch.setattr(desafio1, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(desafio1, "baixar_cadastro_operadoras", lambda: raw_dir / "cadastro_operadoras.csv")
+
+    desafio1.consolidar_despesas(chunk_size=500, parquet=True)
+    csv_path = tmp_path / "consolidado_despesas.csv"
+    assert caminho_parquet(csv_path).exists()
+
+    do_parquet = ler_consolidado(csv_path)[COLUNAS_CONSOLIDADO]
+    do_csv = ler_consolidado_csv(csv_path)[COLUNAS_CONSOLIDADO]
+    pd.testing.assert_frame_equal(do_csv, do_parquet, check_categorical=False)
+    assert list(do_csv.dtypes) == list(do_parquet.dtypes)
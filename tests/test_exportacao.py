@@ -0,0 +1,194 @@
+import pytest
+import sys
+import os
+import io
+import csv
+import json
+import sqlite3
+import subprocess
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+import desafio_04_api_interface.backend.main as desafio4
+from desafio_04_api_interface.backend import exportacao
+from desafio_04_api_interface.backend.build_db import SCHEMA
+
+client = TestClient(desafio4.app)
+
+pytestmark = pytest.mark.usefixtures("banco_api")
+
+COLUNAS = ["cnpj", "registro_ans", "razao_social", "modalidade", "uf",
+           "data_referencia", "ano", "trimestre", "ValorDespesas"]
+
+
+def esperado(banco_api, where="", params=()):
+    conn = sqlite3.connect(banco_api)
+    linhas = conn.execute(f"""
+        SELECT d.cnpj, o.registro_ans, o.razao_social, o.modalidade, o.uf,
+               d.data_referencia, d.ano, d.trimestre, d.valor_centavos / 100.0 AS ValorDespesas
+        FROM despesas d LEFT JOIN operadoras o ON o.cnpj = d.cnpj
+        {where} ORDER BY d.id
+    """, params).fetchall()
+    conn.close()
+    return [dict(zip(COLUNAS, linha)) for linha in linhas]
+
+
+def exportar(**params):
+    resposta = client.get("/api/exportar", params=params)
+    assert resposta.status_code == 200
+    return resposta
+
+
+def test_exportacao_ndjson_completa(banco_api):
+    """Sem filtros, uma linha por despesa com os dados cadastrais da operadora"""
+    resposta = exportar(formato="ndjson")
+
+    assert resposta.headers["content-type"] == "application/x-ndjson"
+    assert resposta.headers["content-disposition"] == 'attachment; filename="despesas.ndjson"'
+    linhas = [json.loads(linha) for linha in resposta.text.splitlines()]
+    assert linhas == esperado(banco_api)
+
+
+def test_exportacao_csv(banco_api):
+    """CSV com cabeçalho e BOM, mesmas linhas do NDJSON"""
+    resposta = exportar(formato="csv")
+
+    assert resposta.headers["content-disposition"] == 'attachment; filename="despesas.csv"'
+    assert resposta.content.startswith("\ufeff".encode("utf-8"))
+    linhas = list(csv.DictReader(io.StringIO(resposta.content.decode("utf-8-sig"))))
+    assert list(linhas[0]) == COLUNAS
+    assert linhas == [{coluna: str(valor) for coluna, valor in linha.items()} for linha in esperado(banco_api)]
+
+
+def test_exportacao_parquet(banco_api):
+    """Arquivo Parquet válido, um row group por lote do cursor"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    resposta = exportar(formato="parquet")
+
+    tabela = pq.read_table(io.BytesIO(resposta.content))
+    assert tabela.column_names == COLUNAS
+    assert tabela.to_pylist() == esperado(banco_api)
+
+
+def test_exportacao_filtros(banco_api):
+    """UF, modalidade e período viram condições da consulta"""
+    todas = esperado(banco_api)
+    primeira = todas[0]
+    filtros = {
+        "uf": primeira["uf"],
+        "modalidade": primeira["modalidade"],
+        "ano": primeira["ano"],
+        "trimestre": primeira["trimestre"],
+    }
+
+    linhas = [json.loads(linha) for linha in exportar(formato="ndjson", **filtros).text.splitlines()]
+
+    assert linhas == [
+        linha for linha in todas
+        if all(linha[coluna] == valor for coluna, valor in filtros.items())
+    ]
+    assert exportar(formato="ndjson", uf="XX").text == ""
+
+
+def test_exportacao_formato_invalido():
+    assert client.get("/api/exportar?formato=xlsx").status_code == 422
+
+
+# Exporta o banco inteiro em cada formato, em outro processo, acompanhando a
+# memória anônima (heap; as páginas do mmap do SQLite são do arquivo e não
+# contam) a cada pedaço enviado
+MEDIR_EXPORTACAO = """
+import asyncio, json, sys
+sys.path.append(sys.argv[1])
+import desafio_04_api_interface.backend.main as desafio4
+
+def rss_anon():
+    with open("/proc/self/status") as status:
+        for linha in status:
+            if linha.startswith("RssAnon:"):
+                return int(linha.split()[1]) * 1024
+
+async def aenumerate(iterador):
+    i = 0
+    async for item in iterador:
+        yield i, item
+        i += 1
+
+async def consumir(formato, **filtros):
+    resposta = desafio4.exportar_despesas(formato=formato, **filtros)
+    total, pico, apos_lotes_iniciais = 0, 0, None
+    async for i, pedaco in aenumerate(resposta.body_iterator):
+        total += len(pedaco)
+        pico = max(pico, rss_anon())
+        if i == 10:
+            apos_lotes_iniciais = pico
+    return total, pico, apos_lotes_iniciais
+
+medidas = {}
+for formato in sys.argv[2:]:
+    # Passada curta antes (só as operadoras do AC), para carregar módulos e
+    # abrir a conexão do pool
+    asyncio.run(consumir(formato, uf="AC"))
+    antes = rss_anon()
+    total, pico, apos_lotes_iniciais = asyncio.run(consumir(formato))
+    medidas[formato] = {
+        "bytes": total,
+        "crescimento": pico - antes,
+        "crescimento_apos_lotes_iniciais": pico - apos_lotes_iniciais,
+    }
+print(json.dumps(medidas))
+"""
+
+N_DESPESAS_GRANDE = 2_000_000
+
+
+@pytest.fixture(scope="module")
+def banco_grande(tmp_path_factory):
+    """ans.db com milhões de despesas, gerado direto no SQLite"""
+    db_path = str(tmp_path_factory.mktemp("exportacao") / "ans.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    conn.executescript(f"""
+        CREATE TABLE build_info (chave TEXT PRIMARY KEY, valor TEXT);
+        INSERT INTO build_info VALUES ('build_id', 'exportacao');
+        INSERT INTO operadoras
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < 999)
+        SELECT printf('%06d', i), printf('%014d', i), printf('OPERADORA DE SAÚDE %05d LTDA', i),
+               printf('SAÚDE %05d', i), 'Medicina de Grupo', CASE WHEN i < 10 THEN 'AC' ELSE 'SP' END
+        FROM n;
+        INSERT INTO despesas (cnpj, data_referencia, ano, trimestre, valor_centavos)
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {N_DESPESAS_GRANDE - 1})
+        SELECT printf('%014d', i * 1000 / {N_DESPESAS_GRANDE}), printf('2025-%02d-01', (i % 3) * 3 + 1),
+               2025, ((i % 3) + 1) || 'T', (i % 100000) * 125
+        FROM n;
+    """)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_exportacao_memoria_constante(banco_grande):
+    """Milhões de linhas (centenas de MB) com memória limitada ao tamanho dos lotes"""
+    if not os.path.exists("/proc/self/status"):
+        pytest.skip("Medição de memória via /proc disponível só no Linux")
+    formatos = ["csv", "ndjson"]
+    if exportacao._pyarrow() is not None:
+        formatos.append("parquet")
+
+    saida = subprocess.run(
+        [sys.executable, "-c", MEDIR_EXPORTACAO, RAIZ, *formatos],
+        env=dict(os.environ, ANS_DB_PATH=banco_grande),
+        capture_output=True, text=True, check=True,
+    )
+    medidas = json.loads(saida.stdout)
+
+    # Montar o resultado inteiro em memória ocuparia mais que o próprio arquivo
+    assert medidas["csv"]["bytes"] > 150 * 1024 * 1024
+    for formato in formatos:
+        # Depois dos primeiros lotes, a memória para de crescer até o fim
+        assert medidas[formato]["crescimento_apos_lotes_iniciais"] < 8 * 1024 * 1024, formato
+        assert medidas[formato]["crescimento"] < 64 * 1024 * 1024, formato
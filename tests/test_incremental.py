@@ -0,0 +1,118 @@
+import pytest
+import sys
+import os
+import zipfile
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import desafio_01_api_ans.src.main as desafio1
+import desafio_02_transformacao_validacao.src.main as desafio2
+from benchmarks.sintetico import gerar_base_bruta, gerar_cadastro, gerar_trimestre
+
+
+@pytest.fixture
+def projeto(tmp_path, monkeypatch):
+    """
+    Projeto sintético com os desafios 1 e 2 apontando para tmp_path, sem
+    acesso à rede. Registra quais trimestres cada etapa realmente leu.
+    """
+    raw_dir = tmp_path / "raw"
+    output_dir = tmp_path / "desafio_01_api_ans" / "output"
+    cadop_dir = tmp_path / "desafio_02_transformacao_validacao" / "data"
+    for pasta in (raw_dir, output_dir, cadop_dir):
+        pasta.mkdir(parents=True)
+
+    gerar_base_bruta(raw_dir, linhas_por_trimestre=2_000, n_operadoras=40)
+    gerar_cadastro(cadop_dir / "Relatorio_cadop.csv", n_operadoras=35)
+
+    monkeypatch.setattr(desafio1, "RAW_DIR", raw_dir)
+    monkeypatch.setattr(desafio1, "OUTPUT_DIR", output_dir)
+    monkeypatch.setattr(desafio1, "baixar_cadastro_operadoras", lambda: raw_dir / "cadastro_operadoras.csv")
+    monkeypatch.setattr(desafio2, "baixar_arquivo", lambda *args, **kwargs: None)
+
+    lidos = {"desafio1": [], "desafio2": []}
+    ler_blocos = desafio1.ler_despesas_em_blocos
+    ler_particao = desafio2.load_partition
+
+    def ler_blocos_espiao(arquivo, chunk_size):
+        lidos["desafio1"].append(os.path.basename(str(arquivo)))
+        return ler_blocos(arquivo, chunk_size)
+
+    def ler_particao_espiao(caminho):
+        lidos["desafio2"].append(os.path.basename(caminho))
+        return ler_particao(caminho)
+
+    monkeypatch.setattr(desafio1, "ler_despesas_em_blocos", ler_blocos_espiao)
+    monkeypatch.setattr(desafio2, "load_partition", ler_particao_espiao)
+
+    def rodar(**opcoes):
+        """Roda desafio 1 + desafio 2 e devolve (consolidado em bytes, agregado ordenado pelas chaves)"""
+        lidos["desafio1"].clear()
+        lidos["desafio2"].clear()
+        full_rebuild = opcoes.get("full_rebuild", False)
+        desafio1.consolidar_despesas(**opcoes)
+        desafio2.main(str(tmp_path), full_rebuild=full_rebuild)
+
+        consolidado = (output_dir / "consolidado_despesas.csv").read_bytes()
+        agregado = pd.read_csv(
+            tmp_path / "desafio_02_transformacao_validacao" / "output" / "despesas_agregadas.csv",
+            dtype={"CNPJ": str, "RegistroANS": str}, encoding="utf-8-sig"
+        )
+        agregado = agregado.sort_values(desafio2.AGGREGATION_KEYS).reset_index(drop=True)
+        return consolidado, agregado
+
+    rodar.raw_dir = raw_dir
+    rodar.lidos = lidos
+    return rodar
+
+
+def alterar_trimestres(raw_dir):
+    """Republica o 2T com outros valores e adiciona o 4T (compactado, como vem da ANS)"""
+    registros = pd.read_csv(raw_dir / "cadastro_operadoras.csv", sep=";", dtype=str)["REGISTRO_OPERADORA"].tolist()
+    gerar_trimestre(raw_dir / "2025_2T" / "2025_2T.csv", registros, 2_000, seed=99)
+    gerar_trimestre(raw_dir / "4T.csv", registros, 1_500, seed=100)
+    with zipfile.ZipFile(raw_dir / "2025_4T.zip", "w", zipfile.ZIP_DEFLATED) as z:
+        z.write(raw_dir / "4T.csv", arcname="2025_4T.csv")
+    os.remove(raw_dir / "4T.csv")
+
+
+def test_incremental_igual_ao_completo(projeto):
+    """Depois de mudar um trimestre e publicar outro, o incremental deve bater com a execução completa"""
+    projeto(incremental=True)
+    assert projeto.lidos["desafio1"] == ["2025_1T.csv", "2025_2T.csv", "2025_3T.csv"]
+
+    alterar_trimestres(projeto.raw_dir)
+
+    consolidado_inc, agregado_inc = projeto(incremental=True)
+    # Só o trimestre alterado e o novo são lidos pelas duas etapas
+    assert projeto.lidos["desafio1"] == ["2025_2T.csv", "2025_4T.zip!2025_4T.csv"]
+    assert projeto.lidos["desafio2"] == ["2025_2T.csv", "2025_4T.csv"]
+
+    consolidado_full, agregado_full = projeto()
+    assert projeto.lidos["desafio2"] == []  # sem manifesto: caminho completo
+
+    assert consolidado_inc == consolidado_full
+    pd.testing.assert_frame_equal(agregado_inc, agregado_full, check_exact=False, rtol=1e-9)
+
+
+def test_rodada_sem_mudancas_nao_rele_nada(projeto):
+    """Sem arquivos novos, nenhuma etapa relê dados e o resultado é o mesmo"""
+    consolidado, agregado = projeto(incremental=True)
+
+    consolidado_2, agregado_2 = projeto(incremental=True)
+    assert projeto.lidos == {"desafio1": [], "desafio2": []}
+    assert consolidado_2 == consolidado
+    pd.testing.assert_frame_equal(agregado_2, agregado)
+
+
+def test_full_rebuild_reprocessa_todos_os_trimestres(projeto):
+    """--full-rebuild ignora os manifestos, mas chega no mesmo resultado"""
+    consolidado, agregado = projeto(incremental=True)
+
+    consolidado_2, agregado_2 = projeto(full_rebuild=True)
+    assert len(projeto.lidos["desafio1"]) == 3
+    assert len(projeto.lidos["desafio2"]) == 3
+    assert consolidado_2 == consolidado
+    pd.testing.assert_frame_equal(agregado_2, agregado)
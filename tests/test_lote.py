@@ -0,0 +1,78 @@
+import pytest
+import sys
+import os
+from collections import defaultdict
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_04_api_interface.backend.main as desafio4
+
+client = TestClient(desafio4.app)
+
+pytestmark = pytest.mark.usefixtures("banco_api")
+
+
+@pytest.fixture
+def cnpjs():
+    return [op["cnpj"] for op in client.get("/api/operadoras?limit=5").json()["data"]]
+
+
+def lote(cnpjs, **opcoes):
+    resposta = client.post("/api/operadoras/lote", json={"cnpjs": cnpjs, **opcoes})
+    assert resposta.status_code == 200
+    return resposta.json()
+
+
+def test_lote_igual_as_requisicoes_individuais(cnpjs):
+    """Uma requisição devolve o mesmo que detalhe + despesas de cada CNPJ"""
+    resultado = lote(cnpjs)
+
+    assert list(resultado["operadoras"]) == cnpjs
+    assert resultado["nao_encontradas"] == []
+    for cnpj in cnpjs:
+        assert resultado["operadoras"][cnpj] == {
+            "operadora": client.get(f"/api/operadoras/{cnpj}").json(),
+            "despesas": client.get(f"/api/operadoras/{cnpj}/despesas").json(),
+        }
+
+
+def test_lote_com_cnpj_inexistente_e_repetido(cnpjs):
+    """CNPJs repetidos aparecem uma vez; os inexistentes voltam vazios e listados"""
+    resultado = lote([cnpjs[1], "00000000000000", cnpjs[0], cnpjs[1]])
+
+    assert list(resultado["operadoras"]) == [cnpjs[1], "00000000000000", cnpjs[0]]
+    assert resultado["operadoras"]["00000000000000"] == {"operadora": None, "despesas": []}
+    assert resultado["nao_encontradas"] == ["00000000000000"]
+
+
+def test_lote_por_trimestre(cnpjs):
+    """Com por_trimestre, as despesas vêm somadas por trimestre (mais recente primeiro)"""
+    resultado = lote(cnpjs, por_trimestre=True)
+
+    for cnpj in cnpjs:
+        esperado = defaultdict(lambda: [0.0, 0])
+        for d in client.get(f"/api/operadoras/{cnpj}/despesas").json():
+            esperado[(d["data_referencia"], d["ano"], d["trimestre"])][0] += d["ValorDespesas"]
+            esperado[(d["data_referencia"], d["ano"], d["trimestre"])][1] += 1
+
+        trimestres = resultado["operadoras"][cnpj]["despesas"]
+        assert [t["data_referencia"] for t in trimestres] == sorted((k[0] for k in esperado), reverse=True)
+        for t in trimestres:
+            total, n = esperado[(t["data_referencia"], t["ano"], t["trimestre"])]
+            assert t["total"] == pytest.approx(total)
+            assert t["n_despesas"] == n
+
+
+def test_lote_valida_o_pedido():
+    assert client.post("/api/operadoras/lote", json={"cnpjs": []}).status_code == 422
+    excesso = [f"{i:014d}" for i in range(desafio4.LIMITE_LOTE + 1)]
+    assert client.post("/api/operadoras/lote", json={"cnpjs": excesso}).status_code == 422
+
+
+def test_lote_no_modo_debug(cnpjs, monkeypatch):
+    monkeypatch.setattr(desafio4, "DEBUG", True)
+    assert lote(cnpjs)["operadoras"][cnpjs[0]]["operadora"]["cnpj"] == cnpjs[0]
+    assert lote(cnpjs, por_trimestre=True)["nao_encontradas"] == []
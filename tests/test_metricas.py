@@ -0,0 +1,184 @@
+import pytest
+import sys
+import os
+import json
+import pstats
+import time
+
+import numpy as np
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comum.metricas as metricas
+import desafio_01_api_ans.src.main as desafio1
+import desafio_03_banco_dados.src.sqlite_test as desafio3
+from comum.metricas import Execucao, previa
+from desafio_04_api_interface.backend.build_db import build_db
+from benchmarks.sintetico import gerar_base_bruta, gerar_cadastro, gerar_consolidado
+
+CAMPOS_ETAPA = {"nome", "nivel", "tempo_s", "cpu_s", "pico_rss_mb", "linhas_entrada", "linhas_saida",
+                "bytes_lidos", "bytes_escritos", "dataframe_mb"}
+
+
+def etapas_por_nome(relatorio):
+    return {etapa["nome"]: etapa for etapa in relatorio["etapas"]}
+
+
+def consumir_cpu(segundos):
+    """Laço em Python puro (aparece no cProfile com este nome)"""
+    fim = time.process_time() + segundos
+    while time.process_time() < fim:
+        pass
+
+
+def test_relatorio_por_etapa(tmp_path):
+    """Tempo, CPU, linhas e bytes por etapa; etapas aninhadas marcadas com o nível"""
+    caminho = tmp_path / "metricas.json"
+    with Execucao("teste", caminho, {"chunk_size": 10}) as execucao:
+        with execucao.etapa("leitura", linhas_entrada=100) as etapa:
+            consumir_cpu(0.05)
+            etapa.linhas_saida = 90
+        with execucao.etapa("escrita"):
+            with execucao.etapa("arquivo"):
+                (tmp_path / "saida.bin").write_bytes(b"x" * 2_000_000)
+
+    relatorio = json.loads(caminho.read_text(encoding="utf-8"))
+    assert relatorio["execucao"] == "teste" and relatorio["sucesso"] is True
+    assert relatorio["parametros"] == {"chunk_size": 10}
+    etapas = etapas_por_nome(relatorio)
+    assert list(etapas) == ["leitura", "escrita", "arquivo"]
+    assert all(set(etapa) == CAMPOS_ETAPA for etapa in etapas.values())
+
+    assert etapas["leitura"]["cpu_s"] >= 0.04
+    assert (etapas["leitura"]["linhas_entrada"], etapas["leitura"]["linhas_saida"]) == (100, 90)
+    assert [etapas[nome]["nivel"] for nome in etapas] == [0, 0, 1]
+    assert relatorio["etapa_mais_lenta"] == max(("leitura", "escrita"), key=lambda nome: etapas[nome]["tempo_s"])
+    assert relatorio["total"]["tempo_s"] >= sum(etapas[nome]["tempo_s"] for nome in ("leitura", "escrita"))
+
+    if etapas["arquivo"]["bytes_escritos"] is not None:  # /proc/self/io (Linux)
+        assert etapas["arquivo"]["bytes_escritos"] >= 2_000_000
+        assert etapas["escrita"]["bytes_escritos"] >= etapas["arquivo"]["bytes_escritos"]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs"), reason="pico por etapa depende do Linux")
+def test_pico_de_rss_e_por_etapa():
+    """O pico de uma etapa que aloca 200 MB não contamina a etapa seguinte, mas conta para a que a contém"""
+    execucao = Execucao("teste")
+    with execucao.etapa("externa"):
+        with execucao.etapa("alocacao"):
+            bloco = np.ones(200 * 2**20 // 8)
+            del bloco
+        with execucao.etapa("pequena"):
+            sum(range(1000))
+
+    etapas = etapas_por_nome(execucao.relatorio())
+    assert etapas["alocacao"]["pico_rss_mb"] - etapas["pequena"]["pico_rss_mb"] > 150
+    assert etapas["externa"]["pico_rss_mb"] >= etapas["alocacao"]["pico_rss_mb"]
+    assert execucao.relatorio()["total"]["pico_rss_mb"] >= etapas["alocacao"]["pico_rss_mb"]
+
+
+def test_relatorio_gravado_mesmo_com_erro(tmp_path):
+    caminho = tmp_path / "metricas.json"
+    with pytest.raises(ValueError):
+        with Execucao("teste", caminho) as execucao:
+            with execucao.etapa("falha"):
+                raise ValueError("erro")
+
+    relatorio = json.loads(caminho.read_text(encoding="utf-8"))
+    assert relatorio["sucesso"] is False
+    assert relatorio["etapas"][0]["nome"] == "falha" and relatorio["etapas"][0]["tempo_s"] is not None
+
+
+def test_perfil_da_etapa_mais_lenta(tmp_path, monkeypatch):
+    """Com ANS_PERFIL=1, só a etapa mais lenta tem cProfile e tracemalloc gravados"""
+    monkeypatch.setenv("ANS_PERFIL", "1")
+    caminho = tmp_path / "metricas.json"
+    with Execucao("teste", caminho) as execucao:
+        with execucao.etapa("rapida"):
+            pass
+        with execucao.etapa("lenta"):
+            consumir_cpu(0.2)
+            dados = [str(i) for i in range(50_000)]
+        with execucao.etapa("media"):
+            consumir_cpu(0.05)
+
+    relatorio = json.loads(caminho.read_text(encoding="utf-8"))
+    assert relatorio["perfil"]["etapa"] == "lenta"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "metricas.json", "metricas.lenta.prof", "metricas.lenta.tracemalloc.txt"
+    ]
+    funcoes = {funcao for _, _, funcao in pstats.Stats(relatorio["perfil"]["cprofile"]).stats}
+    assert "consumir_cpu" in funcoes
+    assert "test_metricas.py" in (tmp_path / "metricas.lenta.tracemalloc.txt").read_text(encoding="utf-8")
+    assert len(dados) == 50_000
+
+
+def test_previas_so_no_modo_verboso(capsys, monkeypatch):
+    monkeypatch.setattr(metricas, "VERBOSO", False)
+    previa("PREVIEW FINAL", "conteudo")
+    assert capsys.readouterr().out == ""
+
+    metricas.definir_verbosidade(True)
+    previa("PREVIEW FINAL", "conteudo")
+    assert "PREVIEW FINAL" in capsys.readouterr().out
+
+
+def test_entradas_do_pipeline_gravam_o_relatorio(tmp_path, monkeypatch):
+    """desafio 1, build_db e sqlite_test gravam o relatório com as linhas de cada etapa"""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    gerar_base_bruta(raw_dir, linhas_por_trimestre=1_000, n_operadoras=30)
+    monkeypatch.setattr(desafio1, "RAW_DIR", raw_dir)
+    monkeypatch.setattr(desafio1, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(desafio1, "baixar_cadastro_operadoras", lambda: raw_dir / "cadastro_operadoras.csv")
+
+    desafio1.consolidar_despesas()
+    etapas = etapas_por_nome(json.loads((tmp_path / "metricas.json").read_text(encoding="utf-8")))
+    assert list(etapas) == ["cadastro", "leitura", "merge", "exportacao"]
+    assert etapas["leitura"]["dataframe_mb"] > 0
+    assert etapas["merge"]["linhas_entrada"] == etapas["merge"]["linhas_saida"] == etapas["leitura"]["linhas_saida"]
+
+    desafio1.consolidar_despesas(chunk_size=300)
+    etapas = etapas_por_nome(json.loads((tmp_path / "metricas.json").read_text(encoding="utf-8")))
+    assert list(etapas) == ["cadastro", "consolidacao", "zip"]
+
+    gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=30)
+    gerar_consolidado(tmp_path / "consolidado_despesas.csv", 2_000, n_operadoras=30)
+    build_db(str(tmp_path / "ans.db"), str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+    relatorio = json.loads((tmp_path / "metricas_build_db.json").read_text(encoding="utf-8"))
+    etapas = etapas_por_nome(relatorio)
+    assert list(etapas) == ["operadoras", "despesas", "insercao", "indices", "busca", "rollups", "resumos",
+                            "analyze", "vacuum"]
+    assert etapas["despesas"]["linhas_saida"] == 2_000
+    assert relatorio["etapa_mais_lenta"] in etapas
+
+    monkeypatch.chdir(tmp_path)
+    desafio3.run_test(str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+    etapas = etapas_por_nome(json.loads((tmp_path / "metricas_sqlite_test.json").read_text(encoding="utf-8")))
+    assert list(etapas) == ["operadoras", "despesas", "rollups", "query_1", "query_2", "query_3"]
+    assert etapas["query_2"]["linhas_saida"] == 5
+
+
+def test_sqlite_test_com_falha_na_carga(tmp_path, monkeypatch):
+    """Falha ao carregar as despesas: o erro é propagado, o relatório fica com sucesso=false e o banco é fechado"""
+    gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=10)
+    fechados = []
+    abrir = desafio3.abrir_motor
+
+    def abrir_e_registrar(nome):
+        banco = abrir(nome)
+        fechar = banco.fechar
+        banco.fechar = lambda: fechados.append(nome) or fechar()
+        return banco
+
+    monkeypatch.setattr(desafio3, "abrir_motor", abrir_e_registrar)
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        desafio3.run_test(str(tmp_path / "nao_existe.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+
+    relatorio = json.loads((tmp_path / "metricas_sqlite_test.json").read_text(encoding="utf-8"))
+    assert relatorio["sucesso"] is False
+    assert list(etapas_por_nome(relatorio)) == ["operadoras", "despesas"]
+    assert fechados == ["sqlite"]
+    assert not (tmp_path / "test_results.txt").exists()
@@ -0,0 +1,115 @@
+import pytest
+import sys
+import os
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comum.motor as motor
+import desafio_03_banco_dados.src.sqlite_test as desafio3
+import desafio_04_api_interface.backend.analitico as analitico
+import desafio_04_api_interface.backend.main as desafio4
+from benchmarks.bench_rollups import mesmos_resultados
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+from comum.consolidado import EscritorParquet, caminho_parquet
+from comum.esquema import ler_cadop, ler_consolidado_csv
+
+client = TestClient(desafio4.app)
+
+ROTAS_AGREGADAS = ["/api/estatisticas/crescimento?limit=20", "/api/estatisticas/ufs",
+                   "/api/estatisticas/acima_media?limit=1000"]
+
+
+def executar(nome, consolidado, cadop):
+    """Consolidado com as colunas calculadas e as 3 queries do desafio 3 no motor `nome`"""
+    banco = motor.abrir_motor(nome)
+    banco.carregar_dataframe("operadoras", ler_cadop(cadop, ["CNPJ", "UF", "Razao_Social"]))
+    banco.carregar_consolidado("despesas_consolidadas", consolidado)
+    banco.criar_rollups(despesas="despesas_consolidadas", razao_social="RazaoSocial")
+    _, despesas = banco.consultar(
+        "SELECT CNPJ, Ano, Trimestre, data_referencia, valor_centavos FROM despesas_consolidadas"
+    )
+    resultados = [banco.consultar(query)[1] for _, query in desafio3.QUERIES]
+    banco.fechar()
+    return sorted(despesas, key=repr), resultados
+
+
+def mesma_resposta(obtida, esperada):
+    """Mesmas chaves e linhas, com floats comparados com tolerância"""
+    return all(list(a) == list(b) for a, b in zip(obtida, esperada)) and mesmos_resultados(
+        [list(item.values()) for item in obtida], [list(item.values()) for item in esperada]
+    )
+
+
+def test_motor_desconhecido_ou_sem_duckdb(monkeypatch):
+    """Sem o pacote duckdb, o motor DuckDB falha com a instrução de instalação (e a API não sobe com ele)"""
+    with pytest.raises(ValueError):
+        motor.abrir_motor("postgres")
+
+    monkeypatch.setattr(motor, "_duckdb", lambda: None)
+    with pytest.raises(RuntimeError, match="pip install duckdb"):
+        motor.abrir_motor("duckdb")
+
+    monkeypatch.setenv("ANS_MOTOR", "duckdb")
+    with pytest.raises(RuntimeError, match="pip install duckdb"):
+        analitico.criar_motor()
+    monkeypatch.delenv("ANS_MOTOR")
+    assert analitico.criar_motor() is None
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_duckdb_igual_ao_sqlite(tmp_path, formato):
+    """Lendo o CSV ou o Parquet no lugar, o DuckDB dá as mesmas colunas calculadas e as mesmas queries"""
+    pytest.importorskip("duckdb")
+    cadop = tmp_path / "Relatorio_cadop.csv"
+    consolidado = tmp_path / "consolidado_despesas.csv"
+    gerar_cadastro(cadop, n_operadoras=80)
+    gerar_consolidado(consolidado, 20_000, n_operadoras=100)  # CNPJs fora do cadastro também
+    if formato == "parquet":
+        pytest.importorskip("pyarrow")
+        escritor = EscritorParquet(caminho_parquet(consolidado))
+        escritor.escrever(ler_consolidado_csv(consolidado))
+        escritor.fechar()
+
+    despesas_sqlite, queries_sqlite = executar("sqlite", consolidado, cadop)
+    despesas_duckdb, queries_duckdb = executar("duckdb", consolidado, cadop)
+
+    assert despesas_duckdb == despesas_sqlite
+    for (titulo, _), esperado, resultado in zip(desafio3.QUERIES, queries_sqlite, queries_duckdb):
+        assert esperado
+        assert mesmos_resultados(resultado, esperado), titulo
+
+
+def test_api_com_duckdb_igual_ao_ans_db(banco_api, monkeypatch):
+    """Com o motor analítico, /api/estatisticas e as análises batem com o ans.db gerado dos mesmos arquivos"""
+    pytest.importorskip("duckdb")
+    base = os.path.dirname(banco_api)
+    consolidado = os.path.join(base, "consolidado_despesas.csv")
+    cadop = os.path.join(base, "Relatorio_cadop.csv")
+    if not (os.path.exists(consolidado) and os.path.exists(cadop)):
+        pytest.skip("ANS_DB_PATH externo, sem os arquivos de origem ao lado")
+
+    desafio4._estatisticas.clear()
+    esperado = [client.get(rota).json() for rota in ["/api/estatisticas"] + ROTAS_AGREGADAS]
+
+    motor_analitico = analitico.MotorAnalitico(consolidado, cadop)
+    monkeypatch.setattr(desafio4, "motor_analitico", motor_analitico)
+    monkeypatch.setattr(desafio4, "_estatisticas", {})
+    resposta = [client.get(rota).json() for rota in ["/api/estatisticas"] + ROTAS_AGREGADAS]
+
+    assert resposta[0]["build_id"] == motor_analitico.build_id() != esperado[0]["build_id"]
+    for chave in ["total_geral", "media_geral"]:
+        assert resposta[0][chave] == pytest.approx(esperado[0][chave], rel=1e-9)
+    for chave in ["top_5", "distribuicao_uf", "por_trimestre"]:
+        assert mesma_resposta(resposta[0][chave], esperado[0][chave]), chave
+    for rota, obtida, referencia in zip(ROTAS_AGREGADAS, resposta[1:], esperado[1:]):
+        assert referencia and mesma_resposta(obtida, referencia), rota
+
+    # Arquivo de origem regravado: nova versão, motor reaberto
+    versao = motor_analitico.versao_atual()
+    st = os.stat(cadop)
+    os.utime(cadop, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert motor_analitico.versao_atual() != versao
+    assert client.get("/api/estatisticas").json()["build_id"] == motor_analitico.build_id()
@@ -0,0 +1,87 @@
+import pytest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comum.normalizacao as normalizacao
+from comum.normalizacao import corrigir_encoding, data_referencia, detectar_encoding
+from desafio_04_api_interface.backend.build_db import prepare_operadoras
+from benchmarks.sintetico import gerar_cadastro
+
+
+def corrigir_por_linha(text):
+    """Correção anterior, chamada célula a célula"""
+    if not isinstance(text, str): return text
+    try: return text.encode('latin-1').decode('utf-8')
+    except: return text
+
+
+def data_por_linha(df):
+    """Cálculo anterior de data_referencia, com um lambda por linha"""
+    return df['Ano'].astype(str) + "-" + \
+        df['Trimestre'].astype(str).apply(lambda x: '01' if '1' in str(x) else ('04' if '2' in str(x) else '07' if '3' in str(x) else '10')) + "-01"
+
+
+def test_detectar_encoding(tmp_path, monkeypatch):
+    """BOM, UTF-8 sem BOM e latin-1, inclusive com caractere partido entre blocos"""
+    texto = "CNPJ;Razao_Social\n1;SAÚDE ASSISTÊNCIA\n"
+    casos = {"utf-8-sig": texto.encode("utf-8-sig"), "utf-8": texto.encode("utf-8"), "latin-1": texto.encode("latin-1")}
+    for esperado, conteudo in casos.items():
+        caminho = tmp_path / f"{esperado}.csv"
+        caminho.write_bytes(conteudo)
+        assert detectar_encoding(caminho) == esperado
+
+    # Blocos de 21 bytes: o 'Ú' (2 bytes em UTF-8) fica dividido entre o 1º e o 2º bloco
+    monkeypatch.setattr(normalizacao, "TAMANHO_BLOCO", texto.encode("utf-8").index("Ú".encode("utf-8")) + 1)
+    assert detectar_encoding(tmp_path / "utf-8.csv") == "utf-8"
+    assert detectar_encoding(tmp_path / "latin-1.csv") == "latin-1"
+
+
+def test_corrigir_encoding_igual_a_correcao_por_linha():
+    """Mesmo resultado da correção célula a célula, com mojibake, acentos corretos, NaN e fora do latin-1"""
+    valores = ["SAÃšDE", "SAÚDE", "ASSISTÃŠNCIA MÉDICA", None, np.nan, "PLANO – SAÚDE", "SP", "Ã"]
+    serie = pd.Series(np.random.default_rng(0).choice(np.array(valores, dtype=object), 10_000), name="Razao_Social")
+
+    corrigida = corrigir_encoding(serie)
+
+    esperado = serie.apply(corrigir_por_linha)
+    assert corrigida.name == "Razao_Social"
+    pd.testing.assert_series_equal(corrigida.fillna("<nulo>"), esperado.fillna("<nulo>"), check_dtype=False)
+    assert corrigida.isna().sum() == serie.isna().sum()
+
+
+@pytest.mark.parametrize("trimestres, anos", [
+    (["1T", "2T", "3T", "4T"], np.array([2024, 2025], dtype="int64")),
+    (["1", "2", "3", "4"], np.array([2023, 2025], dtype="int16")),
+    ([1, 2, 3, 4, np.nan], np.array([2025.0, np.nan])),
+])
+def test_data_referencia_igual_ao_calculo_por_linha(trimestres, anos):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "Ano": rng.choice(anos, 5_000),
+        "Trimestre": rng.choice(np.array(trimestres, dtype=object), 5_000),
+    })
+    pd.testing.assert_series_equal(data_referencia(df["Ano"], df["Trimestre"]), data_por_linha(df), check_names=False)
+
+    # Trimestre categórico (consolidado lido do Parquet)
+    df["Trimestre"] = df["Trimestre"].astype("category")
+    pd.testing.assert_series_equal(data_referencia(df["Ano"], df["Trimestre"]), data_por_linha(df), check_names=False)
+
+
+def test_cadastro_latin1_e_utf8_dao_o_mesmo_resultado(tmp_path):
+    """O build_db lê o cadastro da ANS (latin-1) e o regravado em UTF-8 da mesma forma"""
+    cadastro = gerar_cadastro(tmp_path / "base.csv", n_operadoras=50)
+    cadastro.loc[0, "Razao_Social"] = "OPERADORA DE SAÚDE ASSISTÊNCIA MÉDICA"
+    for encoding in ("latin-1", "utf-8", "utf-8-sig"):
+        cadastro.to_csv(tmp_path / f"{encoding}.csv", sep=";", index=False, encoding=encoding)
+
+    resultados = [prepare_operadoras(tmp_path / f"{encoding}.csv") for encoding in ("latin-1", "utf-8", "utf-8-sig")]
+
+    assert resultados[0].iloc[0]["razao_social"] == "OPERADORA DE SAÚDE ASSISTÊNCIA MÉDICA"
+    for resultado in resultados[1:]:
+        pd.testing.assert_frame_equal(resultado, resultados[0])
@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_04_api_interface.backend.main as desafio4
+from desafio_04_api_interface.backend.paginacao import CacheTotais, codificar_cursor, PROXIMA
+
+client = TestClient(desafio4.app)
+
+pytestmark = pytest.mark.usefixtures("banco_api")
+
+
+def listar(**params):
+    resposta = client.get("/api/operadoras", params=params)
+    assert resposta.status_code == 200
+    return resposta.json()
+
+
+def por_paginas(limit, **params):
+    """Todas as operadoras pela paginação por page/OFFSET"""
+    total = listar(limit=limit, **params)["total"]
+    cnpjs = []
+    for page in range(1, -(-total // limit) + 1):
+        cnpjs += [op["cnpj"] for op in listar(page=page, limit=limit, **params)["data"]]
+    return cnpjs
+
+
+def por_cursor(limit, **params):
+    """Todas as operadoras seguindo o `next`; devolve também o cursor da última página"""
+    resposta = listar(limit=limit, **params)
+    paginas = [resposta]
+    while resposta["next"]:
+        resposta = listar(limit=limit, cursor=resposta["next"], **params)
+        paginas.append(resposta)
+    return paginas
+
+
+@pytest.mark.parametrize("busca", [{}, {"search": "saude"}, {"search": "100"}, {"search": "0001"}])
+def test_cursor_percorre_o_mesmo_resultado_que_as_paginas(busca):
+    """Seguindo `next` até o fim, chega-se às mesmas operadoras, na mesma ordem, que por page"""
+    paginas = por_cursor(7, **busca)
+    cnpjs = [op["cnpj"] for pagina in paginas for op in pagina["data"]]
+
+    assert cnpjs == por_paginas(7, **busca)
+    assert len(cnpjs) == len(set(cnpjs)) == paginas[0]["total"] > 7
+    assert paginas[0]["prev"] is None and paginas[-1]["next"] is None
+
+
+def test_listagem_em_ordem_de_cnpj():
+    cnpjs = [op["cnpj"] for op in listar(limit=100)["data"]]
+    assert cnpjs == sorted(cnpjs)
+
+
+def test_prev_volta_pelas_mesmas_paginas():
+    """Do fim para o começo pelo `prev`, as páginas são as mesmas da ida"""
+    ida = por_cursor(7)
+    volta = [ida[-1]]
+    while volta[-1]["prev"]:
+        volta.append(listar(limit=7, cursor=volta[-1]["prev"]))
+
+    assert [p["data"] for p in reversed(volta)] == [p["data"] for p in ida]
+
+
+def test_cursor_sem_relevancia(monkeypatch):
+    """Acima do limite de relevância o cursor segue a ordem do índice FTS5"""
+    monkeypatch.setattr(desafio4, "LIMITE_RELEVANCIA", 1)
+    paginas = por_cursor(7, search="saude")
+    cnpjs = [op["cnpj"] for pagina in paginas for op in pagina["data"]]
+    assert cnpjs == por_paginas(7, search="saude")
+
+
+def test_cursor_invalido():
+    """Cursor corrompido ou de outra busca é recusado com 400"""
+    proximo = listar(limit=5, search="saude")["next"]
+    for params in [{"cursor": "não é um cursor"}, {"cursor": proximo},
+                   {"cursor": codificar_cursor(None, PROXIMA, [1, 2, 3])}]:
+        resposta = client.get("/api/operadoras", params=params)
+        assert resposta.status_code == 400
+        assert resposta.json()["detail"] == "Cursor inválido"
+
+
+def test_cursor_com_chaves_de_outro_tipo():
+    """Chaves que não são escalares do tipo da coluna de ordenação dão 400, e não erro no SQLite"""
+    # Sem busca a chave é o CNPJ (texto); na busca por nome, bm25 e rowid (números)
+    pedidos = [{"cursor": codificar_cursor(None, PROXIMA, [chave])} for chave in (["x"], {"a": 1}, None, True, 123)]
+    pedidos += [{"search": "saude", "cursor": codificar_cursor("saude", PROXIMA, chaves)}
+                for chaves in (["abc"], ["abc", 1], [-1.5, "abc"], [float("nan"), 1])]
+    for params in pedidos:
+        resposta = client.get("/api/operadoras", params=params)
+        assert resposta.status_code == 400, params
+        assert resposta.json()["detail"] == "Cursor inválido"
+
+
+def test_cache_de_totais():
+    """Um total por busca e versão do banco; LRU limitado"""
+    cache = CacheTotais(tamanho=2)
+    chamadas = []
+
+    def contar(valor):
+        return lambda: chamadas.append(valor) or valor
+
+    assert cache.obter("v1", "a", contar(10)) == 10
+    assert cache.obter("v1", "a", contar(99)) == 10
+    cache.obter("v1", "b", contar(20))
+    cache.obter("v1", "c", contar(30))
+    assert cache.obter("v1", "a", contar(11)) == 11  # "a" saiu do LRU
+    assert cache.obter("v2", "c", contar(31)) == 31  # banco reconstruído
+    assert chamadas == [10, 20, 30, 11, 31]
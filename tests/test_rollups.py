@@ -0,0 +1,151 @@
+import pytest
+import sys
+import os
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_03_banco_dados.src.sqlite_test as desafio3
+import desafio_04_api_interface.backend.main as desafio4
+from benchmarks.bench_rollups import QUERIES_BRUTAS, gerar_banco, mesmos_resultados
+from benchmarks.sintetico import gerar_cadastro, gerar_consolidado
+from comum.rollups import criar_rollups
+
+client = TestClient(desafio4.app)
+
+
+@pytest.fixture
+def banco(banco_api):
+    conn = sqlite3.connect(banco_api)
+    yield conn
+    conn.close()
+
+
+def test_rollups_do_build_batem_com_as_despesas(banco):
+    """Rollups por operadora e por UF iguais ao GROUP BY sobre as despesas brutas"""
+    por_operadora = banco.execute("""
+        SELECT cnpj, data_referencia, ano, trimestre, SUM(valor_centavos), COUNT(*)
+        FROM despesas GROUP BY cnpj, data_referencia ORDER BY cnpj, data_referencia
+    """).fetchall()
+    assert mesmos_resultados(
+        banco.execute("SELECT * FROM rollup_operadora_trimestre ORDER BY cnpj, data_referencia").fetchall(),
+        por_operadora,
+    )
+
+    por_uf = banco.execute("""
+        SELECT o.uf, d.data_referencia, d.ano, d.trimestre, SUM(d.valor_centavos), COUNT(*), COUNT(DISTINCT d.cnpj)
+        FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+        GROUP BY o.uf, d.data_referencia ORDER BY o.uf, d.data_referencia
+    """).fetchall()
+    assert mesmos_resultados(
+        banco.execute("SELECT * FROM rollup_uf_trimestre ORDER BY uf, data_referencia").fetchall(),
+        por_uf,
+    )
+
+
+def test_queries_do_desafio3_iguais_as_brutas():
+    """As queries sobre os rollups dão o mesmo resultado das CTEs sobre as despesas brutas"""
+    conn = sqlite3.connect(":memory:")
+    gerar_banco(conn, 30_000, n_operadoras=200, n_trimestres=3)
+    criar_rollups(conn, despesas="despesas_consolidadas", razao_social="RazaoSocial")
+
+    for (titulo, bruta), (_, rollup) in zip(QUERIES_BRUTAS, desafio3.QUERIES):
+        esperado = conn.execute(bruta).fetchall()
+        assert esperado
+        assert mesmos_resultados(conn.execute(rollup).fetchall(), esperado), titulo
+
+
+def test_sqlite_test_gera_o_log(tmp_path, monkeypatch):
+    """O sqlite_test.py carrega os CSVs, cria os rollups e grava as 3 queries no log"""
+    gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=30)
+    gerar_consolidado(tmp_path / "consolidado_despesas.csv", 3_000, n_operadoras=30)
+    monkeypatch.chdir(tmp_path)
+
+    desafio3.run_test(str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+
+    log = (tmp_path / "test_results.txt").read_text(encoding="utf-8")
+    for numero in (1, 2, 3):
+        assert f"QUERY {numero}:" in log
+    assert "Crescimento_Perc" in log and "Total_UF" in log and "Trimestres_Acima_Media" in log
+
+
+def test_sqlite_test_nomeia_operadoras_fora_do_cadastro(tmp_path, monkeypatch):
+    """Operadoras fora do cadastro (só lista as ativas) saem com a razão social do consolidado"""
+    gerar_cadastro(tmp_path / "Relatorio_cadop.csv", n_operadoras=5)
+    gerar_consolidado(tmp_path / "consolidado_despesas.csv", 3_000, n_operadoras=30)
+    monkeypatch.chdir(tmp_path)
+
+    desafio3.run_test(str(tmp_path / "consolidado_despesas.csv"), str(tmp_path / "Relatorio_cadop.csv"))
+
+    log = (tmp_path / "test_results.txt").read_text(encoding="utf-8")
+    consulta1, consulta3 = log.split("QUERY 1:")[1].split("QUERY 2:")[0], log.split("QUERY 3:")[1]
+    assert "DESCONHECIDO" not in log
+    assert consulta1.count("OPERADORA DE SAÚDE") == 5
+    assert "OPERADORA DE SAÚDE" in consulta3
+
+
+@pytest.mark.usefixtures("banco_api")
+def test_series_trimestrais_da_api(banco):
+    """/trimestres da operadora e da UF somam as despesas de cada trimestre"""
+    cnpj, uf = banco.execute("""
+        SELECT o.cnpj, o.uf FROM operadoras o JOIN despesas d ON d.cnpj = o.cnpj LIMIT 1
+    """).fetchone()
+
+    esperado = banco.execute("""
+        SELECT data_referencia, SUM(valor_centavos), COUNT(*) FROM despesas
+        WHERE cnpj = ? GROUP BY data_referencia ORDER BY data_referencia
+    """, (cnpj,)).fetchall()
+    serie = client.get(f"/api/operadoras/{cnpj}/trimestres").json()
+    assert [t["data_referencia"] for t in serie] == [e[0] for e in esperado]
+    for t, (_, total, n) in zip(serie, esperado):
+        assert t["total"] == total / 100
+        assert t["n_despesas"] == n
+
+    esperado = banco.execute("""
+        SELECT d.data_referencia, SUM(d.valor_centavos), COUNT(DISTINCT d.cnpj)
+        FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj
+        WHERE o.uf = ? GROUP BY d.data_referencia ORDER BY d.data_referencia
+    """, (uf,)).fetchall()
+    serie = client.get(f"/api/ufs/{uf.lower()}/trimestres").json()
+    assert [(t["data_referencia"], t["n_operadoras"]) for t in serie] == [(e[0], e[2]) for e in esperado]
+    assert [t["total"] for t in serie] == [e[1] / 100 for e in esperado]
+
+    assert client.get("/api/operadoras/00000000000000/trimestres").json() == []
+
+
+@pytest.mark.usefixtures("banco_api")
+def test_analises_da_api(banco):
+    """Crescimento, distribuição por UF e acima da média batem com as consultas sobre as despesas"""
+    crescimento = banco.execute("""
+        WITH p AS (SELECT cnpj, SUM(valor_centavos) AS total FROM despesas
+                   WHERE data_referencia = (SELECT MIN(data_referencia) FROM despesas) GROUP BY cnpj),
+             u AS (SELECT cnpj, SUM(valor_centavos) AS total FROM despesas
+                   WHERE data_referencia = (SELECT MAX(data_referencia) FROM despesas) GROUP BY cnpj)
+        SELECT p.cnpj, (u.total - p.total) * 100.0 / p.total AS c FROM p JOIN u ON u.cnpj = p.cnpj
+        WHERE p.total > 0 ORDER BY c DESC, p.cnpj LIMIT 3
+    """).fetchall()
+    ranking = client.get("/api/estatisticas/crescimento?limit=3").json()
+    assert [r["cnpj"] for r in ranking] == [c[0] for c in crescimento]
+    assert [r["crescimento_percentual"] for r in ranking] == pytest.approx([c[1] for c in crescimento])
+
+    ufs = banco.execute("""
+        SELECT o.uf, SUM(d.valor_centavos) AS total, COUNT(DISTINCT d.cnpj)
+        FROM despesas d JOIN operadoras o ON o.cnpj = d.cnpj GROUP BY o.uf ORDER BY total DESC
+    """).fetchall()
+    resposta = client.get("/api/estatisticas/ufs").json()
+    assert [(u["uf"], u["n_operadoras"]) for u in resposta] == [(u[0], u[2]) for u in ufs]
+    assert [u["media_por_operadora"] for u in resposta] == pytest.approx([u[1] / 100 / u[2] for u in ufs])
+
+    acima = banco.execute("""
+        WITH t AS (SELECT cnpj, data_referencia, SUM(valor_centavos) AS total FROM despesas
+                   GROUP BY cnpj, data_referencia),
+             m AS (SELECT data_referencia, AVG(total) AS media FROM t GROUP BY data_referencia)
+        SELECT t.cnpj, COUNT(*) AS n FROM t JOIN m ON m.data_referencia = t.data_referencia
+        WHERE t.total > m.media GROUP BY t.cnpj HAVING n >= 2 ORDER BY n DESC, t.cnpj
+    """).fetchall()
+    resposta = client.get("/api/estatisticas/acima_media?limit=1000").json()
+    assert [(r["cnpj"], r["trimestres_acima_media"]) for r in resposta] == acima
+    assert len(client.get("/api/estatisticas/acima_media?min_trimestres=3").json()) == sum(n >= 3 for _, n in acima)
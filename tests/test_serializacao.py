@@ -0,0 +1,69 @@
+import pytest
+import sys
+import os
+import json
+import sqlite3
+
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_04_api_interface.backend.main as desafio4
+from desafio_04_api_interface.backend import serializacao
+from desafio_04_api_interface.backend.serializacao import array_json, dumps, linhas_como_tuplas, validar
+
+client = TestClient(desafio4.app)
+
+pytestmark = pytest.mark.usefixtures("banco_api")
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE t (id INTEGER, nome TEXT, valor REAL)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", [(i, f"SAÚDE {i}", i * 1.5) for i in range(2_500)])
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("com_orjson", [True, False])
+def test_array_json_em_lotes(conn, monkeypatch, com_orjson):
+    """O array escrito em lotes é o mesmo JSON da lista inteira, com e sem orjson"""
+    if not com_orjson:
+        monkeypatch.setattr(serializacao, "_ORJSON", None)
+    esperado = [dict(row) for row in conn.execute("SELECT * FROM t")]
+
+    corpo = b"".join(array_json(linhas_como_tuplas(conn, "SELECT * FROM t"), linhas_por_lote=1_000))
+    assert json.loads(corpo) == esperado
+    assert corpo == dumps(esperado)
+
+    vazio = b"".join(array_json(linhas_como_tuplas(conn, "SELECT * FROM t WHERE id < 0")))
+    assert vazio == b"[]"
+
+
+def test_mesmo_json_com_e_sem_orjson(monkeypatch):
+    """O fallback para o json da biblioteca padrão gera os mesmos bytes (acentos sem escape)"""
+    cnpj = client.get("/api/operadoras?limit=1").json()["data"][0]["cnpj"]
+    urls = ["/api/estatisticas", "/api/operadoras?limit=20", f"/api/operadoras/{cnpj}", f"/api/operadoras/{cnpj}/despesas"]
+    com_orjson = [client.get(url, headers={"Accept-Encoding": "identity"}).content for url in urls]
+
+    monkeypatch.setattr(serializacao, "_ORJSON", None)
+    monkeypatch.setattr(desafio4, "_estatisticas", {})
+    sem_orjson = [client.get(url, headers={"Accept-Encoding": "identity"}).content for url in urls]
+
+    assert com_orjson == sem_orjson
+    assert "SAÚDE".encode() in com_orjson[1]
+
+
+def test_respostas_seguem_os_modelos(monkeypatch):
+    """No modo debug as respostas são validadas contra os modelos Pydantic"""
+    monkeypatch.setattr(desafio4, "DEBUG", True)
+    cnpj = client.get("/api/operadoras?limit=1").json()["data"][0]["cnpj"]
+    for url in ["/api/operadoras?limit=20", f"/api/operadoras/{cnpj}", f"/api/operadoras/{cnpj}/despesas"]:
+        assert client.get(url).status_code == 200
+
+    with pytest.raises(ValidationError):
+        validar(desafio4.Despesa, {"cnpj": cnpj, "ano": "dois mil"})
@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+
+import pandas as pd
+
+# Adiciona a raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmarks.sintetico as sintetico
+import benchmarks.suite as suite
+from benchmarks.sintetico import gerar_cadastro, gerar_trimestre
+from comum.normalizacao import corrigir_encoding, detectar_encoding
+from desafio_02_transformacao_validacao.src.main import validate_cnpj_batch
+
+
+def test_cadastro_com_cnpjs_invalidos_e_acentuacao_quebrada(tmp_path):
+    """Frações pedidas de CNPJs inválidos e de mojibake, em latin-1, sem mudar os demais campos"""
+    limpo = gerar_cadastro(tmp_path / "limpo.csv", n_operadoras=2000)
+    sujo = gerar_cadastro(tmp_path / "sujo.csv", n_operadoras=2000, fracao_invalidos=0.1, fracao_mojibake=0.2,
+                          encoding="latin-1")
+
+    invalidos = ~validate_cnpj_batch(sujo["CNPJ"])
+    assert validate_cnpj_batch(limpo["CNPJ"]).all()
+    assert 0.07 < invalidos.mean() < 0.13
+    assert (sujo["CNPJ"].str[:13] == limpo["CNPJ"].str[:13]).all()
+
+    quebrados = sujo["Razao_Social"] != limpo["Razao_Social"]
+    assert 0.15 < quebrados.mean() < 0.25
+    assert (corrigir_encoding(sujo["Razao_Social"]) == limpo["Razao_Social"]).all()
+    pd.testing.assert_frame_equal(sujo[["REGISTRO_OPERADORA", "Modalidade", "UF"]],
+                                  limpo[["REGISTRO_OPERADORA", "Modalidade", "UF"]])
+
+    assert detectar_encoding(tmp_path / "sujo.csv") == "latin-1"
+    relido = pd.read_csv(tmp_path / "sujo.csv", sep=";", encoding="latin-1", dtype=str)
+    assert relido["Razao_Social"].tolist() == sujo["Razao_Social"].tolist()
+
+
+def test_trimestre_em_blocos_e_assimetrico(tmp_path, monkeypatch):
+    """Arquivo escrito em vários blocos com um só cabeçalho; com assimetria, poucas operadoras dominam"""
+    monkeypatch.setattr(sintetico, "TAMANHO_BLOCO", 7_000)
+    registros = [str(300000 + i) for i in range(500)]
+
+    gerar_trimestre(tmp_path / "uniforme.csv", registros, 50_000)
+    gerar_trimestre(tmp_path / "zipf.csv", registros, 50_000, assimetria=1.1)
+
+    contagens = {}
+    for nome in ("uniforme", "zipf"):
+        df = pd.read_csv(tmp_path / f"{nome}.csv", sep=";", encoding="utf-8-sig", dtype=str)
+        assert len(df) == 50_000
+        assert df["VL_SALDO_FINAL"].str.fullmatch(r"-?\d+,\d{2}").all()
+        contagens[nome] = df["REG_ANS"].value_counts().to_numpy()
+
+    # Fatia das 10 maiores operadoras
+    assert contagens["uniforme"][:10].sum() / 50_000 < 0.05
+    assert contagens["zipf"][:10].sum() / 50_000 > 0.3
+
+
+def test_comparacao_de_resultados():
+    """Regressão só quando piora além da tolerância e do piso de ruído"""
+    def resultados(tempo_build, tempo_query, p50):
+        return {"escalas": {"100000": {
+            "etapas": {"build_db": {"insercao": {"tempo_s": tempo_build}, "analyze": {"tempo_s": tempo_query}}},
+            "api": {"listagem": {"p50_ms": p50}},
+        }}}
+
+    linhas = suite.comparar(resultados(1.0, 0.001, 10.0), resultados(1.5, 0.004, 10.5), tolerancia=0.10)
+    regressoes = {medida for _, medida, _, _, _, _, regrediu in linhas if regrediu}
+    assert regressoes == {"build_db/insercao"}  # analyze: +300%, mas 3 ms; listagem: +5%
+    assert len(linhas) == 3
+
+
+def test_suite_grava_resultados_por_escala(tmp_path):
+    """Execução pequena da suíte completa: etapas de cada script e rotas da API em JSON"""
+    resultado = suite.executar_escala(
+        n_linhas=3_000, n_trimestres=3, n_operadoras=40, chunk_size=1_000, requisicoes=2,
+        etapas=suite.ETAPAS, seed=0,
+    )
+    json.dumps(resultado)
+
+    assert resultado["linhas"] == 3_000
+    assert set(resultado["etapas"]) == {"desafio_01", "desafio_02", "desafio_03", "build_db"}
+    assert resultado["etapas"]["desafio_01"]["consolidacao"]["linhas_saida"] == 3_000
+    validacao = resultado["etapas"]["desafio_02"]["validacao"]
+    assert validacao["linhas_saida"] < validacao["linhas_entrada"] == 3_000
+    assert {nome for nome, _, _ in suite.rotas_api("0", "SP")} == set(resultado["api"])
+    assert all(rota["p50_ms"] > 0 and rota["bytes"] > 0 for rota in resultado["api"].values())
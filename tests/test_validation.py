@@ -1,11 +1,18 @@
 import pytest
+import random
 import sys
 import os
+import tracemalloc
+
+import pandas as pd
 
 # Adiciona a raiz do projeto ao path para conseguir importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from desafio_02_transformacao_validacao.src.main import validate_cnpj
+from desafio_02_transformacao_validacao.src.main import (
+    validate_cnpj, validate_cnpj_batch, normalize_cnpj, validate_unique_cnpjs, CNPJCache
+)
+from benchmarks.sintetico import gerar_cnpj
 
 def test_cnpj_valido_com_formatacao():
     # Usando um CNPJ que segue o algoritmo mas é voltado para testes/exemplos
@@ -22,3 +29,109 @@ def test_cnpj_invalido_sequencia_igual():
 
 def test_cnpj_vazio():
     assert validate_cnpj("") == False
+
+
+def _cnpj_aleatorio(rng):
+    """Gera entradas variadas: válidos, quase válidos, formatados, lixo e tipos não-string"""
+    tipo = rng.randrange(10)
+    if tipo == 0:
+        return gerar_cnpj(rng.randrange(10**12))
+    if tipo == 1:
+        c = gerar_cnpj(rng.randrange(10**12))
+        return f"{c[:2]}.{c[2:5]}.{c[5:8]}/{c[8:12]}-{c[12:]}"
+    if tipo == 2:
+        # Troca um dígito de um CNPJ válido
+        c = list(gerar_cnpj(rng.randrange(10**12)))
+        i = rng.randrange(14)
+        c[i] = str((int(c[i]) + rng.randrange(1, 10)) % 10)
+        return "".join(c)
+    if tipo == 3:
+        return str(rng.randrange(10)) * rng.choice([13, 14, 15])
+    if tipo == 4:
+        return "".join(rng.choice("0123456789") for _ in range(rng.randrange(0, 20)))
+    if tipo == 5:
+        return "".join(rng.choice("0123456789./- abcÇÃ٣") for _ in range(rng.randrange(0, 25)))
+    if tipo == 6:
+        return int(gerar_cnpj(rng.randrange(10**12)))
+    if tipo == 7:
+        return rng.choice([None, float("nan"), 12345678000195.0, "DESCONHECIDO", ""])
+    if tipo == 8:
+        # Mais longo que um CNPJ formatado: vai para a validação escalar
+        return " " * rng.randrange(20, 60) + gerar_cnpj(rng.randrange(10**12)) + rng.choice(["", "x" * 40, "٣"])
+    return " " + gerar_cnpj(rng.randrange(10**12)) + "\n"
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_validacao_vetorizada_igual_a_escalar(seed):
+    """Propriedade: validate_cnpj_batch concorda com validate_cnpj em entradas aleatórias"""
+    rng = random.Random(seed)
+    entradas = [_cnpj_aleatorio(rng) for _ in range(5000)]
+
+    esperado = [validate_cnpj(c) for c in entradas]
+    obtido = validate_cnpj_batch(entradas, batch_size=777)
+
+    assert obtido.tolist() == esperado
+    assert any(esperado) and not all(esperado)
+
+    # Só números e nulos: sem dtype=object o pandas inferiria float64 ("….0")
+    numericos = [None] + [c for c in entradas if not isinstance(c, str)]
+    assert validate_cnpj_batch(numericos).tolist() == [validate_cnpj(c) for c in numericos]
+
+
+def test_lista_de_numeros_nao_vira_float():
+    """[None, int, int] não é lida como float64: mesma validação da escalar e 14 dígitos na normalização"""
+    entradas = [None, 12345678000195, 11222333000181]
+    assert validate_cnpj_batch(entradas).tolist() == [validate_cnpj(c) for c in entradas] == [False, True, True]
+    assert normalize_cnpj(entradas).tolist()[1:] == ["12345678000195", "11222333000181"]
+
+
+def test_textos_longos_nao_alargam_a_matriz():
+    """Um texto enorme não faz a matriz de caracteres de todo o lote crescer com ele"""
+    entradas = [gerar_cnpj(i) for i in range(20_000)] + ["1" * 2_000, " " * 2_000 + gerar_cnpj(7)]
+
+    tracemalloc.start()
+    obtido = validate_cnpj_batch(entradas)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert obtido.tolist() == [validate_cnpj(c) for c in entradas]
+    assert obtido[-1] and not obtido[-2]
+    # Com a largura do maior texto, só a matriz teria 20.000 x 2.014 x 4 bytes (~160 MB)
+    assert pico < 40 * 1024 * 1024
+
+
+def test_validacao_deduplicada_com_cache_entre_lotes():
+    """Cada CNPJ distinto é validado uma vez; o cache LRU evita revalidar no lote seguinte"""
+    lote1 = ["12.345.678/0001-95", "123456", "12.345.678/0001-95", None, "123456"] * 100
+    cache = CNPJCache(maxsize=10)
+
+    valido, normalizado, stats = validate_unique_cnpjs(lote1, cache)
+    assert valido.tolist() == [validate_cnpj(c) for c in lote1]
+    assert normalizado.iloc[0] == "12345678000195"
+    assert normalizado.iloc[1] == "00000000123456"
+    assert stats["unique"] == 3 and stats["validated"] == 3
+    assert stats["dedup_ratio"] == pytest.approx(500 / 3)
+
+    _, _, stats = validate_unique_cnpjs(["123456", "12345678000195"], cache)
+    assert stats["validated"] == 1
+    assert cache.hits == 1
+
+
+def test_validacao_deduplicada_nao_mistura_int_e_float():
+    """11222333000181 e 1.1222333000181e13 são chaves distintas (e o cache não troca um resultado pelo outro)"""
+    cache = CNPJCache()
+    for entradas in ([None, 12345678000195, 11222333000181], [11222333000181, 1.1222333000181e13, None]):
+        valido, normalizado, _ = validate_unique_cnpjs(entradas, cache)
+        assert valido.tolist() == [validate_cnpj(c) for c in entradas]
+        esperado = normalize_cnpj(entradas)
+        assert normalizado[esperado.notna()].tolist() == esperado.dropna().tolist()
+
+    valido, _, stats = validate_unique_cnpjs(pd.Series([1.1222333000181e13, 11222333000181], dtype=object), cache)
+    assert valido.tolist() == [False, True] and stats["validated"] == 0
+
+
+def test_cache_cnpj_respeita_limite():
+    cache = CNPJCache(maxsize=2)
+    validate_unique_cnpjs(["1", "2", "3"], cache)
+    assert len(cache) == 2
+    assert cache.get("1") is None